@@ -80,7 +80,7 @@ class _HomePageState extends State<HomePage> {
 
   Future<void> _fetchPinnedGuides() async {
     final token = await storage.read(key: 'access_token');
-    final url = Uri.parse('$kBaseUrl/signal-guides/?is_pinned=true');
+    final url = Uri.parse('$kBaseUrl/signal-guides/?is_pinned=true&summary=true');
 
     try {
       final response = await http.get(url, headers: {
@@ -48,7 +48,10 @@ class _ProcedureStepListPageState extends State<ProcedureStepListPage> {
       });
 
       if (response.statusCode == 200) {
-        final List decoded = jsonDecode(response.body);
+        // 只保留此故障案例的步驟（排序時需送出完整且僅屬於此故障案例的 ID）
+        final List decoded = (jsonDecode(response.body) as List)
+            .where((step) => step['fault'] == widget.faultId)
+            .toList();
         decoded.sort((a, b) => a['order'].compareTo(b['order']));
         setState(() {
           _steps = decoded;
@@ -64,25 +67,31 @@ class _ProcedureStepListPageState extends State<ProcedureStepListPage> {
 
   Future<void> _updateOrderToBackend() async {
     final token = await storage.read(key: 'access_token');
+    final url = Uri.parse('$kBaseUrl/steps/reorder/');
 
-    for (int i = 0; i < _steps.length; i++) {
-      final step = _steps[i];
-      final url = Uri.parse('$kBaseUrl/steps/${step['id']}/');
-      final newOrder = i + 1;
+    final response = await http.post(
+      url,
+      headers: {
+        'Authorization': 'Bearer $token',
+        'Content-Type': 'application/json',
+      },
+      body: jsonEncode({
+        'fault': widget.faultId,
+        'ids': _steps.map((step) => step['id']).toList(),
+      }),
+    );
 
-      await http.patch(
-        url,
-        headers: {
-          'Authorization': 'Bearer $token',
-          'Content-Type': 'application/json',
-        },
-        body: jsonEncode({'order': newOrder}),
+    if (!mounted) return;
+    if (response.statusCode == 200) {
+      ScaffoldMessenger.of(context).showSnackBar(
+        const SnackBar(content: Text('✅ 排序已更新')),
       );
+    } else {
+      ScaffoldMessenger.of(context).showSnackBar(
+        const SnackBar(content: Text('❌ 排序更新失敗')),
+      );
+      _fetchSteps();
     }
-
-    ScaffoldMessenger.of(context).showSnackBar(
-      const SnackBar(content: Text('✅ 排序已更新')),
-    );
   }
 
   void _showStepOptions(dynamic step) {
@@ -207,13 +216,16 @@ class _ProcedureStepListPageState extends State<ProcedureStepListPage> {
     final rawUrl = step['file'].toString();
     final fileUrl = rawUrl.startsWith('http') ? rawUrl : '$kHostUrl$rawUrl';
     final isPdf = fileUrl.toLowerCase().endsWith('.pdf');
+    // 清單只下載縮圖，沒有縮圖（尚未產生）時才退回原檔
+    final renditions = (step['renditions'] ?? {}) as Map;
+    final thumbUrl = (renditions['thumb_webp'] ?? renditions['thumb_jpg'])?.toString();
 
     return ListTile(
       key: ValueKey(step['id']),
-      leading: isPdf
+      leading: isPdf && thumbUrl == null
           ? const Icon(Icons.picture_as_pdf, color: Colors.red, size: 40)
           : Image.network(
-        fileUrl,
+        thumbUrl ?? fileUrl,
         width: 50,
         height: 50,
         fit: BoxFit.cover,
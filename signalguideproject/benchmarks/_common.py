@@ -0,0 +1,87 @@
+# benchmarks/_common.py
+# 效能測試共用工具：建立獨立的測試資料庫，不會動到 db.sqlite3
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+# test_db_name：SQLite 預設測試資料庫在記憶體中，需要多執行緒存取同一個檔案時指定檔名
+def setup_django(test_db_name=None):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'signalguideproject.settings')
+    import django
+    from django.conf import settings
+    django.setup()
+    settings.ALLOWED_HOSTS = ['*']
+    settings.SNAPSHOT_AUTO_REBUILD = False  # 背景執行緒可能在測試資料庫刪除後才執行
+    if test_db_name:
+        settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = test_db_name
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def teardown_django():
+    from django.db import connection
+    from django.conf import settings
+    connection.creation.destroy_test_db(settings.DATABASES['default']['NAME'], verbosity=0)
+
+
+def api_client(role='A'):
+    from rest_framework.test import APIClient
+    from signalguideapp.models import CustomUser
+
+    user, created = CustomUser.objects.get_or_create(
+        employee_id='99999', defaults={'name': 'benchmark', 'role': role}
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+# 以 bulk_create 建立指定數量的資料，回傳新建立的說明書
+def seed(guides, devices_per_guide=1, faults_per_device=1, steps_per_fault=1, batch_size=2000):
+    from signalguideapp.models import JobType, SignalGuide, Device, FaultCase, ProcedureStep
+
+    job_type, _ = JobType.objects.get_or_create(name='效能測試')
+    offset = SignalGuide.objects.count()
+    guide_objs = SignalGuide.objects.bulk_create(
+        (SignalGuide(job_type=job_type, system='號誌', doc_number=f'BENCH-{offset + i:08d}', title=f'說明書 {offset + i}')
+         for i in range(guides)),
+        batch_size=batch_size,
+    )
+    devices = Device.objects.bulk_create(
+        (Device(guide=g, name=f'設備 {d}') for g in guide_objs for d in range(devices_per_guide)),
+        batch_size=batch_size,
+    )
+    faults = FaultCase.objects.bulk_create(
+        (FaultCase(device=d, description=f'故障徵狀 {f}') for d in devices for f in range(faults_per_device)),
+        batch_size=batch_size,
+    )
+    ProcedureStep.objects.bulk_create(
+        (ProcedureStep(fault=f, order=o, file='procedure_files/bench.png') for f in faults for o in range(steps_per_fault)),
+        batch_size=batch_size,
+    )
+    return guide_objs
+
+
+# 重複執行 fn，回傳毫秒為單位的 p50 / p95 / 平均
+def timeit(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+    }
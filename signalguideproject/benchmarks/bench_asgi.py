@@ -0,0 +1,119 @@
+# benchmarks/bench_asgi.py
+# 同步 vs 非同步唯讀 API：直接以 ASGI 協定呼叫 Django 的 ASGI application（與 uvicorn／daphne 相同的進入點），
+# 多個虛擬使用者同時請求，比較 requests/sec 與 p99 延遲
+#
+#   python -m benchmarks.bench_asgi --users 50 --seconds 10
+#
+# 實際伺服器可另以 uvicorn signalguideproject.asgi:application 啟動，用 wrk／hey 分別壓測 /api/... 與 /api/async/...
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks._common import setup_django, teardown_django, seed
+
+
+def endpoints(prefix, sample):
+    guide, device, fault, job_type = sample
+    if prefix == 'async':
+        return [
+            f'/api/async/signal-guides/?job_type={job_type}',
+            f'/api/async/signal-guides/{guide}/',
+            f'/api/async/devices/by-guide/{guide}/',
+            f'/api/async/faultcases/by-device/{device}/',
+            f'/api/async/steps/by-fault/{fault}/',
+        ]
+    return [
+        f'/api/signal-guides/?job_type={job_type}',
+        f'/api/signal-guides/{guide}/',
+        f'/api/devices/by-guide/{guide}/',
+        f'/api/faultcases/?device_id={device}',
+        f'/api/steps/?fault_id={fault}',
+    ]
+
+
+async def request(application, url, token):
+    from asgiref.testing import ApplicationCommunicator
+
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    communicator = ApplicationCommunicator(application, scope)
+    await communicator.send_input({'type': 'http.request', 'body': b''})
+    start = await communicator.receive_output(timeout=30)
+    while True:
+        message = await communicator.receive_output(timeout=30)
+        if not message.get('more_body'):
+            break
+    await communicator.wait()
+    return start['status']
+
+
+async def run(application, prefix, samples, token, users, seconds):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def user():
+        nonlocal errors
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            url = rng.choice(endpoints(prefix, rng.choice(samples)))
+            start = time.perf_counter()
+            status = await request(application, url, token)
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(user() for _ in range(users)))
+    latencies.sort()
+    return {
+        'requests_per_sec': round(len(latencies) / seconds, 1),
+        'p50_ms': round(latencies[len(latencies) // 2], 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1], 2) if latencies else None,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guides', type=int, default=500)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    setup_django(test_db_name=os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+    try:
+        from django.core.asgi import get_asgi_application
+        from rest_framework_simplejwt.tokens import AccessToken
+        from signalguideapp import cache
+        from signalguideapp.models import CustomUser, FaultCase
+
+        cache.CACHE_TIMEOUT = 0  # 比較的是資料庫讀取路徑，不經回應快取
+        seed(args.guides, devices_per_guide=3, faults_per_device=3, steps_per_fault=3)
+        samples = [
+            (fault.device.guide_id, fault.device_id, fault.id, fault.device.guide.job_type_id)
+            for fault in FaultCase.objects.select_related('device__guide').order_by('?')[:200]
+        ]
+        user = CustomUser.objects.create_user(employee_id='99998', name='benchmark', password='bench123', role='B')
+        token = str(AccessToken.for_user(user))
+        application = get_asgi_application()
+
+        results = {}
+        for prefix in ('sync', 'async'):
+            asyncio.run(run(application, prefix, samples, token, args.users, 1))  # 暖身
+            results[prefix] = asyncio.run(run(application, prefix, samples, token, args.users, args.seconds))
+        print(json.dumps({'guides': args.guides, 'users': args.users, **results}, indent=2, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/bench_concurrency.py
+# 讀寫併發：多個執行緒讀取說明書（retrieve／bundle），同時有執行緒修改處理步驟，比較各資料庫設定的吞吐量
+#
+#   python -m benchmarks.bench_concurrency --profiles sqlite-plain,sqlite --readers 8 --writers 2 --seconds 10
+#   DJANGO_DB_PROFILE=postgres DJANGO_DB_NAME=... python -m benchmarks.bench_concurrency --profiles postgres
+#
+# sqlite-plain 為未調校的 SQLite（rollback journal、無 busy_timeout），sqlite 為 settings 中的 WAL 設定。
+# 每個設定在獨立的子行程中執行，互不影響。
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks._common import BASE_DIR, setup_django, teardown_django, api_client, seed
+
+
+# 需在建立測試資料庫前設定（journal_mode 會寫入資料庫檔案）
+def configure(profile):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'signalguideproject.settings')
+    from django.conf import settings
+    if profile == 'sqlite-plain':
+        settings.SQLITE_PRAGMAS = {}
+        settings.DATABASES['default']['OPTIONS'] = {}
+
+
+def worker(fn, deadline, samples, errors):
+    from django.db import connection
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = fn()
+                ok = response.status_code < 400
+            except Exception:  # database is locked 等錯誤會直接拋出
+                ok = False
+            if ok:
+                samples.append((time.perf_counter() - start) * 1000)
+            else:
+                errors.append(1)
+    finally:
+        connection.close()
+
+
+def summarize(samples, errors, seconds):
+    samples.sort()
+    return {
+        'ops_per_sec': round(len(samples) / seconds, 1),
+        'p50_ms': round(samples[len(samples) // 2], 2) if samples else None,
+        'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 2) if samples else None,
+        'errors': len(errors),
+    }
+
+
+def run_profile(args):
+    db_name = None
+    if args.profile.startswith('sqlite'):
+        db_name = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    configure(args.profile)
+    setup_django(test_db_name=db_name)
+    # 關閉回應快取，讓每次讀取都實際查詢資料庫
+    from signalguideapp import cache
+    cache.CACHE_TIMEOUT = 0
+    try:
+        from signalguideapp.models import ProcedureStep
+
+        guides = seed(args.guides, devices_per_guide=2, faults_per_device=2, steps_per_fault=3)
+        guide_ids = [guide.id for guide in guides]
+        step_ids = list(ProcedureStep.objects.values_list('id', flat=True))
+        api_client()  # 先建立測試帳號
+
+        def reader():
+            client, rng = api_client(), random.Random()
+
+            def read():
+                guide_id = rng.choice(guide_ids)
+                if rng.random() < 0.5:
+                    return client.get(f'/api/signal-guides/{guide_id}/')
+                return client.get(f'/api/signal-guides/{guide_id}/bundle/')
+            return read
+
+        def writer():
+            client, rng = api_client(), random.Random()
+            return lambda: client.patch(f'/api/steps/{rng.choice(step_ids)}/', {'order': rng.randint(0, 100)}, format='json')
+
+        reads, read_errors, writes, write_errors = [], [], [], []
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=worker, args=(reader(), deadline, reads, read_errors)) for _ in range(args.readers)]
+        threads += [threading.Thread(target=worker, args=(writer(), deadline, writes, write_errors)) for _ in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        from django.db import connection
+        journal_mode = None
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+
+        print(json.dumps({
+            'profile': args.profile,
+            'journal_mode': journal_mode,
+            'readers': summarize(reads, read_errors, args.seconds),
+            'writers': summarize(writes, write_errors, args.seconds),
+        }, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profiles', default='sqlite-plain,sqlite')
+    parser.add_argument('--profile', help=argparse.SUPPRESS)  # 子行程使用
+    parser.add_argument('--guides', type=int, default=500)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args)
+        return
+
+    results = []
+    for profile in args.profiles.split(','):
+        env = dict(os.environ, DJANGO_DB_PROFILE='postgres' if profile == 'postgres' else 'sqlite')
+        command = [sys.executable, '-m', 'benchmarks.bench_concurrency', '--profile', profile,
+                   '--guides', str(args.guides), '--readers', str(args.readers),
+                   '--writers', str(args.writers), '--seconds', str(args.seconds)]
+        output = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
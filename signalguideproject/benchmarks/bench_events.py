@@ -0,0 +1,94 @@
+# benchmarks/bench_events.py
+# 異動推播的連線成本：以 ASGI 協定開啟大量閒置的 /api/events/ 連線，量測每條連線的記憶體用量（tracemalloc，
+# 含 Django 請求處理與測試用 communicator；subscription_bytes 只計 events.py 的佇列與訂閱），
+# 以及一筆異動分送到所有連線所需的時間
+#
+#   python -m benchmarks.bench_events --connections 100 1000 5000
+#
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from benchmarks._common import setup_django, teardown_django
+
+
+async def open_stream(application, token, query):
+    from asgiref.testing import ApplicationCommunicator
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': '/api/events/', 'raw_path': b'/api/events/', 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    communicator = ApplicationCommunicator(application, scope)
+    await communicator.send_input({'type': 'http.request', 'body': b''})
+    start = await communicator.receive_output(timeout=30)
+    assert start['status'] == 200, start
+    await communicator.receive_output(timeout=30)  # retry: ...
+    return communicator
+
+
+async def run(application, token, count, job_type_id):
+    from signalguideapp import events
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    streams = []
+    for idx in range(count):
+        # 一半訂閱作業類別、一半訂閱個別說明書（大多不會收到這次的事件）
+        query = f'job_type={job_type_id}' if idx % 2 == 0 else f'guide={idx}'
+        streams.append(await open_stream(application, token, query))
+    after = tracemalloc.get_traced_memory()[0]
+    own = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, events.__file__)])
+    tracemalloc.stop()
+
+    receivers = [stream for idx, stream in enumerate(streams) if idx % 2 == 0]
+    start = time.perf_counter()
+    events.hub.dispatch({'model': 'signalguide', 'id': 1, 'op': 'save', 'guide': 1, 'job_type': job_type_id})
+    await asyncio.gather(*(stream.receive_output(timeout=30) for stream in receivers))
+    fanout_ms = (time.perf_counter() - start) * 1000
+
+    for stream in streams:
+        await stream.send_input({'type': 'http.disconnect'})
+    for stream in streams:
+        try:
+            await stream.wait(timeout=5)
+        except asyncio.TimeoutError:
+            pass
+    return {
+        'connections': count,
+        'bytes_per_connection': round((after - before) / count),
+        'subscription_bytes_per_connection': round(sum(stat.size for stat in own.statistics('filename')) / count),
+        'fanout_receivers': len(receivers),
+        'fanout_ms': round(fanout_ms, 2),
+        'remaining_subscriptions': len(events.hub),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, nargs='+', default=[100, 1000])
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from django.core.asgi import get_asgi_application
+        from rest_framework_simplejwt.tokens import AccessToken
+        from signalguideapp.models import CustomUser, JobType
+
+        user = CustomUser.objects.create_user(employee_id='99998', name='benchmark', password='bench123', role='B')
+        token = str(AccessToken.for_user(user))
+        job_type = JobType.objects.create(name='效能測試')
+        application = get_asgi_application()
+
+        results = [asyncio.run(run(application, token, count, job_type.id)) for count in args.connections]
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/bench_formats.py
+# 回應大小與序列化時間：完整欄位／精簡列表／稀疏欄位 × 未壓縮／gzip／brotli／MessagePack
+#
+#   python -m benchmarks.bench_formats --guides 2000
+#
+# brotli 與 msgpack 為選用套件，未安裝時略過對應項目。
+import argparse
+import json
+
+from benchmarks._common import setup_django, teardown_django, api_client, seed, timeit
+
+VARIANTS = {
+    'full': {},
+    'summary': {'summary': 'true'},
+    'fields': {'fields': 'id,doc_number,title,is_pinned'},
+}
+
+
+def encodings():
+    from signalguideapp.middleware import brotli
+    from signalguideapp.renderers import msgpack
+
+    options = {'identity': {}, 'gzip': {'HTTP_ACCEPT_ENCODING': 'gzip'}}
+    if brotli is not None:
+        options['br'] = {'HTTP_ACCEPT_ENCODING': 'gzip, br'}
+    if msgpack is not None:
+        options['msgpack'] = {'HTTP_ACCEPT': 'application/msgpack'}
+        options['msgpack+gzip'] = {'HTTP_ACCEPT': 'application/msgpack', 'HTTP_ACCEPT_ENCODING': 'gzip'}
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guides', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from signalguideapp import cache
+        cache.CACHE_TIMEOUT = 0  # 每次都重新序列化
+
+        seed(args.guides)
+        client = api_client()
+        results = {'guides': args.guides}
+        for variant, params in VARIANTS.items():
+            results[variant] = {}
+            for encoding, headers in encodings().items():
+                response = client.get('/api/signal-guides/', params, **headers)
+                results[variant][encoding] = {
+                    'bytes': len(response.content),
+                    **timeit(lambda: client.get('/api/signal-guides/', params, **headers), args.repeat),
+                }
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
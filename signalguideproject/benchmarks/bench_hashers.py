@@ -0,0 +1,63 @@
+# benchmarks/bench_hashers.py
+# 登入吞吐量：各密碼雜湊演算法單核心每秒可驗證的次數，以及 /token/ 完整登入流程的延遲
+#
+#   python -m benchmarks.bench_hashers --repeat 20
+#
+# argon2 需安裝 argon2-cffi，未安裝時略過。
+import argparse
+import json
+
+from benchmarks._common import setup_django, teardown_django, timeit
+
+HASHERS = ('pbkdf2', 'scrypt', 'argon2')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from django.conf import settings
+        from django.contrib.auth.hashers import check_password, get_hashers_by_algorithm, make_password
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        from signalguideapp.models import CustomUser
+        from signalguideapp.throttling import SharedCacheThrottle
+
+        SharedCacheThrottle.THROTTLE_RATES.update({'login_ip': None, 'login_account': None})  # 不限制頻率
+        results = {}
+        for name in HASHERS:
+            hasher_path = settings.PASSWORD_HASHER_CHOICES[name]
+            hashers = [hasher_path] + [path for path in settings.PASSWORD_HASHERS if path != hasher_path]
+            with override_settings(PASSWORD_HASHERS=hashers):
+                algorithm = hasher_path.rsplit('.', 1)[1]
+                try:
+                    encoded = make_password('abc123')
+                except ValueError as exc:  # 缺少 argon2-cffi 等
+                    results[name] = {'skipped': str(exc)}
+                    continue
+
+                verify = timeit(lambda: check_password('abc123', encoded), args.repeat)
+                user = CustomUser.objects.create_user(employee_id=f'9{len(results):04d}', name=name, password='abc123')
+                client = APIClient()
+                login = timeit(
+                    lambda: client.post('/api/token/', {'employee_id': user.employee_id, 'password': 'abc123'}, format='json'),
+                    args.repeat,
+                )
+                results[name] = {
+                    'hasher': algorithm,
+                    'summary': {str(k): str(v) for k, v in get_hashers_by_algorithm()[encoded.split('$')[0]]
+                                .safe_summary(encoded).items() if 'hash' not in str(k) and 'salt' not in str(k)},
+                    'verify': verify,
+                    'logins_per_sec_per_core': round(1000 / verify['mean_ms'], 1),
+                    'token_endpoint': login,
+                }
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
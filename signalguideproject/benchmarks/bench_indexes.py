@@ -0,0 +1,118 @@
+# benchmarks/bench_indexes.py
+# 索引效益：建立大量資料後，分別在移除與加回複合索引的情況下記錄 EXPLAIN QUERY PLAN 與查詢時間
+#
+#   python -m benchmarks.bench_indexes --guides 5000
+#   python -m benchmarks.bench_indexes --guides 2000 --check   # 查詢未使用預期索引時以非零狀態結束（CI 使用）
+import argparse
+import json
+import sys
+
+from benchmarks._common import setup_django, teardown_django, seed, timeit
+
+
+# (名稱, 產生查詢集的函式, 預期使用的索引)
+def query_patterns(sample):
+    from django.db.models import Count, Max
+    from signalguideapp.models import SignalGuide, Device, FaultCase, ProcedureStep
+
+    return [
+        ('guides_by_type_pinned',
+         lambda: SignalGuide.objects.filter(job_type_id=sample['job_type'], is_pinned=True).order_by('doc_number')[:50],
+         'guide_type_pinned_doc_idx'),
+        ('guides_by_type',
+         lambda: SignalGuide.objects.filter(job_type_id=sample['job_type']).order_by('doc_number')[:50],
+         'guide_type_doc_idx'),
+        ('guides_pinned',
+         lambda: SignalGuide.objects.filter(is_pinned=True).order_by('doc_number')[:50],
+         'guide_pinned_doc_idx'),
+        ('devices_fingerprint',
+         lambda: Device.objects.filter(guide_id=sample['guide']).order_by().values('guide_id').annotate(
+             count=Count('pk'), last=Max('updated_at')),
+         'device_guide_updated_idx'),
+        ('faults_by_device',
+         lambda: FaultCase.objects.filter(device_id=sample['device']).order_by('-created_at', 'id')[:50],
+         'faultcase_device_created_idx'),
+        ('steps_by_fault',
+         lambda: ProcedureStep.objects.filter(fault_id=sample['fault']).order_by('order', 'id'),
+         'step_fault_order_idx'),
+        ('guides_changed_since',
+         lambda: SignalGuide.objects.filter(updated_at__gte=sample['since']).order_by('updated_at', 'id'),
+         'signalguideapp_signalguide_updated_at'),
+    ]
+
+
+def measure(patterns, repeat):
+    results = {}
+    for name, make_queryset, expected in patterns:
+        plan = make_queryset().explain()
+        results[name] = {
+            'expected_index': expected,
+            'uses_index': expected in plan,
+            'plan': plan.splitlines(),
+            **timeit(lambda: list(make_queryset()), repeat),
+        }
+    return results
+
+
+def composite_indexes():
+    from signalguideapp.models import SignalGuide, Device, FaultCase, ProcedureStep
+    return [(model, index) for model in (SignalGuide, Device, FaultCase, ProcedureStep) for index in model._meta.indexes]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guides', type=int, default=5000)
+    parser.add_argument('--job-types', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from django.db import connection
+        from django.utils import timezone
+        from signalguideapp.models import JobType, SignalGuide, FaultCase
+
+        guides = seed(args.guides, devices_per_guide=3, faults_per_device=4, steps_per_fault=3)
+        # 分散到多個作業類別，約一成置頂，與實際資料分布相近
+        ids = [guide.id for guide in guides]
+        for i in range(args.job_types):
+            job_type = JobType.objects.create(name=f'效能測試 {i}')
+            SignalGuide.objects.filter(id__in=ids[i::args.job_types]).update(job_type=job_type)
+        SignalGuide.objects.filter(id__in=ids[::10]).update(is_pinned=True)
+        fault = FaultCase.objects.select_related('device__guide').order_by('id')[len(guides)]
+        sample = {
+            'job_type': fault.device.guide.job_type_id,
+            'guide': fault.device.guide_id,
+            'device': fault.device_id,
+            'fault': fault.id,
+            'since': timezone.now(),
+        }
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        patterns = query_patterns(sample)
+        indexes = composite_indexes()
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        before = measure(patterns, args.repeat)
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        after = measure(patterns, args.repeat)
+
+        print(json.dumps({'guides': args.guides, 'before': before, 'after': after}, indent=2, ensure_ascii=False))
+        missing = [name for name, result in after.items() if not result['uses_index']]
+    finally:
+        teardown_django()
+
+    if args.check and missing:
+        print(f'未使用預期索引：{", ".join(missing)}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
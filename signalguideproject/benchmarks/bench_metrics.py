@@ -0,0 +1,53 @@
+# benchmarks/bench_metrics.py
+# MetricsMiddleware 的額外成本：同一組請求在啟用與移除指標 middleware 時的延遲比較
+#
+#   python -m benchmarks.bench_metrics --repeat 200
+#
+import argparse
+import json
+
+from benchmarks._common import setup_django, teardown_django, api_client, seed, timeit
+
+MIDDLEWARE = 'signalguideapp.middleware.MetricsMiddleware'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from django.test import modify_settings
+        from signalguideapp import cache
+
+        cache.CACHE_TIMEOUT = 0  # 每次都查詢資料庫，計入查詢計時的成本
+        guide = seed(50, devices_per_guide=5)[0]
+        urls = {
+            'signalguide-list': '/api/signal-guides/?fields=id,title',
+            'devices-by-guide': f'/api/devices/by-guide/{guide.id}/',
+            'home': '/api/',
+        }
+
+        results = {}
+        for name, url in urls.items():
+            # 測試用 client 在第一個請求時載入 middleware，兩種設定各用一個 client
+            with modify_settings(MIDDLEWARE={'remove': MIDDLEWARE}):
+                client = api_client()
+                client.get(url)  # 暖身
+                without = timeit(lambda: client.get(url), args.repeat)
+            client = api_client()
+            client.get(url)
+            with_metrics = timeit(lambda: client.get(url), args.repeat)
+            results[name] = {
+                'without_metrics': without,
+                'with_metrics': with_metrics,
+                'overhead_ms': round(with_metrics['p50_ms'] - without['p50_ms'], 3),
+            }
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
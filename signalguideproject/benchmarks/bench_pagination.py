@@ -0,0 +1,44 @@
+# benchmarks/bench_pagination.py
+# 游標分頁效能：資料表逐步放大時，第一頁與深層頁面的延遲應維持平穩
+#
+#   python -m benchmarks.bench_pagination --sizes 1000 10000 50000
+import argparse
+import json
+
+from benchmarks._common import setup_django, teardown_django, api_client, seed, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        client = api_client()
+        results = []
+        total = 0
+        for size in args.sizes:
+            seed(size - total)
+            total = size
+
+            first_url = f'/api/signal-guides/?page_size={args.page_size}'
+            # 先走到資料中段，量測深層頁面的延遲
+            deep_url = first_url
+            for _ in range(min(20, size // args.page_size // 2)):
+                deep_url = client.get(deep_url).data['next']
+
+            results.append({
+                'rows': size,
+                'first_page': timeit(lambda: client.get(first_url), args.repeat),
+                'deep_page': timeit(lambda: client.get(deep_url), args.repeat),
+            })
+        print(json.dumps(results, indent=2))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
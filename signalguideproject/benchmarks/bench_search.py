@@ -0,0 +1,47 @@
+# benchmarks/bench_search.py
+# 全文檢索延遲：建立大量故障案例後重建 FTS5 索引，量測 /search/ 的回應時間
+#
+#   python -m benchmarks.bench_search --faults 200000
+import argparse
+import json
+import random
+import time
+
+from benchmarks._common import setup_django, teardown_django, api_client, timeit
+
+SYMPTOMS = ['軌道電路異常占用', '轉轍器無法轉換', '號誌機燈泡故障', '電源模組跳脫', '聯鎖主機通訊中斷', '計軸器計數錯誤']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--faults', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from signalguideapp import search
+        from signalguideapp.models import SignalGuide, Device, FaultCase
+
+        guide = SignalGuide.objects.create(system='號誌', doc_number='BENCH-SEARCH', title='效能測試')
+        device = Device.objects.create(guide=guide, name='測試設備')
+        rng = random.Random(0)
+        FaultCase.objects.bulk_create(
+            (FaultCase(device=device, description=f'{rng.choice(SYMPTOMS)} 第 {i} 號') for i in range(args.faults)),
+            batch_size=5000,
+        )
+        start = time.perf_counter()
+        search.rebuild()
+        rebuild_seconds = time.perf_counter() - start
+
+        client = api_client()
+        results = {'faults': args.faults, 'rebuild_seconds': round(rebuild_seconds, 2), 'queries': {}}
+        for q in ['軌道電路 占用', '轉轍器', '燈泡', 'BENCH']:
+            results['queries'][q] = timeit(lambda: client.get('/api/search/', {'q': q}), args.repeat)
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
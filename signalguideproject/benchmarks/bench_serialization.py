@@ -0,0 +1,54 @@
+# benchmarks/bench_serialization.py
+# 大量列表的序列化吞吐量：ModelSerializer + JSONRenderer vs .values() + orjson 快速路徑（fastlist.py），
+# 分別量測說明書與故障案例列表在 1k／10k／100k 筆時的 rows/sec
+#
+#   python -m benchmarks.bench_serialization --sizes 1000 10000 100000 --repeat 3
+#
+# 經由完整 API 呼叫（含驗證、ETag 計算），兩條路徑的輸出位元組相同。
+import argparse
+import json
+from unittest import mock
+
+from benchmarks._common import setup_django, teardown_django, api_client, seed, timeit
+
+ENDPOINTS = {
+    'signal_guides': '/api/signal-guides/',
+    'faultcases': '/api/faultcases/',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    try:
+        from signalguideapp import cache, fastlist
+        from signalguideapp.models import SignalGuide
+        cache.CACHE_TIMEOUT = 0  # 每次都重新序列化
+
+        client = api_client()
+        results = {}
+        for size in sorted(args.sizes):
+            seed(size - SignalGuide.objects.count(), steps_per_fault=0)
+            results[size] = {}
+            for name, url in ENDPOINTS.items():
+                row = {}
+                for mode, enabled in (('serializer', False), ('fast', True)):
+                    with mock.patch.object(fastlist, 'FAST_LIST', enabled):
+                        row[mode] = {
+                            'bytes': len(client.get(url).content),
+                            **timeit(lambda: client.get(url), args.repeat),
+                        }
+                        row[mode]['rows_per_sec'] = round(size / row[mode]['mean_ms'] * 1000)
+                row['speedup'] = round(row['serializer']['mean_ms'] / row['fast']['mean_ms'], 2)
+                results[size][name] = row
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    finally:
+        teardown_django()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+# benchmarks/loadtest.py
+# 負載測試：對執行中的伺服器（runserver、gunicorn、uvicorn）模擬多個 App 使用者，輸出可跨 commit 比較的 JSON 報告
+#
+#   python manage.py seed_benchmark_data --guides 2000 --users 50 --admins 5
+#   gunicorn signalguideproject.wsgi -w 4   # 或 uvicorn signalguideproject.asgi:application --workers 4
+#   python -m benchmarks.loadtest run --base-url http://127.0.0.1:8000 --users 20 --admins 2 --duration 60 \
+#       --label gunicorn-w4 --output before.json
+#   python -m benchmarks.loadtest compare before.json after.json
+#
+# 每個虛擬使用者以自己的測試帳號登入（預設帳號由 seed_benchmark_data 建立），之後不停重複：
+#   browse      作業類別列表 → 說明書摘要列表（分頁）→ 偶爾全文檢索
+#   drill_down  說明書 → 設備 → 故障案例 → 處理步驟 → 步驟檔案
+#   admin_write 管理者新增、修改、刪除一筆故障案例（資料總量不變）
+# 每 --session-length 個流程重新登入一次（模擬 App 重新開啟）。只使用標準函式庫，不需要 Django。
+# 報告包含整體與各端點的吞吐量與 p50／p95／p99 延遲（毫秒），前 --warmup 秒的請求不計入。
+import argparse
+import http.client
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+# 與 signalguideapp/seeding.py 的測試帳號編號一致
+VIEWER_ID_START = 80001
+ADMIN_ID_START = 89001
+
+SEARCH_TERMS = ['轉轍', '號誌', '軌道', '電源', '通訊中斷', '無表示']
+FLOW_WEIGHTS = {'viewer': {'browse': 4, 'drill_down': 6}, 'admin': {'browse': 2, 'drill_down': 4, 'admin_write': 4}}
+
+
+class Recorder:
+    """收集每個請求的 (端點, 延遲毫秒, 狀態碼)；warmup 期間的請求只計數不列入統計。"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.samples = {}
+        self.flows = {}
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, started, elapsed_ms, status):
+        if started < self.measure_from:
+            return
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append((elapsed_ms, status))
+
+    def flow(self, name, started):
+        if started < self.measure_from:
+            return
+        with self.lock:
+            self.flows[name] = self.flows.get(name, 0) + 1
+
+
+class VirtualUser:
+    def __init__(self, base_url, employee_id, password, role, recorder, rng, think_ms):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=60)
+        self.prefix = parts.path.rstrip('/')
+        self.employee_id = employee_id
+        self.password = password
+        self.role = role
+        self.recorder = recorder
+        self.rng = rng
+        self.think = think_ms / 1000
+        self.token = None
+        self.job_types = []
+        self.guides = []
+        self.devices = []
+
+    # 送出請求並記錄；回傳 (狀態碼, 解析後的 JSON 或 None)，連線錯誤時狀態碼為 0
+    def request(self, endpoint, method, path, params=None, body=None):
+        url = self.prefix + path + ('?' + urlencode(params) if params else '')
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        started = time.perf_counter()
+        for attempt in range(2):
+            try:
+                self.connection.request(method, url, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                status = response.status
+                break
+            except (http.client.HTTPException, OSError):
+                # 伺服器關閉了閒置的 keep-alive 連線時重新連線一次
+                self.connection.close()
+                if attempt:
+                    status, data = 0, b''
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.recorder.add(endpoint, started, elapsed_ms, status)
+        if self.think:
+            time.sleep(self.think)
+        if status and 'json' in (response.getheader('Content-Type') or ''):
+            try:
+                return status, json.loads(data)
+            except ValueError:
+                pass
+        return status, None
+
+    def login(self):
+        self.token = None
+        status, data = self.request('POST token', 'POST', '/api/token/',
+                                    body={'employee_id': self.employee_id, 'password': self.password})
+        if status == 200 and data:
+            self.token = data['access']
+        return self.token is not None
+
+    def browse(self):
+        status, data = self.request('GET jobtypes', 'GET', '/api/jobtypes/')
+        if status == 200 and data:
+            self.job_types = [item['id'] for item in data]
+        params = {'summary': 'true', 'page_size': 50}
+        if self.job_types:
+            params['job_type'] = self.rng.choice(self.job_types)
+        status, data = self.request('GET signal-guides summary', 'GET', '/api/signal-guides/', params)
+        if status == 200 and data and data.get('results'):
+            self.guides = [item['id'] for item in data['results']]
+        if self.rng.random() < 0.3:
+            self.request('GET search', 'GET', '/api/search/', {'q': self.rng.choice(SEARCH_TERMS)})
+
+    def drill_down(self):
+        if not self.guides:
+            return self.browse()
+        guide_id = self.rng.choice(self.guides)
+        self.request('GET signal-guide detail', 'GET', f'/api/signal-guides/{guide_id}/')
+        status, devices = self.request('GET devices by-guide', 'GET', f'/api/devices/by-guide/{guide_id}/')
+        if status != 200 or not devices:
+            return
+        self.devices = [device['id'] for device in devices]
+        device_id = self.rng.choice(self.devices)
+        status, faults = self.request('GET faultcases by device', 'GET', '/api/faultcases/', {'device_id': device_id})
+        if status != 200 or not faults:
+            return
+        status, steps = self.request('GET steps by fault', 'GET', '/api/steps/', {'fault_id': self.rng.choice(faults)['id']})
+        if status == 200 and steps:
+            self.request('GET step file', 'GET', f'/api/files/steps/{self.rng.choice(steps)["id"]}/')
+
+    def admin_write(self):
+        if not self.devices:
+            return self.drill_down()
+        device_id = self.rng.choice(self.devices)
+        status, fault = self.request('POST faultcase', 'POST', '/api/faultcases/',
+                                     body={'device': device_id, 'description': '負載測試新增的故障案例'})
+        if status != 201 or not fault:
+            return
+        self.request('PATCH faultcase', 'PATCH', f'/api/faultcases/{fault["id"]}/', body={'description': '負載測試修改的故障案例'})
+        self.request('DELETE faultcase', 'DELETE', f'/api/faultcases/{fault["id"]}/')
+
+    def run(self, deadline, session_length):
+        flows, weights = zip(*FLOW_WEIGHTS[self.role].items())
+        try:
+            while time.perf_counter() < deadline:
+                if not self.login():
+                    time.sleep(1)
+                    continue
+                for _ in range(session_length):
+                    if time.perf_counter() >= deadline:
+                        break
+                    name = self.rng.choices(flows, weights)[0]
+                    started = time.perf_counter()
+                    getattr(self, name)()
+                    self.recorder.flow(name, started)
+        finally:
+            self.connection.close()
+
+
+def percentile(samples, p):
+    return samples[max(math.ceil(p / 100 * len(samples)) - 1, 0)]
+
+
+def summarize(samples, seconds):
+    latencies = sorted(elapsed for elapsed, status in samples)
+    statuses = {}
+    for elapsed, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for elapsed, status in samples if not 200 <= status < 400),
+        'rps': round(len(samples) / seconds, 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'max_ms': round(latencies[-1], 2),
+        'statuses': statuses,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    start = time.perf_counter()
+    recorder = Recorder(start + args.warmup)
+    deadline = start + args.warmup + args.duration
+    threads = []
+    for index in range(args.users):
+        is_admin = index < args.admins
+        employee_id = f'{(args.admin_start if is_admin else args.viewer_start) + (index if is_admin else index - args.admins):05d}'
+        user = VirtualUser(args.base_url, employee_id, args.password, 'admin' if is_admin else 'viewer',
+                           recorder, random.Random(args.seed + index), args.think_ms)
+        threads.append(threading.Thread(target=user.run, args=(deadline, args.session_length), daemon=True))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - recorder.measure_from
+
+    everything = [sample for samples in recorder.samples.values() for sample in samples]
+    return {
+        'meta': {
+            'label': args.label,
+            'commit': git_commit(),
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'base_url': args.base_url,
+            'users': args.users,
+            'admins': args.admins,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'think_ms': args.think_ms,
+            'seed': args.seed,
+            'python': platform.python_version(),
+        },
+        'total': summarize(everything, seconds) if everything else None,
+        'flows': {name: round(count / seconds, 2) for name, count in sorted(recorder.flows.items())},
+        'endpoints': {name: summarize(samples, seconds) for name, samples in sorted(recorder.samples.items())},
+    }
+
+
+# 兩份報告的差異：正值表示 after 較慢（延遲）或較快（rps）
+def compare(before, after):
+    def delta(old, new):
+        return round((new - old) / old * 100, 1) if old else None
+
+    result = {}
+    names = ['total'] + [name for name in after['endpoints'] if name in before['endpoints']]
+    for name in names:
+        old = before['total'] if name == 'total' else before['endpoints'][name]
+        new = after['total'] if name == 'total' else after['endpoints'][name]
+        if not old or not new:
+            continue
+        result[name] = {
+            key: {'before': old[key], 'after': new[key], 'change_pct': delta(old[key], new[key])}
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms', 'errors')
+        }
+    return {'before': before['meta'], 'after': after['meta'], 'changes': result}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='執行負載測試')
+    run_parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--users', type=int, default=10, help='虛擬使用者數（同時連線數）')
+    run_parser.add_argument('--admins', type=int, default=1, help='其中執行寫入的管理者數')
+    run_parser.add_argument('--duration', type=float, default=30, help='計入統計的秒數')
+    run_parser.add_argument('--warmup', type=float, default=5, help='不計入統計的暖身秒數')
+    run_parser.add_argument('--think-ms', type=float, default=0, help='每個請求之後的等待時間')
+    run_parser.add_argument('--session-length', type=int, default=20, help='每次登入後執行的流程數')
+    run_parser.add_argument('--password', default='bench1234')
+    run_parser.add_argument('--viewer-start', type=int, default=VIEWER_ID_START)
+    run_parser.add_argument('--admin-start', type=int, default=ADMIN_ID_START)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--label', default='', help='記錄在報告中的說明，例如伺服器與 worker 設定')
+    run_parser.add_argument('--output', help='報告輸出路徑（預設輸出到 stdout）')
+
+    compare_parser = subparsers.add_parser('compare', help='比較兩份報告')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        if not 0 <= args.admins <= args.users:
+            parser.error('--admins 必須介於 0 與 --users 之間')
+        report = run(args)
+    else:
+        with open(args.before, encoding='utf-8') as before, open(args.after, encoding='utf-8') as after:
+            report = compare(json.load(before), json.load(after))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if getattr(args, 'output', None):
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            stream.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
+import os
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, JobType, SignalGuide, Device, FaultCase, ProcedureStep
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from . import profiling
+from .models import CustomUser, JobType, SignalGuide, Device, FaultCase, ProcedureStep, DeletionLog, RequestProfile
 
 # ----------- 使用者管理後台 -----------
 class CustomUserAdmin(UserAdmin):
@@ -34,6 +39,7 @@ class JobTypeAdmin(admin.ModelAdmin):
 # ----------- 工作說明書管理後台 -----------
 class SignalGuideAdmin(admin.ModelAdmin):
     list_display = ('doc_number', 'title', 'job_type', 'system', 'department', 'owner', 'created_at', 'is_pinned')
+    list_select_related = ('job_type',)
     list_filter = ('job_type', 'system', 'department', 'is_pinned')
     search_fields = ('doc_number', 'title', 'system', 'subsystem', 'equipment_type', 'owner')
     ordering = ('-created_at',)
@@ -42,6 +48,7 @@ class SignalGuideAdmin(admin.ModelAdmin):
 # ----------- 設備管理後台 -----------
 class DeviceAdmin(admin.ModelAdmin):
     list_display = ('name', 'guide', 'created_at')
+    list_select_related = ('guide',)
     list_filter = ('guide__job_type',)
     search_fields = ('name', 'guide__title')
     ordering = ('-created_at',)
@@ -50,6 +57,7 @@ class DeviceAdmin(admin.ModelAdmin):
 # ----------- 故障案例管理後台 -----------
 class FaultCaseAdmin(admin.ModelAdmin):
     list_display = ('description_short', 'device', 'created_at')
+    list_select_related = ('device',)
     list_filter = ('device__guide__job_type',)
     search_fields = ('description', 'device__name')
     ordering = ('-created_at',)
@@ -62,11 +70,64 @@ class FaultCaseAdmin(admin.ModelAdmin):
 # ----------- 處理步驟管理後台 -----------  
 class ProcedureStepAdmin(admin.ModelAdmin):
     list_display = ('order', 'file', 'fault', 'created_at')  # 改為 order 與 file
+    list_select_related = ('fault',)
     list_filter = ('fault__device__guide__job_type',)
     search_fields = ('fault__description',)
     ordering = ('fault', 'order')  # 改為 order
     readonly_fields = ('created_at', 'updated_at')
 
+# ----------- 刪除紀錄後台（唯讀） -----------
+class DeletionLogAdmin(admin.ModelAdmin):
+    list_display = ('model', 'object_id', 'deleted_at')
+    list_filter = ('model',)
+    ordering = ('-deleted_at',)
+    readonly_fields = ('model', 'object_id', 'deleted_at')
+
+    def has_add_permission(self, request):
+        return False
+
+# ----------- 效能剖析紀錄後台（唯讀，可下載剖析檔） -----------
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'view', 'status_code', 'duration_ms', 'query_count', 'query_ms', 'user', 'downloads')
+    list_select_related = ('user',)
+    list_filter = ('view', 'method')
+    search_fields = ('path', 'view')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'user', 'method', 'path', 'view', 'status_code', 'duration_ms', 'query_count', 'query_ms', 'downloads', 'queries')
+    exclude = ('profile_file', 'speedscope_file')
+
+    DOWNLOADS = {'prof': 'profile_file', 'speedscope': 'speedscope_file'}
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/<str:kind>/', self.admin_site.admin_view(self.download), name='signalguideapp_requestprofile_download'),
+        ] + super().get_urls()
+
+    # .prof 可用 python -m pstats 或 snakeviz 開啟；.speedscope.json 可拖曳到 https://www.speedscope.app/
+    def download(self, request, pk, kind):
+        record = self.get_object(request, str(pk))
+        if record is None or kind not in self.DOWNLOADS or not self.has_view_permission(request, record):
+            raise Http404
+        name = getattr(record, self.DOWNLOADS[kind])
+        storage = profiling.get_storage()
+        if not name or not storage.exists(name):
+            raise Http404
+        return FileResponse(storage.open(name, 'rb'), as_attachment=True, filename=os.path.basename(name))
+
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">.prof</a> / <a href="{}">speedscope</a>',
+            reverse('admin:signalguideapp_requestprofile_download', args=[obj.pk, 'prof']),
+            reverse('admin:signalguideapp_requestprofile_download', args=[obj.pk, 'speedscope']),
+        )
+    downloads.short_description = '下載'
+
 # ----------- 註冊模型與對應後台管理類 -----------
 admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(JobType, JobTypeAdmin)
@@ -74,3 +135,5 @@ admin.site.register(SignalGuide, SignalGuideAdmin)
 admin.site.register(Device, DeviceAdmin)
 admin.site.register(FaultCase, FaultCaseAdmin)
 admin.site.register(ProcedureStep, ProcedureStepAdmin)
+admin.site.register(DeletionLog, DeletionLogAdmin)
+admin.site.register(RequestProfile, RequestProfileAdmin)
@@ -5,3 +5,6 @@ class SignalguideappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'signalguideapp'
     verbose_name = '號誌系統線上緊急故障排除指引APP'   # 設定應用程式的顯示名稱
+
+    def ready(self):
+        from . import signals, database, metrics, throttling  # noqa: F401  註冊 signal handlers 與系統檢查
@@ -0,0 +1,120 @@
+# signalguideapp/async_views.py
+# 非同步唯讀 API（/api/async/...）：在 ASGI 伺服器（uvicorn／daphne）下直接於事件迴圈執行，
+# 查詢使用 Django async ORM（aget／aiterator），不必為每個請求切換到同步執行緒。
+# 與既有的同步 ViewSet 並存，回應格式相同；寫入仍走同步 API。
+from functools import wraps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from . import events
+from .authentication import aget_user_state, user_from_token
+from .models import SignalGuide, Device, FaultCase, ProcedureStep
+from .serializers import SignalGuideSerializer, DeviceSerializer, FaultCaseSerializer, ProcedureStepSerializer
+
+CHUNK_SIZE = 500
+
+_jwt = JWTAuthentication()
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+
+# JWT 驗證：簽章檢查不需資料庫，帳號狀態從快取取得（同 ClaimsJWTAuthentication）；失敗回傳 None
+async def authenticate(request):
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = _jwt.get_validated_token(raw_token)
+        return user_from_token(token, await aget_user_state(token[api_settings.USER_ID_CLAIM]))
+    except (InvalidToken, TokenError, AuthenticationFailed, KeyError):
+        return None
+
+
+# 僅允許 GET／HEAD 並要求登入（等同同步 API 的 IsAuthenticated）
+def async_api(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response({'detail': f'不允許的方法 "{request.method}"。'}, status=405)
+        request.user = await authenticate(request)
+        if request.user is None:
+            return json_response({'detail': '未提供或無效的身分認證。'}, status=401)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def serialize(queryset, serializer_class, request):
+    objs = [obj async for obj in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+    return serializer_class(objs, many=True, context={'request': request}).data
+
+
+# 說明書列表（同 SignalGuideViewSet 的 job_type／is_pinned 篩選）
+@async_api
+async def guide_list(request):
+    queryset = SignalGuide.objects.select_related('job_type')
+    job_type = request.GET.get('job_type')
+    is_pinned = request.GET.get('is_pinned')
+
+    if job_type is not None:
+        queryset = queryset.filter(job_type__id=job_type)
+
+    if is_pinned is not None:
+        if is_pinned.lower() == 'true':
+            queryset = queryset.filter(is_pinned=True)
+        elif is_pinned.lower() == 'false':
+            queryset = queryset.filter(is_pinned=False)
+
+    return json_response(await serialize(queryset.order_by('doc_number'), SignalGuideSerializer, request))
+
+
+@async_api
+async def guide_detail(request, pk):
+    try:
+        guide = await SignalGuide.objects.select_related('job_type').aget(pk=pk)
+    except SignalGuide.DoesNotExist:
+        return json_response({'detail': '找不到。'}, status=404)
+    return json_response(SignalGuideSerializer(guide, context={'request': request}).data)
+
+
+@async_api
+async def devices_by_guide(request, guide_id):
+    queryset = Device.objects.filter(guide_id=guide_id).order_by('id')
+    return json_response(await serialize(queryset, DeviceSerializer, request))
+
+
+@async_api
+async def faults_by_device(request, device_id):
+    queryset = FaultCase.objects.filter(device_id=device_id).order_by('-created_at', 'id')
+    return json_response(await serialize(queryset, FaultCaseSerializer, request))
+
+
+@async_api
+async def steps_by_fault(request, fault_id):
+    queryset = ProcedureStep.objects.filter(fault_id=fault_id).order_by('order', 'id')
+    return json_response(await serialize(queryset, ProcedureStepSerializer, request))
+
+
+# 資料異動推播（Server-Sent Events）：?job_type=1,2&guide=3 只接收指定作業類別／說明書的事件，未指定時接收全部。
+# 每個連線只佔用一個佇列，閒置時不耗用執行緒；需以 ASGI 伺服器執行
+@async_api
+async def change_events(request):
+    topics = []
+    for param in ('job_type', 'guide'):
+        for value in request.GET.get(param, '').split(','):
+            if not value:
+                continue
+            if not value.isdigit():
+                return json_response({'detail': f'{param} 必須是以逗號分隔的 ID'}, status=400)
+            topics.append(f'{param}:{value}')
+    if events.get_broker() is None:
+        return json_response({'detail': '未啟用異動推播'}, status=404)
+
+    response = StreamingHttpResponse(events.stream(topics or ['all']), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx 不緩衝，事件即時送出
+    return response
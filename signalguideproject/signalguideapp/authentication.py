@@ -0,0 +1,97 @@
+# signalguideapp/authentication.py
+# JWT 驗證快速路徑：讀取請求不查 CustomUser，以 token 內的 name／role／employee_id 建立輕量使用者，
+# 帳號狀態（停用、角色）改從短效快取取得；寫入請求仍從資料庫載入完整使用者。
+# 使用者資料異動時由 signals 清除快取，停用帳號或調整角色立即生效。
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .cache import get_cache
+from .models import CustomUser
+
+USER_STATE_TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+STATE_FIELDS = ('is_active', 'role', 'is_staff', 'is_superuser')
+
+
+def _state_key(user_id):
+    return f'signalguide:auth:{user_id}'
+
+
+# 帳號狀態：{"is_active": ..., "role": ...}；帳號不存在時為 None（同樣快取，避免重複查詢）
+def get_user_state(user_id):
+    cache = get_cache()
+    key = _state_key(user_id)
+    state = cache.get(key, False)
+    if state is False:
+        state = CustomUser.objects.filter(pk=user_id).values(*STATE_FIELDS).first()
+        cache.set(key, state, USER_STATE_TIMEOUT)
+    return state
+
+
+async def aget_user_state(user_id):
+    cache = get_cache()
+    key = _state_key(user_id)
+    state = await cache.aget(key, False)
+    if state is False:
+        state = await CustomUser.objects.filter(pk=user_id).values(*STATE_FIELDS).afirst()
+        await cache.aset(key, state, USER_STATE_TIMEOUT)
+    return state
+
+
+def forget_user_state(user_id):
+    get_cache().delete(_state_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """由 token 宣告與快取的帳號狀態組成的使用者，沒有資料庫實體（save／set_password 會拋出例外）。"""
+
+    def __init__(self, token, state):
+        super().__init__(token)
+        self.is_active = state['is_active']
+        self.role = state['role']
+        self.is_staff = state['is_staff']
+        self.is_superuser = state['is_superuser']
+        self.employee_id = token.get('employee_id', '')
+        self.name = token.get('name', '')
+
+    @property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.name} ({self.role})"
+
+
+def user_from_token(token, state):
+    if state is None:
+        raise AuthenticationFailed('找不到使用者', code='user_not_found')
+    if not state['is_active']:
+        raise AuthenticationFailed('帳號已停用', code='user_inactive')
+    return ClaimsUser(token, state)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """讀取（GET／HEAD／OPTIONS）使用 ClaimsUser，其餘方法沿用 JWTAuthentication 從資料庫載入使用者。"""
+
+    def authenticate(self, request):
+        if request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+        try:
+            user_id = token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('token 未包含可識別的使用者')
+        return user_from_token(token, get_user_state(user_id)), token
@@ -0,0 +1,155 @@
+# signalguideapp/bulk.py
+# 批次寫入：/devices/bulk/、/faultcases/bulk/、/steps/bulk/ 一次新增、修改或刪除多筆資料，
+# 全部在同一個交易內完成，並逐筆回傳結果
+import json
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .signals import bulk_saved, hash_uploaded_file
+
+BULK_MAX_ITEMS = 500
+
+
+# JSON 的 true／false 在 Python 中也是 int，需排除
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _item_result(index, code, **extra):
+    return {'index': index, 'status': code, **extra}
+
+
+def _overall_status(results, success_code):
+    succeeded = sum(1 for result in results if result['status'] == success_code)
+    if succeeded == len(results):
+        return success_code
+    if succeeded == 0:
+        return status.HTTP_400_BAD_REQUEST
+    return status.HTTP_207_MULTI_STATUS
+
+
+class BulkWriteMixin:
+    """
+    POST   新增：[{...}, {...}]
+    PATCH  修改：[{"id": 1, ...}, ...]
+    DELETE 刪除：{"ids": [1, 2, 3]}
+    multipart 上傳時以 items 欄位傳 JSON 陣列，檔案欄位填入對應的上傳欄位名稱（例如 "file": "file_0"）。
+    """
+
+    def get_bulk_items(self, request):
+        data = request.data
+        if hasattr(data, 'getlist') and 'items' in data:
+            items = json.loads(data['items'])
+            for item in items:
+                for key, value in item.items():
+                    if isinstance(value, str) and value in request.FILES:
+                        item[key] = request.FILES[value]
+            return items
+        return data
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            return self.bulk_delete(request)
+
+        try:
+            items = self.get_bulk_items(request)
+        except ValueError:
+            return Response({'detail': 'items 必須是 JSON 陣列'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(items, list) or not items:
+            return Response({'detail': '請提供資料陣列'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({'detail': f'一次最多 {BULK_MAX_ITEMS} 筆'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'POST':
+            return self.bulk_create(request, items)
+        return self.bulk_update(request, items)
+
+    def bulk_create(self, request, items):
+        model = self.get_queryset().model
+        results = []
+        objs = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                objs.append((index, model(**serializer.validated_data)))
+            else:
+                results.append(_item_result(index, status.HTTP_400_BAD_REQUEST, errors=serializer.errors))
+
+        with transaction.atomic():
+            model.objects.bulk_create([obj for _, obj in objs])
+        if objs:
+            bulk_saved(model, [obj for _, obj in objs])
+            self.after_bulk_write([obj for _, obj in objs], {field.name for field in model._meta.fields})
+
+        for index, obj in objs:
+            results.append(_item_result(index, status.HTTP_201_CREATED, data=self.get_serializer(obj).data))
+        results.sort(key=lambda result: result['index'])
+        return Response({'results': results}, status=_overall_status(results, status.HTTP_201_CREATED))
+
+    def bulk_update(self, request, items):
+        if not all(isinstance(item, dict) and _is_id(item.get('id')) for item in items):
+            return Response({'detail': '每筆資料須包含整數 id'}, status=status.HTTP_400_BAD_REQUEST)
+        model = self.get_queryset().model
+        instances = model.objects.in_bulk([item['id'] for item in items])
+
+        results = []
+        objs = []
+        fields = {'updated_at'}
+        for index, item in enumerate(items):
+            instance = instances.get(item['id'])
+            if instance is None:
+                results.append(_item_result(index, status.HTTP_404_NOT_FOUND, errors={'id': ['找不到資料']}))
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            if not serializer.is_valid():
+                results.append(_item_result(index, status.HTTP_400_BAD_REQUEST, errors=serializer.errors))
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(instance, attr, value)
+            fields.update(serializer.validated_data)
+            if 'file' in serializer.validated_data and hasattr(instance, 'file_sha256'):
+                fields.add('file_sha256')
+            objs.append((index, instance))
+
+        # bulk_update 不會送出 pre_save，手動執行：計算新檔案雜湊並於提交後釋放舊檔、更新 updated_at、儲存新上傳的檔案
+        update_fields = [model._meta.get_field(name) for name in fields]
+        with transaction.atomic():
+            for _, instance in objs:
+                if 'file_sha256' in fields:
+                    hash_uploaded_file(model, instance)
+                for field in update_fields:
+                    setattr(instance, field.attname, field.pre_save(instance, add=False))
+            model.objects.bulk_update([obj for _, obj in objs], [field.name for field in update_fields])
+        if objs:
+            bulk_saved(model, [obj for _, obj in objs])
+            self.after_bulk_write([obj for _, obj in objs], fields)
+
+        for index, obj in objs:
+            results.append(_item_result(index, status.HTTP_200_OK, data=self.get_serializer(obj).data))
+        results.sort(key=lambda result: result['index'])
+        return Response({'results': results}, status=_overall_status(results, status.HTTP_200_OK))
+
+    # 批次寫入完成後的額外處理（例如產生縮圖），fields 為本次寫入的欄位名稱
+    def after_bulk_write(self, objs, fields):
+        pass
+
+    def bulk_delete(self, request):
+        ids = request.data.get('ids') if hasattr(request.data, 'get') else None
+        if not isinstance(ids, list) or not ids or not all(_is_id(pk) for pk in ids):
+            return Response({'detail': '請提供 ids 整數陣列'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > BULK_MAX_ITEMS:
+            return Response({'detail': f'一次最多 {BULK_MAX_ITEMS} 筆'}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.get_queryset().model
+        with transaction.atomic():
+            existing = set(model.objects.filter(id__in=ids).values_list('id', flat=True))
+            # 逐筆觸發 post_delete，保留刪除紀錄與連帶刪除
+            model.objects.filter(id__in=existing).delete()
+
+        results = [
+            _item_result(index, status.HTTP_200_OK if pk in existing else status.HTTP_404_NOT_FOUND, id=pk)
+            for index, pk in enumerate(ids)
+        ]
+        return Response({'results': results}, status=_overall_status(results, status.HTTP_200_OK))
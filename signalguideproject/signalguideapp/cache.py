@@ -0,0 +1,147 @@
+# signalguideapp/cache.py
+# 熱門讀取 API 的回應快取：快取鍵包含相關資料表的版本號，資料異動時由 signals 遞增版本號，
+# 舊的快取自然失效，不會讀到過期資料。
+# 版本號存在快取後端：LocMemCache 每個 process 各自一份，其他 worker 的異動不會讓本 process 的快取失效，
+# 只適用單一 process（開發、測試）；此時快取最多保留 RESPONSE_CACHE_LOCAL_TIMEOUT 秒，
+# 多個 worker 部署時請將 RESPONSE_CACHE_ALIAS 指向 Redis 或 Memcached（manage.py check --deploy 會提醒）
+import hashlib
+import threading
+import time
+from functools import wraps
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60 * 60)
+LOCAL_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_LOCAL_TIMEOUT', 60)
+LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def is_process_local(alias=CACHE_ALIAS):
+    return settings.CACHES[alias]['BACKEND'] in LOCAL_BACKENDS
+
+
+def cache_timeout():
+    return min(CACHE_TIMEOUT, LOCAL_TIMEOUT) if is_process_local() else CACHE_TIMEOUT
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if not is_process_local():
+        return []
+    return [checks.Warning(
+        f'回應快取（{CACHE_ALIAS}）使用 process 內的 LocMemCache，資料異動只會讓同一 process 的快取失效',
+        hint='多個 worker 部署時請將 RESPONSE_CACHE_ALIAS 指向 Redis 或 Memcached 等共用快取',
+        id='signalguideapp.W001',
+    )]
+
+
+def _generation_key(model_name):
+    return f'signalguide:gen:{model_name}'
+
+
+# 版本號以奈秒時間初始化：快取被清除後重新產生的版本號仍會大於舊值，不會撞到舊快取
+def get_generations(model_names):
+    cache = get_cache()
+    keys = {_generation_key(name): name for name in model_names}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, time.time_ns(), timeout=None)
+        found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_generation(model_name):
+    cache = get_cache()
+    key = _generation_key(model_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _response_key(request, namespace, models):
+    model_names = [model._meta.model_name for model in models]
+    generations = get_generations(model_names)
+    url = request.build_absolute_uri()
+    media_type = getattr(request, 'accepted_media_type', '')
+    digest = hashlib.md5(f'{url}|{media_type}'.encode()).hexdigest()
+    version = '.'.join(f'{name}{gen}' for name, gen in zip(model_names, generations))
+    return f'signalguide:resp:{namespace}:{version}:{digest}'
+
+
+# 查快取；命中時直接回傳（含 304 判斷），未命中時執行 compute() 並在輸出後寫入快取
+def cached_response(request, namespace, models, compute):
+    cache = get_cache()
+    key = _response_key(request, namespace, models)
+    entry = cache.get(key)
+    if entry is not None:
+        _count('hits')
+        last_modified = entry['headers'].get('Last-Modified')
+        response = get_conditional_response(
+            request,
+            etag=entry['headers'].get('ETag'),
+            last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+        )
+        if response is None:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        for header, value in entry['headers'].items():
+            response[header] = value
+        patch_vary_headers(response, ('Accept',))  # 快取鍵已依協商的格式區分
+        response['X-Cache'] = 'HIT'
+        return response
+
+    _count('misses')
+    response = compute()
+    patch_vary_headers(response, ('Accept',))
+    response['X-Cache'] = 'MISS'
+    if response.status_code == 200:
+        def store(rendered):
+            cache.set(key, {
+                'content': rendered.content,
+                'content_type': rendered['Content-Type'],
+                'headers': {h: rendered[h] for h in CACHED_HEADERS if h in rendered},
+            }, cache_timeout())
+        response.add_post_render_callback(store)
+    return response
+
+
+# 函式型 API 用的裝飾器，放在 @api_view 之下，驗證與權限檢查後才查快取
+def cache_response(namespace, models):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            return cached_response(request, namespace, models, lambda: func(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+# ViewSet 用：list 回應依 cache_models 的版本號快取
+class CachedListMixin:
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        compute = lambda: super(CachedListMixin, self).list(request, *args, **kwargs)
+        return cached_response(request, f'{self.basename}-list', self.cache_models, compute)
@@ -0,0 +1,280 @@
+# signalguideapp/catalogue.py
+# 工作說明書目錄的匯出／匯入：每本說明書一筆巢狀紀錄（guide → devices → faults → steps），
+# 支援 JSONL 與 CSV（每個處理步驟一列）兩種格式，媒體檔另以 zip 封存
+import csv
+import json
+import shutil
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from . import events, search, snapshots
+from .cache import bump_generation
+from .models import JobType, SignalGuide, Device, FaultCase, ProcedureStep
+
+GUIDE_FIELDS = ('doc_number', 'title', 'system', 'subsystem', 'equipment_type', 'department', 'owner', 'is_pinned')
+CSV_COLUMNS = GUIDE_FIELDS + ('job_type', 'file', 'device_no', 'device', 'fault_no', 'fault', 'step_order', 'step_file')
+
+
+class CatalogueError(ValueError):
+    pass
+
+
+# ----------- 匯出 -----------
+
+def guide_queryset(job_type=None):
+    queryset = SignalGuide.objects.select_related('job_type').prefetch_related(
+        Prefetch('devices', queryset=Device.objects.order_by('id')),
+        Prefetch('devices__faults', queryset=FaultCase.objects.order_by('id')),
+        Prefetch('devices__faults__steps', queryset=ProcedureStep.objects.order_by('order', 'id')),
+    ).order_by('doc_number')
+    if job_type is not None:
+        queryset = queryset.filter(job_type__name=job_type)
+    return queryset
+
+
+def guide_to_record(guide):
+    record = {field: getattr(guide, field) for field in GUIDE_FIELDS}
+    record['job_type'] = guide.job_type.name if guide.job_type else None
+    record['file'] = guide.file.name or ''
+    record['devices'] = [
+        {
+            'name': device.name,
+            'faults': [
+                {
+                    'description': fault.description,
+                    'steps': [{'order': step.order, 'file': step.file.name} for step in fault.steps.all()],
+                }
+                for fault in device.faults.all()
+            ],
+        }
+        for device in guide.devices.all()
+    ]
+    return record
+
+
+# 以 iterator(chunk_size) 逐批讀取，每批的設備／故障／步驟以 prefetch 一次取回，記憶體不隨資料量增加
+def iter_records(job_type=None, chunk_size=500):
+    for guide in guide_queryset(job_type).iterator(chunk_size=chunk_size):
+        yield guide_to_record(guide)
+
+
+def record_media(record):
+    if record['file']:
+        yield record['file']
+    for device in record['devices']:
+        for fault in device['faults']:
+            for step in fault['steps']:
+                if step['file']:
+                    yield step['file']
+
+
+def write_jsonl(records, stream):
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        yield record
+
+
+def write_csv(records, stream):
+    writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for record in records:
+        base = {field: record[field] for field in GUIDE_FIELDS + ('job_type', 'file')}
+        rows = []
+        for device_no, device in enumerate(record['devices'], start=1):
+            device_cols = {'device_no': device_no, 'device': device['name']}
+            for fault_no, fault in enumerate(device['faults'], start=1):
+                fault_cols = {'fault_no': fault_no, 'fault': fault['description']}
+                for step in fault['steps']:
+                    rows.append({**device_cols, **fault_cols, 'step_order': step['order'], 'step_file': step['file']})
+                if not fault['steps']:
+                    rows.append({**device_cols, **fault_cols})
+            if not device['faults']:
+                rows.append(device_cols)
+        for row in rows or [{}]:
+            writer.writerow({**base, **row})
+        yield record
+
+
+# 將紀錄中引用的媒體檔寫入 zip（逐檔串流複製），同一檔案只寫一次，找不到的檔案略過
+def write_media(records, archive, storage=default_storage):
+    written = set()
+    for record in records:
+        for name in record_media(record):
+            if name in written or not storage.exists(name):
+                continue
+            with storage.open(name, 'rb') as src, archive.open(name, 'w', force_zip64=True) as dst:
+                shutil.copyfileobj(src, dst)
+            written.add(name)
+        yield record
+
+
+# ----------- 匯入 -----------
+
+# 紀錄的 _line 為來源的行號，供錯誤訊息使用
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, 1):
+        if line.strip():
+            yield {**json.loads(line), '_line': line_number}
+
+
+# CSV 依 doc_number 分組還原為巢狀紀錄（同一本說明書的列需連續）
+def read_csv(stream):
+    record = None
+    reader = csv.DictReader(stream)
+    for row in reader:
+        if record is None or row['doc_number'] != record['doc_number']:
+            if record is not None:
+                yield record
+            record = {field: row[field] for field in GUIDE_FIELDS}
+            record['_line'] = reader.line_num
+            record['is_pinned'] = row['is_pinned'] in ('True', 'true', '1')
+            record['job_type'] = row['job_type'] or None
+            record['file'] = row['file']
+            record['devices'] = []
+            devices = {}
+        if not row['device_no']:
+            continue
+        device = devices.get(row['device_no'])
+        if device is None:
+            device = devices[row['device_no']] = {'name': row['device'], 'faults': [], '_faults': {}}
+            record['devices'].append(device)
+        if not row['fault_no']:
+            continue
+        fault = device['_faults'].get(row['fault_no'])
+        if fault is None:
+            fault = device['_faults'][row['fault_no']] = {'description': row['fault'], 'steps': []}
+            device['faults'].append(fault)
+        if row['step_file']:
+            fault['steps'].append({'order': int(row['step_order'] or 0), 'file': row['step_file']})
+    if record is not None:
+        yield record
+
+
+class CatalogueImporter:
+    """
+    批次匯入說明書目錄：以 doc_number 為自然鍵，已存在的說明書更新欄位並整批替換其設備／故障／步驟。
+    作業類別與文件編號預先載入記憶體對照表，避免逐筆查詢。
+    """
+
+    def __init__(self, batch_size=500, media_archive=None, storage=default_storage):
+        self.batch_size = batch_size
+        self.media_archive = media_archive
+        self.storage = storage
+        self.job_types = dict(JobType.objects.values_list('name', 'id'))
+        self.guides = dict(SignalGuide.objects.values_list('doc_number', 'id'))
+        self.stats = {'guides': 0, 'devices': 0, 'faults': 0, 'steps': 0, 'media': 0}
+        self.media_names = {}
+        self.seen = set()
+
+    def run(self, records):
+        batch = []
+        for record in records:
+            # 同一批內重複的文件編號會讓 bulk_create 違反唯一限制；CSV 中同一本說明書的列不連續時也會如此
+            if record['doc_number'] in self.seen:
+                where = f"第 {record['_line']} 行：" if '_line' in record else ''
+                raise CatalogueError(f"{where}文件編號 {record['doc_number']} 重複（CSV 中同一本說明書的列須連續）")
+            self.seen.add(record['doc_number'])
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        # bulk 操作不會觸發 signals，結束後（外層交易提交後）統一讓回應快取失效
+        for model in (JobType, SignalGuide, Device, FaultCase, ProcedureStep):
+            transaction.on_commit(lambda name=model._meta.model_name: bump_generation(name))
+        snapshots.schedule()
+        return self.stats
+
+    def import_batch(self, records):
+        now = timezone.now()
+        self._extract_media(records)
+        with transaction.atomic():
+            self._create_job_types(records)
+
+            new_guides, existing_guides = [], []
+            for record in records:
+                guide = SignalGuide(
+                    job_type_id=self.job_types.get(record.get('job_type')),
+                    file=record.get('file', ''),
+                    **{field: record.get(field, '') for field in GUIDE_FIELDS if field != 'is_pinned'},
+                    is_pinned=bool(record.get('is_pinned')),
+                )
+                if guide.doc_number in self.guides:
+                    guide.id = self.guides[guide.doc_number]
+                    guide.updated_at = now
+                    existing_guides.append(guide)
+                else:
+                    new_guides.append(guide)
+
+            SignalGuide.objects.bulk_create(new_guides)
+            for guide in new_guides:
+                self.guides[guide.doc_number] = guide.id
+            if existing_guides:
+                SignalGuide.objects.bulk_update(
+                    existing_guides,
+                    [field for field in GUIDE_FIELDS if field != 'doc_number'] + ['job_type', 'file', 'file_sha256', 'updated_at'],
+                )
+                # 整批替換既有說明書底下的資料（逐筆刪除以保留刪除紀錄與索引同步）
+                Device.objects.filter(guide_id__in=[guide.id for guide in existing_guides]).delete()
+
+            devices, faults, steps = self._build_children(records)
+            # 子資料的外鍵在 bulk_create 時由已存檔的父物件自動帶入
+            Device.objects.bulk_create(devices)
+            FaultCase.objects.bulk_create(faults)
+            ProcedureStep.objects.bulk_create(steps)
+
+            if search.is_available():
+                search.index_objects(new_guides + existing_guides + devices + faults)
+            # 子資料以 bulk_create 建立，只推播說明書層級的事件，App 收到後以 /sync/ 取回整本
+            events.emit(new_guides + existing_guides, 'save')
+
+        self.stats['guides'] += len(records)
+        self.stats['devices'] += len(devices)
+        self.stats['faults'] += len(faults)
+        self.stats['steps'] += len(steps)
+
+    def _create_job_types(self, records):
+        names = {record['job_type'] for record in records if record.get('job_type')} - self.job_types.keys()
+        if names:
+            JobType.objects.bulk_create([JobType(name=name) for name in sorted(names)])
+            self.job_types.update(JobType.objects.filter(name__in=names).values_list('name', 'id'))
+
+    def _build_children(self, records):
+        devices, faults, steps = [], [], []
+        for record in records:
+            guide_id = self.guides[record['doc_number']]
+            for device_data in record.get('devices', []):
+                device = Device(guide_id=guide_id, name=device_data['name'])
+                devices.append(device)
+                for fault_data in device_data.get('faults', []):
+                    fault = FaultCase(device=device, description=fault_data['description'])
+                    faults.append(fault)
+                    for step_data in fault_data.get('steps', []):
+                        steps.append(ProcedureStep(fault=fault, order=step_data.get('order', 0), file=step_data['file']))
+        return devices, faults, steps
+
+    # 先寫入媒體檔再建立資料：儲存後端可能改變檔名（例如內容定址儲存），紀錄中的路徑改為實際存放位置
+    def _extract_media(self, records):
+        if self.media_archive is None:
+            return
+        names = set(self.media_archive.namelist())
+        for record in records:
+            for name in record_media(record):
+                if name in names and name not in self.media_names:
+                    if self.storage.exists(name):
+                        self.media_names[name] = name
+                    else:
+                        with self.media_archive.open(name) as src:
+                            self.media_names[name] = self.storage.save(name, File(src, name=name))
+                        self.stats['media'] += 1
+            self._rename_media(record)
+
+    def _rename_media(self, record):
+        record['file'] = self.media_names.get(record['file'], record['file'])
+        for device in record.get('devices', []):
+            for fault in device.get('faults', []):
+                for step in fault.get('steps', []):
+                    step['file'] = self.media_names.get(step['file'], step['file'])
@@ -0,0 +1,100 @@
+# signalguideapp/conditional.py
+# 條件式 GET：以 updated_at 與筆數計算 ETag / Last-Modified，未變更時直接回 304，不做序列化
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+from .models import DeletionLog
+
+
+# 查詢集的指紋：筆數 + 最後更新時間（含關聯資料，例如說明書的作業類別名稱）
+def queryset_fingerprint(queryset, related_fields=()):
+    aggregates = {'count': Count('pk'), 'last': Max('updated_at')}
+    for idx, field in enumerate(related_fields):
+        aggregates[f'related_{idx}'] = Max(field)
+    result = queryset.order_by().aggregate(**aggregates)
+    count = result.pop('count')
+    return count, [value for value in result.values() if value is not None]
+
+
+# 單筆資料的指紋，related_fields 以 __ 串接屬性，例如 job_type__updated_at
+def object_fingerprint(obj, related_fields=()):
+    timestamps = [obj.updated_at]
+    for field in related_fields:
+        value = obj
+        for attr in field.split('__'):
+            value = getattr(value, attr, None)
+            if value is None:
+                break
+        if value is not None:
+            timestamps.append(value)
+    return 1, timestamps
+
+
+# 合併多個指紋並納入刪除紀錄，回傳 (etag, last_modified)；
+# 傳入 request 時納入協商的回應格式，JSON 與 MessagePack 的內容不同，不可共用 ETag
+def make_validators(fingerprints, models=(), request=None):
+    counts = []
+    timestamps = []
+    for count, stamps in fingerprints:
+        counts.append(count)
+        timestamps.extend(stamps)
+
+    if models:
+        deleted = DeletionLog.objects.filter(
+            model__in=[model._meta.model_name for model in models]
+        ).aggregate(last=Max('deleted_at'))['last']
+        if deleted is not None:
+            timestamps.append(deleted)
+
+    last_modified = max(timestamps) if timestamps else None
+    raw = '|'.join([','.join(map(str, counts))] + [stamp.isoformat() for stamp in timestamps])
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is not None:
+        raw += f'|{renderer.format}'
+    etag = 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+    return etag, last_modified
+
+
+# 用戶端快取仍有效時回傳 304 回應，否則回傳 None
+def not_modified_response(request, etag, last_modified):
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept',))
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+# ViewSet 用：list / retrieve 先比對 ETag，未變更就不執行序列化
+class ConditionalGetMixin:
+    etag_related_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = make_validators(
+            [queryset_fingerprint(queryset, self.etag_related_fields)],
+            models=[queryset.model],
+            request=request,
+        )
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = make_validators([object_fingerprint(instance, self.etag_related_fields)], request=request)
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, last_modified)
+
@@ -0,0 +1,16 @@
+# signalguideapp/database.py
+# SQLite 連線調校：每條新連線建立時套用 SQLITE_PRAGMAS（WAL、synchronous、mmap、快取與忙碌等待），
+# 讓管理者寫入時查詢者仍可讀取；其他資料庫不受影響
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,283 @@
+# signalguideapp/events.py
+# 資料異動推播：models 的 save／delete 於交易提交後產生精簡的異動事件，例如
+#   {"model": "procedurestep", "id": 12, "op": "save", "updated_at": "...", "guide": 3, "job_type": 1}
+# 經 broker 送到各 process 的 Hub，再分送給 /api/events/ 的 Server-Sent Events 連線；
+# App 只訂閱需要的作業類別或說明書（?job_type=1&guide=3），收到事件後再以 /sync/ 取回資料，不必輪詢列表。
+# LocalBroker 只在同一 process 內分送（單一 worker 與測試）；多個 worker 時改用 RedisBroker（需安裝 redis）。
+import asyncio
+import json
+import logging
+import threading
+import time
+import weakref
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+from .models import SignalGuide, Device, FaultCase
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = getattr(settings, 'CHANGE_EVENTS_QUEUE_SIZE', 100)
+HEARTBEAT = getattr(settings, 'CHANGE_EVENTS_HEARTBEAT', 25)  # 秒，避免 proxy 關閉閒置連線
+RETRY_MS = 5000
+RESYNC = object()
+
+
+class Subscription:
+    """單一連線的事件佇列；佇列滿（用戶端讀取太慢）時清空並改送 resync，App 收到後以 /sync/ 補齊。"""
+    __slots__ = ('loop', 'queue', 'topics', 'overflowed')
+
+    def __init__(self, loop, topics):
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.topics = topics
+        self.overflowed = False
+
+    # 只在 self.loop 的執行緒中呼叫
+    def put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.overflowed = True
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self):
+        event = await self.queue.get()
+        if event is RESYNC:
+            self.overflowed = False
+        return event
+
+
+class Hub:
+    """同一 process 的事件分送：依主題（all、job_type:<id>、guide:<id>）找出訂閱者，以 call_soon_threadsafe 放入各自的佇列。"""
+
+    def __init__(self):
+        self._topics = {}
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, topics):
+        subscription = Subscription(asyncio.get_running_loop(), tuple(topics))
+        with self._lock:
+            self._subscriptions.add(subscription)
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription not in self._subscriptions:
+                return
+            self._subscriptions.remove(subscription)
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def dispatch(self, event):
+        topics = ('all', f'job_type:{event.get("job_type")}', f'guide:{event.get("guide")}')
+        with self._lock:
+            targets = set().union(*(self._topics.get(topic, ()) for topic in topics))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:  # 事件迴圈已關閉
+                self.unsubscribe(subscription)
+        return len(targets)
+
+
+hub = Hub()
+
+
+class BaseBroker:
+    """broker 介面：publish(events) 送出一批事件，start() 開始把收到的事件交給 hub.dispatch。"""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    # 是否可能有訂閱者；False 時不產生事件（省下查詢所屬說明書的成本）。Redis 無法得知其他 process 的訂閱者，一律為 True
+    @property
+    def active(self):
+        return True
+
+    def start(self):
+        pass
+
+    def publish(self, events):
+        raise NotImplementedError
+
+
+class LocalBroker(BaseBroker):
+    @property
+    def active(self):
+        return len(self.hub) > 0
+
+    def publish(self, events):
+        for event in events:
+            self.hub.dispatch(event)
+
+
+class RedisBroker(BaseBroker):
+    """以 Redis pub/sub 在多個 worker 之間轉送事件，每個 process 一條訂閱連線。"""
+    channel = getattr(settings, 'CHANGE_EVENTS_REDIS_CHANNEL', 'signalguide:events')
+
+    def __init__(self, hub):
+        if redis is None:
+            raise ImproperlyConfigured('RedisBroker 需要安裝 redis 套件')
+        super().__init__(hub)
+        self.client = redis.Redis.from_url(getattr(settings, 'CHANGE_EVENTS_REDIS_URL', 'redis://localhost:6379/0'))
+
+    def start(self):
+        threading.Thread(target=self._listen, name='change-events', daemon=True).start()
+
+    def publish(self, events):
+        self.client.publish(self.channel, json.dumps(events))
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    for event in json.loads(message['data']):
+                        self.hub.dispatch(event)
+            except redis.RedisError:
+                logger.exception('異動推播的 Redis 連線中斷，稍後重試')
+                time.sleep(1)
+
+
+_broker = None
+_broker_path = None
+_broker_lock = threading.Lock()
+
+
+# 依 CHANGE_EVENTS_BROKER 建立 broker；設為 None 時停用推播
+def get_broker():
+    global _broker, _broker_path
+    path = getattr(settings, 'CHANGE_EVENTS_BROKER', 'signalguideapp.events.LocalBroker')
+    if path is None:
+        return None
+    with _broker_lock:
+        if _broker_path != path:
+            _broker = import_string(path)(hub)
+            _broker.start()
+            _broker_path = path
+    return _broker
+
+
+# 各模型的上層：(外鍵欄位, 上層模型)，由下而上；說明書的上層為作業類別
+PARENTS = {
+    'procedurestep': ('fault_id', FaultCase),
+    'faultcase': ('device_id', Device),
+    'device': ('guide_id', SignalGuide),
+    'signalguide': ('job_type_id', None),
+}
+LEVELS = tuple(PARENTS)
+
+
+class Batch:
+    """同一交易內的異動事件：提交時每層最多一次查詢補齊所屬說明書與作業類別，再一次送出。
+    連帶刪除時上層資料提交後已不存在，改由本批已刪除資料記下的上層 ID 推得。"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.events = []
+        self.parents = {}  # (模型, id) → 上層 id
+        self.sent = False
+
+    def add(self, instance, op):
+        model_name = instance._meta.model_name
+        if model_name in PARENTS:
+            self.parents[model_name, instance.pk] = getattr(instance, PARENTS[model_name][0])
+        updated_at = getattr(instance, 'updated_at', None)
+        self.events.append({
+            'model': model_name,
+            'id': instance.pk,
+            'op': op,
+            'updated_at': updated_at.isoformat() if updated_at and op == 'save' else None,
+            'guide': None,
+            'job_type': instance.pk if model_name == 'jobtype' else None,
+        })
+
+    def resolve(self):
+        for lower, upper in zip(LEVELS, LEVELS[1:]):
+            needed = {parent for (model_name, pk), parent in self.parents.items() if model_name == lower}
+            missing = needed - {pk for model_name, pk in self.parents if model_name == upper} - {None}
+            if missing:
+                rows = PARENTS[lower][1].objects.filter(pk__in=missing).values_list('pk', PARENTS[upper][0])
+                self.parents.update(((upper, pk), parent) for pk, parent in rows)
+        for event in self.events:
+            if event['model'] not in PARENTS:
+                continue
+            guide = event['id']
+            for model_name in LEVELS[LEVELS.index(event['model']):-1]:
+                guide = self.parents.get((model_name, guide))
+            event['guide'], event['job_type'] = guide, self.parents.get(('signalguide', guide))
+
+    def flush(self):
+        self.sent = True
+        self.resolve()
+        self.broker.publish(self.events)
+
+
+# 連線 → {(broker, savepoint 堆疊): 尚未送出的一批}；只保留弱參照，
+# 回滾（含 savepoint）時 Django 捨棄 callback，該批隨之釋放，之後的事件自然改用新的一批
+_batches = weakref.WeakKeyDictionary()
+
+
+# 產生事件並在交易提交後送出（回滾時不送）；op 為 save 或 delete
+# 同一交易（同一層 savepoint）內只註冊一個 on_commit，連帶刪除等逐筆觸發的 signal 都併入同一批
+def emit(objs, op):
+    broker = get_broker()
+    if broker is None or not broker.active:
+        return
+    connection = transaction.get_connection()
+    batches = _batches.setdefault(connection, weakref.WeakValueDictionary())
+    key = (broker, tuple(connection.savepoint_ids))
+    batch = batches.get(key) if connection.in_atomic_block else None
+    fresh = batch is None or batch.sent
+    if fresh:
+        batch = Batch(broker)
+    for obj in objs:
+        batch.add(obj, op)
+    if fresh:
+        if connection.in_atomic_block:
+            batches[key] = batch
+        transaction.on_commit(batch.flush)  # 不在交易內時立即送出
+
+
+def format_event(event):
+    if event is RESYNC:
+        return 'event: resync\ndata: {}\n\n'
+    return f'event: change\ndata: {json.dumps(event, separators=(",", ":"))}\n\n'
+
+
+# SSE 內容：連線期間每個事件一段，閒置時定期送出註解行當作心跳；連線中斷時取消訂閱
+async def stream(topics, heartbeat=None):
+    subscription = hub.subscribe(topics)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat or HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(subscription)
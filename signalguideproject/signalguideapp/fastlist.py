@@ -0,0 +1,116 @@
+# signalguideapp/fastlist.py
+# 大量列表的快速路徑：以 .values() 直接取出欄位值（作業類別名稱以 job_type__name 一併 JOIN 查出），
+# 不建立 model 與序列化器實體，再由 ORJSONRenderer 編碼；欄位順序與格式依序列化器的欄位定義，輸出逐位元組相同。
+# 只作用於 GET list 的 JSON 回應，新增／修改仍走原本的序列化器。
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .renderers import ORJSONRenderer, orjson
+
+FAST_LIST = getattr(settings, 'API_FAST_LIST', True)
+
+# to_representation 對資料庫值不做任何轉換的欄位，直接輸出
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+
+# 欄位 source 對應的 .values() 查詢鍵；只接受實體欄位與正向外鍵，其餘（property、反向關聯）回傳 None
+def _lookup(model, source_attrs):
+    for idx, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None, None
+        if not field.concrete or field.many_to_many:
+            return None, None
+        if idx < len(source_attrs) - 1:
+            if not field.is_relation:
+                return None, None
+            model = field.related_model
+    return '__'.join(source_attrs), field
+
+
+def _file_url(storage, request):
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+# 依序列化器（已套用 ?fields=／?omit=）產生輸出計畫：[(輸出名稱, 查詢鍵, 轉換函式, 關聯為空時略過)]
+# 有 SerializerMethodField、巢狀序列化器等無法以 .values() 表示的欄位時回傳 None，改走一般路徑
+def build_plan(serializer):
+    model = serializer.Meta.model
+    request = serializer.context.get('request')
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField, serializers.HiddenField)):
+            return None
+        if field.source == '*' or field.default is not empty:
+            return None
+        key, model_field = _lookup(model, field.source_attrs)
+        if key is None:
+            return None
+
+        if isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+                return None
+            convert = None  # 外鍵欄位的 .values() 即為主鍵
+        elif isinstance(field, serializers.FileField):
+            if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+                return None
+            convert = _file_url(model_field.storage, request)
+        elif type(field) in PASSTHROUGH_FIELDS:
+            convert = None
+        else:
+            convert = field.to_representation
+
+        # 跨關聯的唯讀欄位（如 job_type.name）在關聯為空時，序列化器會略過整個鍵
+        skip_null = len(field.source_attrs) > 1
+        if skip_null and (field.allow_null or model_field.null):
+            return None
+        plan.append((name, key, convert, skip_null))
+    return plan
+
+
+def render_rows(plan, rows):
+    data = []
+    for row in rows:
+        item = {}
+        for name, key, convert, skip_null in plan:
+            value = row[key]
+            if value is None:
+                if skip_null:
+                    continue
+                item[name] = None
+            else:
+                item[name] = value if convert is None else convert(value)
+        data.append(item)
+    return data
+
+
+# ViewSet 用，放在 ModelViewSet 之前：JSON 的 list 改走 .values() 快速路徑，其他格式與動作不受影響
+class FastListMixin:
+    def list(self, request, *args, **kwargs):
+        if not FAST_LIST or orjson is None or type(request.accepted_renderer) is not JSONRenderer:
+            return super().list(request, *args, **kwargs)
+        plan = build_plan(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        # 游標分頁需要排序欄位計算下一頁位置，即使 ?fields= 未包含也要查出
+        keys = dict.fromkeys([key for _, key, _, _ in plan] + [f.lstrip('-') for f in getattr(self, 'cursor_ordering', ())])
+        queryset = self.filter_queryset(self.get_queryset()).values(*keys)
+        request.accepted_renderer = ORJSONRenderer()
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(render_rows(plan, page))
+        return Response(render_rows(plan, queryset.iterator(chunk_size=2000)))
@@ -0,0 +1,22 @@
+# signalguideapp/hashers.py
+# 可調參數的密碼雜湊：參數由 settings 設定，登入時 Django 會比對 must_update，
+# 舊演算法或舊參數的密碼在驗證成功後自動以目前設定重新雜湊
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+# Argon2id（需安裝 argon2-cffi）；預設為 OWASP 建議的最低參數：19 MiB、2 次迭代、單執行緒
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = getattr(settings, 'ARGON2_TIME_COST', 2)
+    memory_cost = getattr(settings, 'ARGON2_MEMORY_COST', 19456)  # KiB
+    parallelism = getattr(settings, 'ARGON2_PARALLELISM', 1)
+
+
+# scrypt（Python 內建）；預設 N=2^14、r=8、p=5，為 OWASP 建議組合中 CPU 成本最低者（每次約使用 16 MiB）
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = getattr(settings, 'SCRYPT_WORK_FACTOR', 2 ** 14)
+    block_size = getattr(settings, 'SCRYPT_BLOCK_SIZE', 8)
+    parallelism = getattr(settings, 'SCRYPT_PARALLELISM', 5)
+    # OpenSSL 預設記憶體上限為 32 MiB，依參數放寬
+    maxmem = 2 * 128 * work_factor * block_size
+
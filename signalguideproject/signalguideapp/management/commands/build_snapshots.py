@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from signalguideapp import snapshots
+
+
+class Command(BaseCommand):
+    help = '產生各作業類別的離線快照（預設只重建內容有變的作業類別）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重建所有作業類別的快照')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['all']:
+            storage = snapshots.get_storage()
+            if storage.exists(''):
+                for filename in storage.listdir('')[1]:
+                    storage.delete(filename)
+        rebuilt = snapshots.rebuild_stale()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'已重建 {len(rebuilt)} 個作業類別的快照，耗時 {elapsed:.2f} 秒'))
@@ -0,0 +1,103 @@
+import os
+from collections import defaultdict
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from signalguideapp.media import sha256_of
+from signalguideapp.models import SignalGuide, ProcedureStep
+from signalguideapp.storage import BLOB_DIR, BLOB_PATTERN, blob_base, blob_name, reference_count
+
+
+class Command(BaseCommand):
+    help = '將既有媒體檔搬入內容定址儲存（相同內容只保留一份），並可清除無人引用的檔案'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只統計可節省的空間，不實際搬移或刪除')
+        parser.add_argument('--gc', action='store_true', help='另外刪除 blobs/ 底下已無資料引用的檔案')
+
+    def handle(self, *args, **options):
+        self.storage = default_storage
+        if not hasattr(self.storage, 'release'):
+            raise CommandError('預設儲存後端不是內容定址儲存（signalguideapp.storage.ContentAddressedStorage）')
+        self.dry_run = options['dry_run']
+        self.stats = {'files': 0, 'duplicates': 0, 'missing': 0, 'reclaimed': 0, 'orphans': 0}
+        self.seen = set()  # dry-run 時記錄「已搬入」的 blob
+
+        for model in (SignalGuide, ProcedureStep):
+            self.migrate_model(model)
+        if options['gc']:
+            self.collect_garbage()
+
+        prefix = '（試算）' if self.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}搬移 {self.stats['files']} 個檔案，其中重複 {self.stats['duplicates']} 個，"
+            f"找不到 {self.stats['missing']} 個，清除孤立檔 {self.stats['orphans']} 組，"
+            f"節省 {self.stats['reclaimed'] / 1024 / 1024:.2f} MB"
+        ))
+
+    def migrate_model(self, model):
+        # 同一個舊檔可能被多筆資料引用，依檔名分組後一次搬移
+        names = list(
+            model.objects.exclude(file='').exclude(file__startswith=f'{BLOB_DIR}/')
+            .values_list('file', flat=True).distinct()
+        )
+        for name in names:
+            if not self.storage.exists(name):
+                self.stats['missing'] += 1
+                continue
+            size = self.storage.size(name)
+            with self.storage.open(name, 'rb') as file:
+                digest = sha256_of(file)
+            target = blob_name(digest, os.path.splitext(name)[1])
+            self.stats['files'] += 1
+            if self.storage.exists(target) or target in self.seen:
+                self.stats['duplicates'] += 1
+                self.stats['reclaimed'] += size
+            if self.dry_run:
+                self.seen.add(target)
+                continue
+
+            with self.storage.open(name, 'rb') as file:
+                target = self.storage.save(target, file)
+            rows = model.objects.filter(file=name)
+            if model is ProcedureStep:
+                self.move_renditions(rows, name, target)
+            rows.update(file=target, file_sha256=digest)
+            if reference_count(name) == 0:
+                self.storage.delete(name)
+
+    # 縮圖依新檔名搬移，不需重新產生
+    def move_renditions(self, rows, old_name, new_name):
+        old_base, new_base = os.path.splitext(old_name)[0], os.path.splitext(new_name)[0]
+        moved = {}
+        for step in rows.exclude(renditions={}).only('id', 'renditions'):
+            renditions = {}
+            for key, path in step.renditions.items():
+                if path not in moved and path.startswith(old_base + '.') and self.storage.exists(path):
+                    with self.storage.open(path, 'rb') as file:
+                        moved[path] = self.storage.save(new_base + path[len(old_base):], file)
+                    self.storage.delete(path)
+                renditions[key] = moved.get(path, path)
+            ProcedureStep.objects.filter(pk=step.pk).update(renditions=renditions)
+
+    # 依雜湊分組（原檔與縮圖），整組皆無資料引用時刪除；寬限期內剛被上傳沿用的檔案先保留（可能尚未提交）
+    def collect_garbage(self):
+        groups = defaultdict(list)
+        root = self.storage.path(BLOB_DIR)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(directory, filename), self.storage.location).replace(os.sep, '/')
+                if BLOB_PATTERN.match(name):
+                    groups[blob_base(name)].append(name)
+
+        for base, names in groups.items():
+            referenced = Q(file=base) | Q(file__startswith=base + '.')
+            if SignalGuide.objects.filter(referenced).exists() or ProcedureStep.objects.filter(referenced).exists():
+                continue
+            if any(self.storage.recently_used(name) for name in names):
+                continue
+            self.stats['orphans'] += 1
+            for name in names:
+                self.stats['reclaimed'] += self.storage.size(name)
+                if not self.dry_run:
+                    self.storage.delete(name)
@@ -0,0 +1,42 @@
+import sys
+import time
+import zipfile
+from django.core.management.base import BaseCommand
+from signalguideapp import catalogue
+
+
+class Command(BaseCommand):
+    help = '匯出工作說明書目錄（JSONL 或 CSV），可選擇將媒體檔一併封存為 zip'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='輸出檔路徑，- 表示輸出到 stdout')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='預設依副檔名判斷')
+        parser.add_argument('--media', help='媒體檔 zip 封存路徑')
+        parser.add_argument('--job-type', help='只匯出指定作業類別')
+        parser.add_argument('--chunk-size', type=int, default=500, help='每批讀取的說明書筆數')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or ('csv' if output.endswith('.csv') else 'jsonl')
+        stream = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8', newline='')
+        archive = zipfile.ZipFile(options['media'], 'w', zipfile.ZIP_DEFLATED) if options['media'] else None
+
+        start = time.perf_counter()
+        count = 0
+        try:
+            records = catalogue.iter_records(options['job_type'], chunk_size=options['chunk_size'])
+            writer = catalogue.write_csv if fmt == 'csv' else catalogue.write_jsonl
+            records = writer(records, stream)
+            if archive is not None:
+                records = catalogue.write_media(records, archive)
+            for _ in records:
+                count += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+            if archive is not None:
+                archive.close()
+
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed else 0
+        self.stderr.write(f'已匯出 {count} 本說明書，耗時 {elapsed:.2f} 秒（{rate:.0f} 筆/秒）')
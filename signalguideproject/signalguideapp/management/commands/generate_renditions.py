@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from signalguideapp.models import ProcedureStep
+from signalguideapp.renditions import process_step
+
+
+class Command(BaseCommand):
+    help = '為處理步驟產生縮圖（預設只處理尚未產生者）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重新產生所有步驟的縮圖')
+
+    def handle(self, *args, **options):
+        queryset = ProcedureStep.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(renditions={})
+
+        start = time.perf_counter()
+        count = 0
+        for step_id in queryset.values_list('id', flat=True).iterator(chunk_size=500):
+            process_step(step_id)
+            count += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'已處理 {count} 個步驟，耗時 {elapsed:.2f} 秒'))
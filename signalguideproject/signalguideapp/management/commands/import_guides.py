@@ -0,0 +1,44 @@
+import sys
+import time
+import zipfile
+from django.core.management.base import BaseCommand, CommandError
+from signalguideapp import catalogue
+
+
+class Command(BaseCommand):
+    help = '匯入工作說明書目錄（JSONL 或 CSV），以文件編號為鍵新增或更新'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='輸入檔路徑，- 表示從 stdin 讀取')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='預設依副檔名判斷')
+        parser.add_argument('--media', help='export_guides 產生的媒體檔 zip')
+        parser.add_argument('--batch-size', type=int, default=500, help='每個交易匯入的說明書筆數')
+
+    def handle(self, *args, **options):
+        path = options['input']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size 必須大於 0')
+
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        archive = zipfile.ZipFile(options['media']) if options['media'] else None
+        start = time.perf_counter()
+        try:
+            records = catalogue.read_csv(stream) if fmt == 'csv' else catalogue.read_jsonl(stream)
+            importer = catalogue.CatalogueImporter(batch_size=options['batch_size'], media_archive=archive)
+            stats = importer.run(records)
+        except catalogue.CatalogueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if archive is not None:
+                archive.close()
+
+        elapsed = time.perf_counter() - start
+        rows = stats['guides'] + stats['devices'] + stats['faults'] + stats['steps']
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"已匯入 說明書 {stats['guides']}、設備 {stats['devices']}、故障案例 {stats['faults']}、"
+            f"處理步驟 {stats['steps']}、媒體檔 {stats['media']}，耗時 {elapsed:.2f} 秒（{rate:.0f} 筆/秒）"
+        ))
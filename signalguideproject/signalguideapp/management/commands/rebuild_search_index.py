@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from signalguideapp import search
+
+
+class Command(BaseCommand):
+    help = '重建全文檢索索引（工作說明書、設備、故障案例）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批寫入筆數')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('找不到 FTS5 索引資料表，請確認使用 SQLite 並已執行 migrate')
+
+        start = time.perf_counter()
+        total = search.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'已重建索引：{total} 筆，耗時 {elapsed:.2f} 秒'))
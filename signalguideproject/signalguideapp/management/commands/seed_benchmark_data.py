@@ -0,0 +1,55 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from signalguideapp import seeding
+
+
+class Command(BaseCommand):
+    help = '產生效能測試用的合成資料（作業類別、說明書、設備、故障案例、處理步驟、測試檔案與帳號）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job-types', type=int, default=5, help='作業類別數')
+        parser.add_argument('--guides', type=int, default=200, help='說明書總數')
+        parser.add_argument('--devices-per-guide', type=int, default=3, help='每本說明書的平均設備數')
+        parser.add_argument('--faults-per-device', type=int, default=3, help='每個設備的平均故障案例數')
+        parser.add_argument('--steps-per-fault', type=int, default=2, help='每個故障案例的平均處理步驟數')
+        parser.add_argument('--files', type=int, default=20, help='處理步驟共用的測試檔案數')
+        parser.add_argument('--users', type=int, default=20, help=f'查詢者帳號數（員工編號 {seeding.VIEWER_ID_START} 起）')
+        parser.add_argument('--admins', type=int, default=2, help=f'管理者帳號數（員工編號 {seeding.ADMIN_ID_START} 起）')
+        parser.add_argument('--password', default='bench1234', help='測試帳號的密碼')
+        parser.add_argument('--seed', type=int, default=0, help='亂數種子，相同參數與種子產生相同資料')
+        parser.add_argument('--batch-size', type=int, default=500, help='每個交易寫入的說明書筆數')
+
+    def handle(self, *args, **options):
+        if options['job_types'] < 1 or options['guides'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--job-types 與 --batch-size 必須大於 0，--guides 不可為負數')
+        if min(options['devices_per_guide'], options['faults_per_device'], options['steps_per_fault'], options['files']) < 0:
+            raise CommandError('數量不可為負數')
+        if options['steps_per_fault'] and not options['files']:
+            raise CommandError('處理步驟需要測試檔案，請指定 --files')
+        if not 0 <= options['users'] < seeding.ADMIN_ID_START - seeding.VIEWER_ID_START or not 0 <= options['admins'] < 1000:
+            raise CommandError('帳號數超出員工編號範圍')
+
+        start = time.perf_counter()
+        stats = seeding.seed(
+            job_types=options['job_types'],
+            guides=options['guides'],
+            devices_per_guide=options['devices_per_guide'],
+            faults_per_device=options['faults_per_device'],
+            steps_per_fault=options['steps_per_fault'],
+            files=options['files'],
+            viewers=options['users'],
+            admins=options['admins'],
+            password=options['password'],
+            random_seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.perf_counter() - start
+        rows = stats['guides'] + stats['devices'] + stats['faults'] + stats['steps']
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"已產生 說明書 {stats['guides']}、設備 {stats['devices']}、故障案例 {stats['faults']}、"
+            f"處理步驟 {stats['steps']}、測試檔案 {stats['files']}，耗時 {elapsed:.2f} 秒（{rate:.0f} 筆/秒）"
+        ))
+        self.stdout.write(
+            f"測試帳號：查詢者 {stats['viewers']} 個、管理者 {stats['admins']} 個，密碼 {options['password']}"
+        )
@@ -0,0 +1,121 @@
+# signalguideapp/media.py
+# 說明書與處理步驟檔案的下載：需登入、支援 HTTP Range（續傳與 PDF 跳頁）、以內容雜湊作為強 ETag，
+# 可選擇交由 nginx 以 X-Accel-Redirect 直接送檔
+import hashlib
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# 逐塊計算 SHA-256，記憶體用量與檔案大小無關
+def sha256_of(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 取得檔案雜湊；舊資料或 bulk 寫入時尚未計算，第一次下載時補算並存回資料表
+def ensure_sha256(instance):
+    if not instance.file_sha256:
+        with instance.file.open('rb') as file:
+            instance.file_sha256 = sha256_of(file)
+        type(instance).objects.filter(pk=instance.pk).update(file_sha256=instance.file_sha256)
+    return instance.file_sha256
+
+
+# 解析單一 Range（多段範圍不支援，回傳 None 改送完整檔案）；範圍無效時回傳 False
+def parse_range(header, size):
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if start == '' and end == '':
+        return None
+    if start == '':
+        length = int(end)
+        if length == 0:
+            return False
+        start, end = max(size - length, 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _iter_range(file, start, length):
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+# 資料列仍在但實體檔案已遺失時回傳 404，而不是 500
+def serve_file(request, instance):
+    try:
+        return serve_stored_file(
+            request, instance.file.storage, instance.file.name,
+            etag=quote_etag(ensure_sha256(instance)),
+            last_modified=int(instance.updated_at.timestamp()),
+            accel_prefix=getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None),
+        )
+    except FileNotFoundError:
+        raise Http404('檔案不存在')
+
+
+# 送出儲存後端中的檔案（說明書、處理步驟檔案與離線快照共用）
+def serve_stored_file(request, storage, name, etag, last_modified, accel_prefix=None):
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    filename = os.path.basename(name)
+    if accel_prefix:
+        # 交由 nginx 的 internal location 送檔（含 Range 處理），Django 不讀取檔案內容
+        response = HttpResponse(content_type='')
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + name
+    else:
+        size = storage.size(name)
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if 'HTTP_RANGE' in request.META and (if_range is None or if_range == etag):
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        file = storage.open(name, 'rb')
+        if byte_range is None:
+            # FileResponse 會在伺服器支援時使用 wsgi.file_wrapper（sendfile）零複製送檔
+            response = FileResponse(file, filename=filename)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(_iter_range(file, start, length), status=206)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+            response['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
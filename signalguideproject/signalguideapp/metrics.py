@@ -0,0 +1,216 @@
+# signalguideapp/metrics.py
+# 請求指標：MetricsMiddleware 記錄每個 URL 名稱（devices-by-guide、token_obtain_pair、signalguide-list…）的
+# 延遲、回應大小、資料庫查詢次數與時間，/metrics 以 Prometheus 文字格式輸出，另含回應快取命中率與推播連線數。
+# 查詢以 connection.execute_wrapper 計時（建立連線時安裝一次，非請求期間直接放行）；
+# 超過 METRICS_SLOW_REQUEST_MS 的請求記錄到 log，附上最慢的幾條 SQL。
+# 指標存在各 process 的記憶體中，多個 worker 時 Prometheus 需分別抓取或合併。
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 1000)
+SLOW_SQL_LIMIT = 5
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# method 標籤只用已知的 HTTP 方法，用戶端送出的其他方法一律歸為 OTHER，避免標籤數量無限增加
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+_current = ContextVar('signalguide_request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_time', 'slowest')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.slowest = []  # [(秒, SQL)]，最多 SLOW_SQL_LIMIT 筆
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.query_time += duration
+        if len(self.slowest) < SLOW_SQL_LIMIT:
+            self.slowest.append((duration, sql))
+        elif duration > self.slowest[-1][0]:
+            self.slowest[-1] = (duration, sql)
+        else:
+            return
+        self.slowest.sort(key=lambda item: -item[0])
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """以 (指標名稱, 標籤) 為鍵的計數器與直方圖，單一鎖保護。"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def record_request(self, view, method, status, duration, size, stats):
+        labels = (('view', view), ('method', method))
+        with self.lock:
+            self._inc('signalguide_requests_total', labels + (('status', str(status)),))
+            self._observe('signalguide_request_duration_seconds', labels, duration, LATENCY_BUCKETS)
+            if size is not None:
+                self._observe('signalguide_response_size_bytes', labels, size, SIZE_BUCKETS)
+            self._observe('signalguide_db_queries_per_request', labels, stats.queries, QUERY_BUCKETS)
+            self._inc('signalguide_db_query_seconds_total', labels, stats.query_time)
+            if duration * 1000 >= SLOW_REQUEST_MS:
+                self._inc('signalguide_slow_requests_total', labels)
+
+    def _inc(self, name, labels, amount=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def _observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self.histograms.items()}
+        return counters, histograms
+
+
+registry = Registry()
+
+HELP = {
+    'signalguide_requests_total': ('counter', '請求數'),
+    'signalguide_request_duration_seconds': ('histogram', '請求處理時間（秒）'),
+    'signalguide_response_size_bytes': ('histogram', '回應大小（位元組，串流回應不計）'),
+    'signalguide_db_queries_per_request': ('histogram', '每個請求的資料庫查詢次數'),
+    'signalguide_db_query_seconds_total': ('counter', '資料庫查詢累計時間（秒）'),
+    'signalguide_slow_requests_total': ('counter', f'超過 {SLOW_REQUEST_MS} ms 的請求數'),
+    'signalguide_response_cache_total': ('counter', '回應快取查詢次數'),
+    'signalguide_event_subscribers': ('gauge', '異動推播的連線數'),
+}
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in labels) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Prometheus 文字格式（text/plain; version=0.0.4）
+def render():
+    from . import cache, events
+
+    counters, histograms = registry.snapshot()
+    stats = cache.cache_stats()
+    for result in ('hits', 'misses'):
+        counters['signalguide_response_cache_total', (('result', result),)] = stats[result]
+    counters['signalguide_event_subscribers', ()] = len(events.hub)
+
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append(f'{name}{_labels(labels)} {_number(value)}')
+    for (name, labels), (buckets, counts, total, count) in histograms.items():
+        lines = by_name.setdefault(name, [])
+        cumulative = 0
+        for bound, bucket_count in zip(buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{_labels(labels + (("le", _number(bound)),))} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {count}')
+        lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+        lines.append(f'{name}_count{_labels(labels)} {count}')
+
+    output = []
+    for name in sorted(by_name):
+        kind, help_text = HELP[name]
+        output.append(f'# HELP {name} {help_text}')
+        output.append(f'# TYPE {name} {kind}')
+        output.extend(sorted(by_name[name]) if kind != 'histogram' else by_name[name])
+    return '\n'.join(output) + '\n'
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+# 請求結束：寫入指標，慢請求記錄最慢的 SQL
+def finish_request(request, response, stats, token, start):
+    _current.reset(token)
+    duration = time.perf_counter() - start
+    match = getattr(request, 'resolver_match', None)
+    view = (match.url_name or match.route) if match else 'unmatched'
+    size = None if response.streaming else len(response.content)
+    method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+    registry.record_request(view, method, response.status_code, duration, size, stats)
+
+    if duration * 1000 >= SLOW_REQUEST_MS:
+        logger.warning(
+            '慢請求 %s %s（%s）%.0f ms，%d 次查詢共 %.0f ms；最慢的 SQL：\n%s',
+            request.method, request.get_full_path(), view, duration * 1000, stats.queries, stats.query_time * 1000,
+            '\n'.join(f'  [{seconds * 1000:.1f} ms] {sql}' for seconds, sql in stats.slowest),
+        )
+
+
+# GET /metrics：設定 METRICS_TOKEN 時需帶 Authorization: Bearer <token>；未設定時預設拒絕，
+# METRICS_ALLOW_LOCAL 開啟時才允許本機存取（經 nginx 等反向代理時所有請求都來自本機，不可開啟）
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif not getattr(settings, 'METRICS_ALLOW_LOCAL', False) or request.META.get('REMOTE_ADDR') not in ('127.0.0.1', '::1'):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
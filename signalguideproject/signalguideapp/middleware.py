@@ -0,0 +1,103 @@
+# signalguideapp/middleware.py
+import re
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from . import metrics, profiling
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+RE_ACCEPTS_BR = re.compile(r'\bbr\b(?!\s*;\s*q=0(\.0*)?\s*(,|$))')
+
+
+# 回應壓縮：用戶端支援且已安裝 brotli 時優先使用 br，否則 gzip；檔案下載（支援 Range）與 SSE 事件串流不壓縮
+class CompressionMiddleware(GZipMiddleware):
+    brotli_quality = getattr(settings, 'BROTLI_QUALITY', 5)  # 動態內容以速度為主，0–11
+
+    def process_response(self, request, response):
+        if response.has_header('Accept-Ranges') or response.status_code == 206:
+            return response
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response  # gzip 會緩衝內容，事件無法即時送達
+        if brotli is None or response.streaming or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+        if len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not RE_ACCEPTS_BR.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+
+        compressed = brotli.compress(response.content, quality=self.brotli_quality)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+# 請求指標（見 metrics.py）：放在 MIDDLEWARE 最前面，量測含壓縮在內的完整處理時間與實際送出的大小；
+# 同時支援同步與非同步請求（非同步 view 的查詢在 sync_to_async 執行緒中也會計入）
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        stats, token = metrics.start_request()
+        response = self.get_response(request)
+        metrics.finish_request(request, response, stats, token, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        stats, token = metrics.start_request()
+        response = await self.get_response(request)
+        metrics.finish_request(request, response, stats, token, start)
+        return response
+
+
+# 單一請求的效能剖析（見 profiling.py）：PROFILING_ENABLED 未開啟時不載入；放在 MIDDLEWARE 最後，
+# 其他 middleware 的 process_view（CSRF 等）都已執行後才剖析 view。非同步模式下 process_view 也是 coroutine，
+# 未帶旗標的請求不會多一次執行緒切換；帶旗標時在執行緒中剖析同步 view（async view 不剖析）
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not profiling.requested(request) or iscoroutinefunction(view_func):
+            return None
+        return profiling.profile_view(request, view_func, view_args, view_kwargs)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if not profiling.requested(request) or iscoroutinefunction(view_func):
+            return None
+        return await sync_to_async(profiling.profile_view)(request, view_func, view_args, view_kwargs)
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50, verbose_name='資料表')),
+                ('object_id', models.BigIntegerField(verbose_name='資料 ID')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='刪除時間')),
+            ],
+            options={
+                'verbose_name': '刪除紀錄',
+                'verbose_name_plural': '刪除紀錄列表',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='device',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='最後更新'),
+        ),
+        migrations.AlterField(
+            model_name='faultcase',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='最後更新'),
+        ),
+        migrations.AlterField(
+            model_name='jobtype',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='最後更新'),
+        ),
+        migrations.AlterField(
+            model_name='procedurestep',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='最後更新'),
+        ),
+        migrations.AlterField(
+            model_name='signalguide',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='最後更新'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0002_deletionlog_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deletionlog',
+            index=models.Index(fields=['model', 'deleted_at'], name='deletionlog_model_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# 全文檢索用的 SQLite FTS5 虛擬資料表（其他資料庫略過，搜尋會退回 icontains 查詢）
+
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS signalguideapp_searchindex "
+        "USING fts5(guide_id UNINDEXED, title, body, tokenize='unicode61')"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS signalguideapp_searchindex")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0003_deletionlog_model_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0004_searchindex'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='procedurestep',
+            name='file_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='檔案 SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='signalguide',
+            name='file_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='檔案 SHA-256'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0005_file_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='procedurestep',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='縮圖與預覽'),
+        ),
+    ]
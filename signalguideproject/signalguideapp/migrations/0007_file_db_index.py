@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0006_procedurestep_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='procedurestep',
+            name='file',
+            field=models.FileField(db_index=True, upload_to='procedure_files/', verbose_name='步驟相關圖片或PDF'),
+        ),
+        migrations.AlterField(
+            model_name='signalguide',
+            name='file',
+            field=models.FileField(blank=True, db_index=True, upload_to='manuals/', verbose_name='上傳檔案'),
+        ),
+    ]
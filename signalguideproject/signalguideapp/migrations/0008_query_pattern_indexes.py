@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0007_file_db_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['guide', 'updated_at'], name='device_guide_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faultcase',
+            index=models.Index(fields=['device', '-created_at', 'id'], name='faultcase_device_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procedurestep',
+            index=models.Index(fields=['fault', 'order', 'id'], name='step_fault_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signalguide',
+            index=models.Index(fields=['job_type', 'doc_number'], name='guide_type_doc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signalguide',
+            index=models.Index(condition=models.Q(('is_pinned', True)), fields=['job_type', 'doc_number'], name='guide_type_pinned_doc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signalguide',
+            index=models.Index(condition=models.Q(('is_pinned', True)), fields=['doc_number'], name='guide_pinned_doc_idx'),
+        ),
+    ]
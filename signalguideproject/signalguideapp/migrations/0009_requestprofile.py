@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('signalguideapp', '0008_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10, verbose_name='方法')),
+                ('path', models.CharField(max_length=500, verbose_name='路徑')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='URL 名稱')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='狀態碼')),
+                ('duration_ms', models.FloatField(verbose_name='處理時間（毫秒）')),
+                ('query_count', models.PositiveIntegerField(default=0, verbose_name='查詢次數')),
+                ('query_ms', models.FloatField(default=0, verbose_name='查詢時間（毫秒）')),
+                ('queries', models.JSONField(blank=True, default=list, verbose_name='SQL')),
+                ('profile_file', models.CharField(blank=True, max_length=200, verbose_name='cProfile 檔案')),
+                ('speedscope_file', models.CharField(blank=True, max_length=200, verbose_name='speedscope 檔案')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='建立時間')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='使用者')),
+            ],
+            options={
+                'verbose_name': '效能剖析紀錄',
+                'verbose_name_plural': '效能剖析紀錄列表',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -71,7 +71,7 @@ class JobType(models.Model):
 
     # 加入時間戳記
     created_at = models.DateTimeField("建立時間", auto_now_add=True)
-    updated_at = models.DateTimeField("最後更新", auto_now=True)
+    updated_at = models.DateTimeField("最後更新", auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "作業類別"
@@ -99,12 +99,13 @@ class SignalGuide(models.Model):
     title = models.CharField("文件名稱", max_length=200)
     department = models.CharField("權責股", max_length=100, blank=True)
     owner = models.CharField("負責人員", max_length=100, blank=True)
-    file = models.FileField("上傳檔案", upload_to='manuals/', blank=True)
+    file = models.FileField("上傳檔案", upload_to='manuals/', blank=True, db_index=True)
+    file_sha256 = models.CharField("檔案 SHA-256", max_length=64, blank=True, editable=False)
     is_pinned = models.BooleanField("是否置頂", default=False)
 
     # 加入時間戳記
     created_at = models.DateTimeField("建立時間", auto_now_add=True)
-    updated_at = models.DateTimeField("最後更新", auto_now=True)
+    updated_at = models.DateTimeField("最後更新", auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.doc_number} - {self.title}"
@@ -113,6 +114,12 @@ class SignalGuide(models.Model):
         verbose_name = '工作說明書'
         verbose_name_plural = '工作說明書列表'
         ordering = ['job_type', 'system', 'title']
+        # 列表依作業類別／置頂篩選後以文件編號排序；is_pinned 的查詢條件為布林欄位本身，以部分索引對應
+        indexes = [
+            models.Index(fields=['job_type', 'doc_number'], name='guide_type_doc_idx'),
+            models.Index(fields=['job_type', 'doc_number'], condition=models.Q(is_pinned=True), name='guide_type_pinned_doc_idx'),
+            models.Index(fields=['doc_number'], condition=models.Q(is_pinned=True), name='guide_pinned_doc_idx'),
+        ]
 
 # 設備模型（Device）
 class Device(models.Model):
@@ -121,7 +128,7 @@ class Device(models.Model):
     
     # 加入時間戳記
     created_at = models.DateTimeField("建立時間", auto_now_add=True)
-    updated_at = models.DateTimeField("最後更新", auto_now=True)
+    updated_at = models.DateTimeField("最後更新", auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -129,6 +136,8 @@ class Device(models.Model):
     class Meta:
         verbose_name = '設備'
         verbose_name_plural = '設備列表'
+        # 依說明書取設備，並供 ETag 計算該說明書設備的最後更新時間
+        indexes = [models.Index(fields=['guide', 'updated_at'], name='device_guide_updated_idx')]
 
 # 設備故障案例模型（FaultCase）
 class FaultCase(models.Model):
@@ -137,7 +146,7 @@ class FaultCase(models.Model):
 
     # 加入時間戳記
     created_at = models.DateTimeField("建立時間", auto_now_add=True)
-    updated_at = models.DateTimeField("最後更新", auto_now=True)
+    updated_at = models.DateTimeField("最後更新", auto_now=True, db_index=True)
 
     def __str__(self):
         return self.description[:30]
@@ -145,22 +154,66 @@ class FaultCase(models.Model):
     class Meta:
         verbose_name = '設備故障案例'
         verbose_name_plural = '設備故障案例列表'
+        # 依設備取故障案例，新到舊排序（與 cursor 分頁順序一致）
+        indexes = [models.Index(fields=['device', '-created_at', 'id'], name='faultcase_device_created_idx')]
 
 
 # 故障處理圖片模型（ProcedureStep）
 class ProcedureStep(models.Model):
     fault = models.ForeignKey(FaultCase, on_delete=models.CASCADE, related_name='steps')
-    file = models.FileField("步驟相關圖片或PDF", upload_to='procedure_files/')
+    file = models.FileField("步驟相關圖片或PDF", upload_to='procedure_files/', db_index=True)
+    file_sha256 = models.CharField("檔案 SHA-256", max_length=64, blank=True, editable=False)
     order = models.PositiveIntegerField("排序順序", default=0)  # 拖曳排序使用
+    renditions = models.JSONField("縮圖與預覽", default=dict, blank=True, editable=False)
 
     # 加入時間戳記
     created_at = models.DateTimeField("建立時間", auto_now_add=True)
-    updated_at = models.DateTimeField("最後更新", auto_now=True)
+    updated_at = models.DateTimeField("最後更新", auto_now=True, db_index=True)
 
     class Meta:
         ordering = ['order']  # 預設依照拖曳順序顯示
         verbose_name = '故障處理圖片'
         verbose_name_plural = '故障處理圖片列表'
+        # 依故障案例取步驟並依拖曳順序排序
+        indexes = [models.Index(fields=['fault', 'order', 'id'], name='step_fault_order_idx')]
 
     def __str__(self):
-        return f"步驟檔案 ID: {self.id}"
\ No newline at end of file
+        return f"步驟檔案 ID: {self.id}"
+
+# 刪除紀錄（DeletionLog）：供離線同步回傳已刪除資料的 tombstone
+class DeletionLog(models.Model):
+    model = models.CharField("資料表", max_length=50)
+    object_id = models.BigIntegerField("資料 ID")
+    deleted_at = models.DateTimeField("刪除時間", auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = '刪除紀錄'
+        verbose_name_plural = '刪除紀錄列表'
+        ordering = ['deleted_at']
+        indexes = [models.Index(fields=['model', 'deleted_at'], name='deletionlog_model_deleted_idx')]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}"
+
+# 效能剖析紀錄（RequestProfile）：帶剖析旗標的單一請求的結果，檔案存放於 PROFILING_ROOT（見 profiling.py）
+class RequestProfile(models.Model):
+    user = models.ForeignKey(CustomUser, verbose_name="使用者", on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    method = models.CharField("方法", max_length=10)
+    path = models.CharField("路徑", max_length=500)
+    view = models.CharField("URL 名稱", max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField("狀態碼", null=True)
+    duration_ms = models.FloatField("處理時間（毫秒）")
+    query_count = models.PositiveIntegerField("查詢次數", default=0)
+    query_ms = models.FloatField("查詢時間（毫秒）", default=0)
+    queries = models.JSONField("SQL", default=list, blank=True)
+    profile_file = models.CharField("cProfile 檔案", max_length=200, blank=True)
+    speedscope_file = models.CharField("speedscope 檔案", max_length=200, blank=True)
+    created_at = models.DateTimeField("建立時間", auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = '效能剖析紀錄'
+        verbose_name_plural = '效能剖析紀錄列表'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path}（{self.duration_ms:.0f} ms）"
@@ -0,0 +1,24 @@
+# signalguideapp/pagination.py
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+# 選用式游標分頁：只有帶 cursor 或 page_size 參數時才分頁，舊版 App 仍取得完整清單
+class OptInCursorPagination(CursorPagination):
+    page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+    unpaginated_value = 'all'  # ?page_size=all 供離線同步一次取回全部資料
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        if params.get(self.page_size_query_param) == self.unpaginated_value:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    # 各 ViewSet 以 cursor_ordering 指定排序欄位，第一個欄位須為唯一或近乎唯一
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
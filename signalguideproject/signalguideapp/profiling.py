@@ -0,0 +1,202 @@
+# signalguideapp/profiling.py
+# 單一請求的效能剖析：PROFILING_ENABLED 開啟時，A 角色使用者在請求加上 X-Profile: 1 標頭或 ?_profile=1，
+# ProfilingMiddleware 即以 cProfile 剖析該次 view 的執行（含 DRF 驗證、查詢與回應 render），同時記錄所有 SQL，
+# 並以另一執行緒每 PROFILING_SAMPLE_INTERVAL 秒取樣一次呼叫堆疊，產生 speedscope（https://www.speedscope.app/）火焰圖。
+# 結果存為 RequestProfile 紀錄（Django admin 可下載 .prof 與 .speedscope.json），回應帶 X-Profile-Id 標頭。
+# 未帶旗標的請求只多一次標頭／參數檢查；未開啟時 middleware 不載入。
+# cProfile 同一時間只能有一個在執行，同一 process 內一次只剖析一個請求，其他帶旗標的請求照常處理不剖析。
+import cProfile
+import json
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connections
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from .authentication import ClaimsJWTAuthentication
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+QUERY_PARAM = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+SAMPLE_INTERVAL = getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.001)
+KEEP = getattr(settings, 'PROFILING_KEEP', 200)  # 保留最近幾筆紀錄，較舊的連同檔案刪除
+MAX_QUERIES = 1000  # 每筆紀錄最多保存的 SQL 數
+
+_lock = threading.Lock()
+
+
+# 剖析檔不放在 MEDIA_ROOT（內含 SQL 與程式路徑）
+def get_storage():
+    return FileSystemStorage(location=getattr(settings, 'PROFILING_ROOT', os.path.join(settings.BASE_DIR, 'profiles')))
+
+
+def requested(request):
+    return request.META.get(HEADER) == '1' or request.GET.get(QUERY_PARAM) == '1'
+
+
+# 只允許 A 角色：已登入後台（session）的使用者，或帶有效 JWT 的 App 使用者
+def allowed(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = ClaimsJWTAuthentication().authenticate(Request(request))
+        except APIException:
+            return None
+        user = result[0] if result else None
+    if user is None or getattr(user, 'role', None) != 'A':
+        return None
+    return user
+
+
+class QueryLog:
+    """connection.execute_wrapper：記錄每條 SQL 與耗時（毫秒）。"""
+
+    def __init__(self):
+        self.queries = []
+        self.total_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.total_ms += elapsed
+            self.queries.append({'sql': sql, 'ms': round(elapsed, 3), 'many': many})
+
+
+class StackSampler:
+    """以背景執行緒定期取樣目標執行緒的呼叫堆疊（只取 root 以下的部分），輸出 speedscope 的 sampled profile。"""
+
+    def __init__(self, root, interval=SAMPLE_INTERVAL):
+        self.root = root
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        self.frames = {}   # (名稱, 檔案, 行號) → 索引
+        self.samples = []  # (時間, [frame 索引，由外而內])
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.end_time = time.perf_counter()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root:
+                code = frame.f_code
+                key = (getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno)
+                stack.append(self.frames.setdefault(key, len(self.frames)))
+                frame = frame.f_back
+            if frame is self.root:  # 目標執行緒已離開 view 時不計
+                stack.reverse()
+                self.samples.append((time.perf_counter(), stack))
+
+    def speedscope(self, name):
+        weights, previous = [], self.start_time
+        for timestamp, stack in self.samples:
+            weights.append(round((timestamp - previous) * 1000, 3))
+            previous = timestamp
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'signalguideapp.profiling',
+            'shared': {'frames': [{'name': n, 'file': f, 'line': line} for n, f, line in self.frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': round((self.end_time - self.start_time) * 1000, 3),
+                'samples': [stack for timestamp, stack in self.samples],
+                'weights': weights,
+            }],
+        }
+
+
+# 剖析 view 的執行並儲存結果；回傳已 render 的回應。非 A 角色或已有其他請求在剖析時回傳 None（照常處理）
+def profile_view(request, view_func, args, kwargs):
+    user = allowed(request)
+    if user is None or not _lock.acquire(blocking=False):
+        return None
+    try:
+        query_log = QueryLog()
+        profiler = cProfile.Profile()
+        sampler = StackSampler(sys._getframe())
+        response = None
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(query_log))
+                profiler.enable()
+                sampler.start()
+                try:
+                    response = view_func(request, *args, **kwargs)
+                    if callable(getattr(response, 'render', None)):
+                        response = response.render()
+                finally:
+                    sampler.stop()
+                    profiler.disable()
+        finally:
+            record = save(request, user, response, time.perf_counter() - start, profiler, sampler, query_log)
+    finally:
+        _lock.release()
+    if record is not None:
+        response['X-Profile-Id'] = str(record.pk)
+    return response
+
+
+def save(request, user, response, duration, profiler, sampler, query_log):
+    match = getattr(request, 'resolver_match', None)
+    name = f'{request.method} {request.path}'
+    base = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+    try:
+        storage = get_storage()
+        stats = pstats.Stats(profiler)
+        profile_file = storage.save(f'{base}.prof', ContentFile(marshal.dumps(stats.stats)))
+        speedscope_file = storage.save(f'{base}.speedscope.json', ContentFile(json.dumps(sampler.speedscope(name)).encode()))
+        record = RequestProfile.objects.create(
+            user_id=user.pk,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view=((match.url_name or match.route) if match else '')[:200],
+            status_code=response.status_code if response is not None else None,
+            duration_ms=round(duration * 1000, 3),
+            query_count=len(query_log.queries),
+            query_ms=round(query_log.total_ms, 3),
+            queries=query_log.queries[:MAX_QUERIES],
+            profile_file=profile_file,
+            speedscope_file=speedscope_file,
+        )
+        for old in RequestProfile.objects.all()[KEEP:]:
+            old.delete()
+    except Exception:  # 剖析結果存檔失敗不影響原本的回應
+        logger.exception('無法儲存 %s 的效能剖析結果', name)
+        return None
+    return record
+
+
+def delete_files(record):
+    storage = get_storage()
+    for name in (record.profile_file, record.speedscope_file):
+        if name and storage.exists(name):
+            storage.delete(name)
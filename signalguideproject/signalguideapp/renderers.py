@@ -0,0 +1,57 @@
+# signalguideapp/renderers.py
+# MessagePack 格式（需安裝 msgpack）：以 Accept: application/msgpack 或 ?format=msgpack 取得，
+# 寫入時可用 Content-Type: application/msgpack 傳送。
+# ORJSONRenderer 供大量列表的快速路徑使用（見 fastlist.py），輸出與 JSONRenderer 相同。
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True, datetime=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, timestamp=3)
+        except Exception as exc:
+            raise ParseError(f'MessagePack 格式錯誤：{exc}')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """以 orjson 編碼、位元組與 JSONRenderer 相同；要求縮排、非精簡格式或 orjson 無法處理的資料時交回 JSONRenderer。"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact \
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # 日期時間交給 DRF 的 encoder，格式（UTC 以 Z 結尾）與 JSONRenderer 一致
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:  # 超過 64 位元的整數、非字串鍵等
+            return super().render(data, accepted_media_type, renderer_context)
+        # 與 JSONRenderer 相同，跳脫 JavaScript 不允許出現在字串內的 U+2028／U+2029
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
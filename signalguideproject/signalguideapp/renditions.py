@@ -0,0 +1,126 @@
+# signalguideapp/renditions.py
+# 處理步驟檔案的縮圖：上傳後於背景執行緒產生多種尺寸的 JPEG / WebP，PDF 另產生第一頁 PNG 預覽，
+# 存放在原檔旁（例如 blobs/ab/cd/<sha256>.small.webp）。
+# 需要 Pillow；PDF 預覽需要 PyMuPDF，未安裝時略過該類檔案。
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover
+    Image = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # pragma: no cover
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+RENDITION_SIZES = getattr(settings, 'RENDITION_SIZES', {'thumb': 160, 'small': 480, 'medium': 1024})
+RENDITION_FORMATS = (('jpg', 'JPEG', {'quality': 80, 'optimize': True}), ('webp', 'WEBP', {'quality': 75}))
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+PDF_PREVIEW_WIDTH = 1024
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'RENDITION_WORKERS', 2), thread_name_prefix='renditions'
+        )
+    return _executor
+
+
+def _save(storage, name, image, fmt, options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def _pdf_first_page(fieldfile):
+    try:
+        document = fitz.open(fieldfile.path)  # 本機儲存直接開檔，不需整份讀進記憶體
+    except NotImplementedError:
+        with fieldfile.open('rb') as file:
+            document = fitz.open(stream=file.read(), filetype='pdf')
+    try:
+        page = document[0]
+        zoom = PDF_PREVIEW_WIDTH / page.rect.width
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return Image.open(io.BytesIO(pixmap.tobytes('png')))
+    finally:
+        document.close()
+
+
+# 產生縮圖並回傳 {"small_webp": 儲存路徑, ...}；不支援的檔案類型回傳空 dict
+def build_renditions(fieldfile):
+    if Image is None or not fieldfile:
+        return {}
+    storage = fieldfile.storage
+    base, ext = os.path.splitext(fieldfile.name)
+    ext = ext.lower()
+    renditions = {}
+
+    if ext == '.pdf':
+        if fitz is None:
+            return {}
+        source = _pdf_first_page(fieldfile)
+        renditions['preview_png'] = _save(storage, f'{base}.preview.png', source, 'PNG', {'optimize': True})
+    elif ext in IMAGE_EXTENSIONS:
+        with fieldfile.open('rb') as file:
+            source = Image.open(file)
+            source.load()
+        source = ImageOps.exif_transpose(source)
+    else:
+        return {}
+
+    source = source.convert('RGB')
+    for label, size in RENDITION_SIZES.items():
+        image = source.copy()
+        image.thumbnail((size, size))
+        for ext_name, fmt, options in RENDITION_FORMATS:
+            renditions[f'{label}_{ext_name}'] = _save(storage, f'{base}.{label}.{ext_name}', image, fmt, options)
+    return renditions
+
+
+def process_step(step_id):
+    from .models import ProcedureStep
+    from .signals import bulk_saved
+
+    step = ProcedureStep.objects.filter(pk=step_id).first()
+    if step is None:
+        return
+    try:
+        renditions = build_renditions(step.file)
+    except Exception:
+        logger.exception('產生縮圖失敗：步驟 %s', step_id)
+        return
+    # 以 update 寫回（檔案在處理期間被換掉時不覆蓋），避免再次觸發 post_save
+    updated_at = timezone.now()
+    ProcedureStep.objects.filter(pk=step_id, file=step.file.name).update(renditions=renditions, updated_at=updated_at)
+    step.renditions, step.updated_at = renditions, updated_at
+    bulk_saved(ProcedureStep, [step])
+
+
+def _run_in_worker(step_id):
+    try:
+        process_step(step_id)
+    finally:
+        connection.close()  # 背景執行緒各自持有資料庫連線，用完即關閉
+
+
+# 交易提交後排入背景執行緒；RENDITIONS_ASYNC = False 時直接同步執行（測試與管理指令使用）
+def schedule(step_id):
+    if getattr(settings, 'RENDITIONS_ASYNC', True):
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, step_id))
+    else:
+        process_step(step_id)
@@ -0,0 +1,145 @@
+# signalguideapp/search.py
+# 全文檢索：使用 SQLite FTS5 虛擬資料表，中文以二字詞（bigram）切詞後寫入索引
+import re
+from django.db import connection
+from django.db.models import Q
+from .models import SignalGuide, Device, FaultCase
+
+SEARCH_TABLE = 'signalguideapp_searchindex'
+
+# rowid = 物件 ID * 4 + 類別代碼，更新與刪除時可直接以 rowid 定位
+KIND_CODES = {'guide': 1, 'device': 2, 'faultcase': 3}
+KIND_NAMES = {code: kind for kind, code in KIND_CODES.items()}
+MODEL_KINDS = {SignalGuide: 'guide', Device: 'device', FaultCase: 'faultcase'}
+
+CJK_CHARS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+TOKEN_PATTERN = re.compile(rf'([{CJK_CHARS}]+)|([^\W_{CJK_CHARS}]+)')
+
+_available = None
+
+
+# 中文連續字元切成二字詞，英數字以小寫單字處理
+def tokenize(text):
+    tokens = []
+    for cjk, word in TOKEN_PATTERN.findall(text or ''):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        else:
+            tokens.append(word.lower())
+    return tokens
+
+
+# 將使用者輸入轉為 FTS5 查詢：每個以空白分隔的詞為一個片語（前綴比對），詞與詞之間為 AND
+def build_match_query(q):
+    phrases = []
+    for term in (q or '').split():
+        tokens = tokenize(term)
+        if tokens:
+            phrases.append('"%s" *' % ' '.join(tokens))
+    return ' '.join(phrases)
+
+
+# 僅 SQLite 且已執行 migration 建立 FTS5 資料表時可用；結果只計算一次
+def is_available():
+    global _available
+    if _available is None:
+        _available = connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names()
+    return _available
+
+
+def _document(obj):
+    if isinstance(obj, SignalGuide):
+        return 'guide', obj.id, obj.title, ' '.join([obj.doc_number, obj.system, obj.subsystem, obj.equipment_type])
+    if isinstance(obj, Device):
+        return 'device', obj.guide_id, obj.name, ''
+    return 'faultcase', obj.device.guide_id, '', obj.description
+
+
+# 只由類別與 ID 計算，不讀取關聯（連帶刪除時不會逐筆查詢上層資料）
+def _rowid(obj):
+    return obj.pk * 4 + KIND_CODES[MODEL_KINDS[type(obj)]]
+
+
+def _row(obj):
+    kind, guide_id, title, body = _document(obj)
+    return (
+        _rowid(obj),
+        guide_id,
+        ' '.join(tokenize(title)),
+        ' '.join(tokenize(body)),
+    )
+
+
+def index_objects(objs):
+    rows = [_row(obj) for obj in objs]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, guide_id, title, body) VALUES (%s, %s, %s, %s)', rows
+        )
+
+
+def remove_object(obj):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [_rowid(obj)])
+
+
+# 重建整個索引，回傳寫入筆數
+def rebuild(batch_size=2000):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    total = 0
+    for queryset in (SignalGuide.objects.all(), Device.objects.all(), FaultCase.objects.select_related('device')):
+        batch = []
+        for obj in queryset.order_by().iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index_objects(batch)
+                total += len(batch)
+                batch = []
+        index_objects(batch)
+        total += len(batch)
+    return total
+
+
+# 搜尋並依 bm25 排序（標題權重較高），回傳 (總筆數, [(類別, ID, 分數)])
+def search(q, limit=20, offset=0):
+    match = build_match_query(q)
+    if not match:
+        return 0, []
+    if not is_available():
+        return _search_fallback(q, limit, offset)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match])
+        count = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT rowid, bm25({SEARCH_TABLE}, 0.0, 2.0, 1.0) AS score FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s ORDER BY score LIMIT %s OFFSET %s',
+            [match, limit, offset],
+        )
+        hits = [(KIND_NAMES[rowid % 4], rowid // 4, -score) for rowid, score in cursor.fetchall()]
+    return count, hits
+
+
+# 非 SQLite 資料庫時退回 icontains 查詢（不排序）
+def _search_fallback(q, limit, offset):
+    terms = q.split()
+    hits = []
+    for kind, queryset, fields in (
+        ('guide', SignalGuide.objects.all(), ('title', 'doc_number')),
+        ('device', Device.objects.all(), ('name',)),
+        ('faultcase', FaultCase.objects.all(), ('description',)),
+    ):
+        for term in terms:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        hits.extend((kind, pk, 0.0) for pk in queryset.order_by('id').values_list('id', flat=True))
+    return len(hits), hits[offset:offset + limit]
@@ -0,0 +1,124 @@
+# signalguideapp/seeding.py
+# 效能測試用的合成資料：依指定規模產生作業類別、中文說明書、設備、故障案例、處理步驟與測試帳號，
+# 經 CatalogueImporter 以 bulk_create 分批寫入（同時更新全文檢索索引與回應快取版本號）。
+# 以固定亂數種子產生，相同參數得到相同資料；文件編號固定為 SEED-000001 起，重複執行時更新既有說明書而非重複新增。
+# 處理步驟的檔案為少量小型 PNG／PDF（內容各不相同），多個步驟共用，與實際上傳的圖片相比只測量 API 本身的成本。
+import random
+import struct
+import zlib
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from .catalogue import CatalogueImporter
+from .models import CustomUser
+
+DOC_PREFIX = 'SEED-'
+VIEWER_ID_START = 80001  # 查詢者帳號 80001 起
+ADMIN_ID_START = 89001   # 管理者帳號 89001 起
+
+JOB_TYPES = ['轉轍器', '號誌機', '軌道電路', '計軸器', '電子聯鎖', '列車自動防護', '平交道', '電源設備', '通訊傳輸', '行車控制']
+SYSTEMS = ['號誌', '聯鎖', '列車控制', '電力', '通訊']
+SUBSYSTEMS = ['車站設備', '路線設備', '機房設備', '中央控制', '沿線設備']
+EQUIPMENT_TYPES = ['電動轉轍機', '色燈號誌機', '音頻軌道電路', '計軸主機', '聯鎖主機', '不斷電系統', '應答器', '遮斷器']
+DEPARTMENTS = ['號誌一股', '號誌二股', '號誌三股', '電務段', '維修中心']
+SURNAMES = '陳林黃張李王吳劉蔡楊許鄭謝郭洪'
+GIVEN_NAMES = ['志明', '俊傑', '淑芬', '家豪', '雅婷', '建宏', '怡君', '冠宇', '美玲', '宗翰']
+TITLE_ACTIONS = ['故障排除作業說明', '定期檢修作業程序', '緊急應變處理程序', '更換作業說明', '功能測試程序']
+DEVICES = ['轉轍機', '控制電路', '表示電路', '繼電器架', '電源供應器', '信號燈具', '軌道繼電器', '計軸感應器', '通訊介面板', '斷路器']
+SYMPTOMS = ['無表示', '轉換不良', '燈號熄滅', '軌道佔用不能解除', '電壓異常', '通訊中斷', '誤動作', '過載跳脫', '接點接觸不良', '警報持續']
+CONDITIONS = ['雨天時', '列車通過後', '開機時', '夜間', '轉換過程中', '切換備援後']
+
+
+def _person(rng):
+    return rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES)
+
+
+# 平均為 mean 的隨機數量（1 ~ 2 * mean - 1），讓各說明書的規模不完全相同
+def _count(rng, mean):
+    return rng.randint(1, 2 * mean - 1) if mean > 1 else mean
+
+
+def job_type_names(count):
+    return [JOB_TYPES[i] if i < len(JOB_TYPES) else f'{JOB_TYPES[i % len(JOB_TYPES)]}（{i // len(JOB_TYPES) + 1}）'
+            for i in range(count)]
+
+
+# 1x1 的 PNG，顏色由 index 決定，不需要 Pillow
+def _png(index):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    pixel = bytes([0, index % 256, index // 256 % 256, 128])
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(pixel)) + chunk(b'IEND', b''))
+
+
+def _pdf(index):
+    return (f'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+            f'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+            f'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 200 200]>>endobj\n'
+            f'trailer<</Root 1 0 R>>\n%seed-{index}\n%%EOF\n').encode()
+
+
+# 寫入 count 個測試檔案（約四分之一為 PDF），回傳儲存後的檔名
+def dummy_files(count, storage=default_storage):
+    names = []
+    for index in range(count):
+        if index % 4 == 3:
+            names.append(storage.save(f'procedure_files/seed-{index}.pdf', ContentFile(_pdf(index))))
+        else:
+            names.append(storage.save(f'procedure_files/seed-{index}.png', ContentFile(_png(index))))
+    return names
+
+
+# 產生 CatalogueImporter 格式的說明書紀錄
+def generate_records(rng, job_types, guides, devices_per_guide, faults_per_device, steps_per_fault, files):
+    for index in range(1, guides + 1):
+        equipment = rng.choice(EQUIPMENT_TYPES)
+        yield {
+            'doc_number': f'{DOC_PREFIX}{index:06d}',
+            'title': f'{equipment}{rng.choice(TITLE_ACTIONS)}（第 {index} 號）',
+            'system': rng.choice(SYSTEMS),
+            'subsystem': rng.choice(SUBSYSTEMS),
+            'equipment_type': equipment,
+            'department': rng.choice(DEPARTMENTS),
+            'owner': _person(rng),
+            'is_pinned': rng.random() < 0.05,
+            'job_type': rng.choice(job_types),
+            'file': '',
+            'devices': [
+                {
+                    'name': f'{rng.choice(DEVICES)} {d + 1:02d}',
+                    'faults': [
+                        {
+                            'description': f'{rng.choice(CONDITIONS)}{rng.choice(SYMPTOMS)}，請依步驟檢查{rng.choice(DEVICES)}。',
+                            'steps': [{'order': o, 'file': rng.choice(files)} for o in range(1, _count(rng, steps_per_fault) + 1)]
+                            if files else [],
+                        }
+                        for _ in range(_count(rng, faults_per_device))
+                    ],
+                }
+                for d in range(_count(rng, devices_per_guide))
+            ],
+        }
+
+
+# 測試帳號：密碼只雜湊一次，以 bulk_create 建立，已存在的帳號略過
+def create_users(viewers, admins, password):
+    encoded = make_password(password)
+    users = [CustomUser(employee_id=f'{VIEWER_ID_START + i:05d}', name=f'測試查詢者 {i + 1}', role='B', password=encoded)
+             for i in range(viewers)]
+    users += [CustomUser(employee_id=f'{ADMIN_ID_START + i:05d}', name=f'測試管理者 {i + 1}', role='A', password=encoded)
+              for i in range(admins)]
+    CustomUser.objects.bulk_create(users, ignore_conflicts=True)
+    return users
+
+
+def seed(job_types=5, guides=200, devices_per_guide=3, faults_per_device=3, steps_per_fault=2, files=20,
+         viewers=20, admins=2, password='bench1234', random_seed=0, batch_size=500):
+    rng = random.Random(random_seed)
+    names = dummy_files(files)
+    records = generate_records(rng, job_type_names(job_types), guides, devices_per_guide, faults_per_device, steps_per_fault, names)
+    stats = CatalogueImporter(batch_size=batch_size).run(records)
+    create_users(viewers, admins, password)
+    stats.update(files=len(names), viewers=viewers, admins=admins)
+    return stats
@@ -3,14 +3,41 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import SignalGuide, JobType, Device, FaultCase, ProcedureStep
 
+# 稀疏欄位：GET 時可用 ?fields=id,title 只回傳指定欄位，或 ?omit=file 排除欄位（僅作用於最外層）
+class SparseFieldsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        params = getattr(request, 'query_params', request.GET)
+        fields = params.get('fields')
+        omit = params.get('omit')
+        if fields:
+            keep = set(fields.split(','))
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+        if omit:
+            for name in omit.split(','):
+                self.fields.pop(name, None)
+
+
 # SignalGuide 序列化器
-class SignalGuideSerializer(serializers.ModelSerializer):
-    job_type_display = serializers.CharField(source='job_type.name', read_only=True)
-    job_type_name = serializers.CharField(source='job_type.name', read_only=True)  # ← 加這行
+# file_sha256 不輸出：下載時才補算且不更新 updated_at，列表快取、ETag 與快照會一直送出舊值；
+# 用戶端改以檔案下載的 ETag 或快照 manifest 的 media 取得雜湊
+class SignalGuideSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    job_type_name = serializers.CharField(source='job_type.name', read_only=True)
 
     class Meta:
         model = SignalGuide
-        fields = '__all__'
+        exclude = ['file_sha256']
+
+# 目錄列表用的精簡版（?summary=true）：只含列表畫面需要的欄位
+class SignalGuideListSerializer(SignalGuideSerializer):
+    class Meta:
+        model = SignalGuide
+        fields = ['id', 'doc_number', 'title', 'system', 'job_type', 'job_type_name', 'is_pinned', 'updated_at']
 
 # 自訂登入序列化器：加入 name、role、employee_id
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -30,26 +57,54 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 # JobType 序列化器
-class JobTypeSerializer(serializers.ModelSerializer):
+class JobTypeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = JobType
         fields = ['id', 'name']
 
 # Device 序列化器
-class DeviceSerializer(serializers.ModelSerializer):
+class DeviceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Device
         fields = '__all__'
 
 # FaultCase 序列化器
-class FaultCaseSerializer(serializers.ModelSerializer):
+class FaultCaseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = FaultCase
         fields = '__all__'
 
 # ProcedureStep 序列化器
-class ProcedureStepSerializer(serializers.ModelSerializer):
+class ProcedureStepSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    renditions = serializers.SerializerMethodField()  # 縮圖網址，例如 {"small_webp": "http://.../abc.small.webp"}
+
     class Meta:
         model = ProcedureStep
+        exclude = ['file_sha256']  # 同 SignalGuideSerializer
+
+    def get_renditions(self, obj):
+        request = self.context.get('request')
+        storage = obj.file.storage
+        urls = {}
+        for label, name in (obj.renditions or {}).items():
+            url = storage.url(name)
+            urls[label] = request.build_absolute_uri(url) if request else url
+        return urls
+
+# 整本說明書巢狀序列化器（guide → devices → faults → steps），供離線一次下載
+class FaultCaseBundleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    steps = ProcedureStepSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = FaultCase
         fields = '__all__'
-        
\ No newline at end of file
+
+class DeviceBundleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    faults = FaultCaseBundleSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Device
+        fields = '__all__'
+
+class SignalGuideBundleSerializer(SignalGuideSerializer):
+    devices = DeviceBundleSerializer(many=True, read_only=True)
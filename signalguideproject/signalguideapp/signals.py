@@ -0,0 +1,147 @@
+# signalguideapp/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_delete, post_delete, pre_save, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .cache import bump_generation
+from . import search
+from .media import sha256_of
+from . import renditions
+from . import snapshots
+from . import events
+from . import profiling
+from .authentication import forget_user_state
+from .models import CustomUser, JobType, SignalGuide, Device, FaultCase, ProcedureStep, DeletionLog, RequestProfile
+
+# 需要同步給離線 App 的資料表
+SYNC_MODELS = (JobType, SignalGuide, Device, FaultCase, ProcedureStep)
+
+
+# 新上傳的檔案在寫入前計算 SHA-256，作為下載時的強 ETag；雜湊附在上傳內容上，內容定址儲存不必再算一次
+# （BulkWriteMixin.bulk_update 也會直接呼叫）
+@receiver(pre_save, sender=SignalGuide)
+@receiver(pre_save, sender=ProcedureStep)
+def hash_uploaded_file(sender, instance, **kwargs):
+    if not instance.file:
+        instance.file_sha256 = ''
+    elif not instance.file._committed:
+        instance.file_sha256 = sha256_of(instance.file)
+        instance.file.file.sha256 = instance.file_sha256
+        instance._file_uploaded = True
+        if instance.pk:
+            # 換檔時舊檔可能已無人引用，提交後釋放
+            old_name = sender.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+            if old_name:
+                release_file(instance.file.storage, old_name)
+
+
+# 內容定址儲存的檔案由多筆資料共用，提交後依引用數決定是否刪除實體檔案
+def release_file(storage, name):
+    if hasattr(storage, 'release'):
+        transaction.on_commit(lambda: storage.release(name))
+
+
+@receiver(post_delete, sender=SignalGuide)
+@receiver(post_delete, sender=ProcedureStep)
+def release_deleted_file(sender, instance, **kwargs):
+    if instance.file:
+        release_file(instance.file.storage, instance.file.name)
+
+
+# 處理步驟上傳新檔案後，於背景產生縮圖
+@receiver(post_save, sender=ProcedureStep)
+def schedule_renditions(sender, instance, **kwargs):
+    if getattr(instance, '_file_uploaded', False):
+        instance._file_uploaded = False
+        renditions.schedule(instance.pk)
+
+
+# 帳號異動（停用、調整角色、刪除）時清除驗證用的帳號狀態快取
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user_state(sender, instance, **kwargs):
+    forget_user_state(instance.pk)
+
+
+# 刪除作業類別時，說明書的 job_type 會被 SET_NULL（不會更新 updated_at），先標記為已變更
+@receiver(pre_delete, sender=JobType)
+def touch_guides_of_deleted_job_type(sender, instance, **kwargs):
+    instance.guides.update(updated_at=timezone.now())
+
+
+# 刪除效能剖析紀錄時一併刪除剖析檔
+@receiver(post_delete, sender=RequestProfile)
+def delete_profile_files(sender, instance, **kwargs):
+    profiling.delete_files(instance)
+
+
+# 每筆刪除（含 CASCADE 連帶刪除）都寫入刪除紀錄
+def log_deletion(sender, instance, **kwargs):
+    DeletionLog.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+for model in SYNC_MODELS:
+    post_delete.connect(log_deletion, sender=model, dispatch_uid=f'log_deletion_{model._meta.model_name}')
+
+
+# 資料異動提交後遞增該資料表的快取版本號，讓相關的回應快取失效；
+# 提交前遞增時，同時間的讀取會把未提交前的資料存到新版本號底下
+def bump_cache_generation(sender, **kwargs):
+    transaction.on_commit(lambda: bump_generation(sender._meta.model_name))
+
+
+for model in SYNC_MODELS:
+    post_save.connect(bump_cache_generation, sender=model, dispatch_uid=f'bump_cache_save_{model._meta.model_name}')
+    post_delete.connect(bump_cache_generation, sender=model, dispatch_uid=f'bump_cache_delete_{model._meta.model_name}')
+
+
+# 資料異動後於背景重建離線快照（只重建內容有變的作業類別）
+def schedule_snapshot_rebuild(sender, **kwargs):
+    snapshots.schedule()
+
+
+for model in SYNC_MODELS:
+    post_save.connect(schedule_snapshot_rebuild, sender=model, dispatch_uid=f'snapshot_save_{model._meta.model_name}')
+    post_delete.connect(schedule_snapshot_rebuild, sender=model, dispatch_uid=f'snapshot_delete_{model._meta.model_name}')
+
+
+# 資料異動推播（/api/events/），交易提交後送出
+def publish_saved(sender, instance, **kwargs):
+    events.emit([instance], 'save')
+
+
+def publish_deleted(sender, instance, **kwargs):
+    events.emit([instance], 'delete')
+
+
+for model in SYNC_MODELS:
+    post_save.connect(publish_saved, sender=model, dispatch_uid=f'events_save_{model._meta.model_name}')
+    post_delete.connect(publish_deleted, sender=model, dispatch_uid=f'events_delete_{model._meta.model_name}')
+
+
+# 全文檢索索引同步
+@receiver(post_save, sender=SignalGuide)
+@receiver(post_save, sender=Device)
+@receiver(post_save, sender=FaultCase)
+def update_search_index(sender, instance, **kwargs):
+    if search.is_available():
+        search.index_objects([instance])
+
+
+@receiver(post_delete, sender=SignalGuide)
+@receiver(post_delete, sender=Device)
+@receiver(post_delete, sender=FaultCase)
+def remove_from_search_index(sender, instance, **kwargs):
+    if search.is_available():
+        search.remove_object(instance)
+
+
+# bulk_create／bulk_update 不會觸發 post_save，批次寫入後呼叫以同步快取版本號、全文檢索索引、離線快照與異動推播
+SEARCHABLE_MODELS = (SignalGuide, Device, FaultCase)
+
+def bulk_saved(model, objs):
+    transaction.on_commit(lambda: bump_generation(model._meta.model_name))
+    snapshots.schedule()
+    events.emit(objs, 'save')
+    if model in SEARCHABLE_MODELS and search.is_available():
+        search.index_objects(objs)
@@ -0,0 +1,191 @@
+# signalguideapp/snapshots.py
+# 離線快照：每個作業類別一個 gzip 壓縮的 JSONL 檔，平板一次下載即可建立完整的離線目錄，伺服器不必逐筆序列化。
+#   第 1 行　manifest：格式版本、作業類別、同步時間點（之後可接 /sync/?since=）、各資料表筆數、媒體檔 SHA-256
+#   其餘各行 {"model": "signal_guides", "data": {...}}，data 與同步 API 的格式相同（檔案網址為相對路徑）
+# 快照版本為相關資料的指紋（各資料表筆數與最後更新時間），檔名含版本；資料異動後只重建指紋改變的作業類別，
+# 下載時若快照過期則先重建，因此永遠不會送出舊資料。
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.utils import timezone
+from .conditional import queryset_fingerprint, make_validators
+from .media import sha256_of
+from .models import JobType, SignalGuide, Device, FaultCase, ProcedureStep
+from .serializers import JobTypeSerializer, SignalGuideSerializer, DeviceSerializer, FaultCaseSerializer, ProcedureStepSerializer
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1  # 內容格式變更時遞增，舊快照會全部重建
+CHUNK_SIZE = 500
+
+_executor = None
+_pending = threading.Event()
+
+
+# 快照不放在 MEDIA_ROOT，避免被當成公開媒體檔直接送出
+def get_storage():
+    return FileSystemStorage(location=getattr(settings, 'SNAPSHOT_ROOT', os.path.join(settings.BASE_DIR, 'snapshots')))
+
+
+# 作業類別底下的各資料表，依 manifest／App 寫入順序排列（父資料在前）
+def sources(job_type_id):
+    return (
+        ('jobtypes', JobType.objects.filter(pk=job_type_id), JobTypeSerializer, ()),
+        ('signal_guides', SignalGuide.objects.filter(job_type_id=job_type_id).select_related('job_type'),
+         SignalGuideSerializer, ('job_type__updated_at',)),
+        ('devices', Device.objects.filter(guide__job_type_id=job_type_id), DeviceSerializer, ()),
+        ('faultcases', FaultCase.objects.filter(device__guide__job_type_id=job_type_id), FaultCaseSerializer, ()),
+        ('steps', ProcedureStep.objects.filter(fault__device__guide__job_type_id=job_type_id), ProcedureStepSerializer, ()),
+    )
+
+
+# (版本, 最後修改時間)：與條件式 GET 相同的指紋，另加入格式版本。
+# 刪除紀錄不分作業類別，不納入指紋；刪除會讓該作業類別的筆數減少，已足以改變版本
+def snapshot_version(job_type_id):
+    fingerprints = [(SNAPSHOT_FORMAT, [])]
+    for key, queryset, serializer_class, related_fields in sources(job_type_id):
+        fingerprints.append(queryset_fingerprint(queryset, related_fields))
+    etag, last_modified = make_validators(fingerprints)
+    return etag[3:-1], last_modified  # W/"<md5>" → <md5>
+
+
+def snapshot_name(job_type_id, version):
+    return f'jobtype-{job_type_id}-{version}.jsonl.gz'
+
+
+# 媒體檔清單 {路徑: SHA-256}；舊資料尚未計算雜湊者補算並存回資料表（不更新 updated_at，不影響快照版本）
+def media_digests(job_type_id):
+    digests = {}
+    for model, queryset in (
+        (SignalGuide, SignalGuide.objects.filter(job_type_id=job_type_id)),
+        (ProcedureStep, ProcedureStep.objects.filter(fault__device__guide__job_type_id=job_type_id)),
+    ):
+        storage = model._meta.get_field('file').storage
+        for pk, name, digest in queryset.exclude(file='').values_list('pk', 'file', 'file_sha256').iterator(chunk_size=CHUNK_SIZE):
+            if not digest:
+                if not storage.exists(name):
+                    continue
+                with storage.open(name, 'rb') as file:
+                    digest = sha256_of(file)
+                model.objects.filter(pk=pk).update(file_sha256=digest)
+            digests[name] = digest
+    return dict(sorted(digests.items()))
+
+
+# 同步時間點：updated_at 在儲存時決定，交易較晚提交的資料 updated_at 會早於提交時間，
+# 因此往前扣除 SYNC_WATERMARK_MARGIN 秒（須大於最長的寫入交易），下次同步重送這段期間的資料，不會遺漏
+def sync_watermark():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'SYNC_WATERMARK_MARGIN', 300))
+
+
+def write_snapshot(job_type_id, stream):
+    watermark = sync_watermark()  # 先取得同步時間點再查詢，同 /sync/
+    counts = {key: queryset.count() for key, queryset, _, _ in sources(job_type_id)}
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'job_type': job_type_id,
+        'watermark': watermark.isoformat(),
+        'counts': counts,
+        'media': media_digests(job_type_id),
+    }
+    stream.write(json.dumps(manifest, ensure_ascii=False) + '\n')
+    for key, queryset, serializer_class, _ in sources(job_type_id):
+        serializer = serializer_class(context={})
+        for obj in queryset.order_by('id').iterator(chunk_size=CHUNK_SIZE):
+            stream.write(json.dumps({'model': key, 'data': serializer.to_representation(obj)}, ensure_ascii=False) + '\n')
+    return counts
+
+
+# 寫入暫存檔後以 rename 替換，下載中的舊版本不受影響；gzip 標頭不含時間，同樣內容產生相同位元組
+def build(job_type_id, version):
+    storage = get_storage()
+    name = snapshot_name(job_type_id, version)
+    os.makedirs(storage.location, exist_ok=True)
+    tmp_path = storage.path(f'.{name}.{os.getpid()}-{threading.get_ident()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as compressed, \
+                io.TextIOWrapper(compressed, encoding='utf-8') as stream:
+            write_snapshot(job_type_id, stream)
+        os.replace(tmp_path, storage.path(name))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    remove_old(job_type_id, keep=name)
+    return name
+
+
+def remove_old(job_type_id, keep=None):
+    storage = get_storage()
+    if not storage.exists(''):
+        return
+    prefix = f'jobtype-{job_type_id}-'
+    for filename in storage.listdir('')[1]:
+        if filename.startswith(prefix) and filename != keep:
+            storage.delete(filename)
+
+
+# 取得最新快照（過期則先重建），回傳 (檔名, 版本, 最後修改時間)
+def get_snapshot(job_type_id):
+    version, last_modified = snapshot_version(job_type_id)
+    name = snapshot_name(job_type_id, version)
+    if not get_storage().exists(name):
+        build(job_type_id, version)
+    return name, version, last_modified
+
+
+# 重建所有指紋已改變的快照，並移除已刪除作業類別的快照；回傳重建的作業類別 ID
+def rebuild_stale():
+    storage = get_storage()
+    rebuilt = []
+    job_type_ids = set(JobType.objects.values_list('id', flat=True))
+    for job_type_id in sorted(job_type_ids):
+        version, _ = snapshot_version(job_type_id)
+        if not storage.exists(snapshot_name(job_type_id, version)):
+            build(job_type_id, version)
+            rebuilt.append(job_type_id)
+
+    if storage.exists(''):
+        for filename in storage.listdir('')[1]:
+            parts = filename.split('-')
+            if parts[0] == 'jobtype' and len(parts) == 3 and parts[1].isdigit() and int(parts[1]) not in job_type_ids:
+                storage.delete(filename)
+    return rebuilt
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshots')
+    return _executor
+
+
+def _run_in_worker():
+    time.sleep(getattr(settings, 'SNAPSHOT_REBUILD_DELAY', 5))  # 合併短時間內的多次異動
+    _pending.clear()
+    try:
+        rebuild_stale()
+    except Exception:
+        logger.exception('重建離線快照失敗')
+    finally:
+        connection.close()
+
+
+# 資料異動後排入背景重建；已有排程中的重建時不重複排入
+def schedule():
+    if not getattr(settings, 'SNAPSHOT_AUTO_REBUILD', True):
+        return
+
+    def submit():
+        if not _pending.is_set():
+            _pending.set()
+            _get_executor().submit(_run_in_worker)
+    transaction.on_commit(submit)
@@ -0,0 +1,150 @@
+# signalguideapp/storage.py
+# 內容定址儲存：上傳檔案以 SHA-256 命名（blobs/ab/cd/<sha256>.<副檔名>），相同內容只存一份。
+# 衍生檔（縮圖等）以原檔路徑為前綴（blobs/ab/cd/<sha256>.small.webp），隨原檔共用。
+# 刪除資料時以資料表中的引用數判斷，沒有其他說明書或步驟引用時才刪除實體檔案。
+# 上傳沿用既有 blob 時會更新其修改時間；釋放時先把 blob 改名「認領」，再確認不在寬限期內且仍無引用才刪除，
+# 避免刪掉剛被另一個尚未提交的上傳沿用的檔案（寬限期內的孤立檔留給 dedupe_media --gc 清除）。
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'blobs'
+BLOB_PATTERN = re.compile(rf'^{BLOB_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})(\.[^/]*)?$')
+
+
+# 沿用既有 blob 的寬限期（秒）：需大於上傳請求從寫檔到交易提交的時間
+def release_grace():
+    return getattr(settings, 'MEDIA_RELEASE_GRACE', 600)
+
+
+def blob_name(digest, ext):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+
+# 原檔與衍生檔的共同前綴（不含副檔名）
+def blob_base(name):
+    match = BLOB_PATTERN.match(name)
+    return f'{os.path.dirname(name)}/{match.group(1)}' if match else None
+
+
+# 衍生檔（縮圖等）：blobs/ 底下、檔名在雜湊之後有兩段以上副檔名
+def is_derived(name):
+    match = BLOB_PATTERN.match(name)
+    return bool(match and match.group(2) and match.group(2).count('.') > 1)
+
+
+# 引用數：有多少說明書與處理步驟指向此檔案（file 欄位有索引）
+def reference_count(name):
+    from .models import SignalGuide, ProcedureStep
+    return SignalGuide.objects.filter(file=name).count() + ProcedureStep.objects.filter(file=name).count()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # 檔名由內容決定，不需要避開同名檔案
+        return name
+
+    def _save(self, name, content):
+        if is_derived(name):
+            # 衍生檔（縮圖重新產生）直接覆寫
+            return self._write(name, content)
+        if blob_base(name) is not None and self._reuse(self.path(name)):
+            return name
+
+        # pre_save 已算過雜湊時直接沿用（見 signals.hash_uploaded_file），blob 已存在就不必寫檔
+        known = getattr(content, 'sha256', None)
+        ext = os.path.splitext(name)[1]
+        if known and self._reuse(self.path(blob_name(known, ext))):
+            return blob_name(known, ext)
+
+        # 邊寫入暫存檔邊計算雜湊，不需整個檔案讀進記憶體
+        digest = None if known else hashlib.sha256()
+        tmp_path = self._write_temp(content, digest)
+        try:
+            target = blob_name(known or digest.hexdigest(), ext)
+            full_path = self.path(target)
+            if not self._reuse(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(tmp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+            return target
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write_temp(self, content, digest=None):
+        tmp_dir = self.path(os.path.join(BLOB_DIR, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    if digest is not None:
+                        digest.update(chunk)
+                    tmp.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    # 以暫存檔加 os.replace 原子性地寫入（覆寫）指定路徑
+    def _write(self, name, content):
+        tmp_path = self._write_temp(content)
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.replace(tmp_path, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+    # 沿用既有 blob：更新修改時間標示剛被使用；檔案已不存在（或正被釋放）時回傳 False，由呼叫端重新寫入
+    def _reuse(self, full_path):
+        try:
+            os.utime(full_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def recently_used(self, name):
+        try:
+            return time.time() - os.path.getmtime(self.path(name)) < release_grace()
+        except FileNotFoundError:
+            return False
+
+    # 不再被引用時刪除原檔與其衍生檔，回傳釋放的位元組數
+    def release(self, name):
+        base = blob_base(name or '')
+        if base is None or is_derived(name) or reference_count(name) > 0:
+            return 0
+        # 先改名認領：之後的上傳看不到此檔而會重新寫入；改名前剛被沿用的檔案修改時間較新或已有引用，放回原處
+        path = self.path(name)
+        claimed = f'{path}.release-{os.getpid()}-{threading.get_ident()}'
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return 0
+        if time.time() - os.path.getmtime(claimed) < release_grace() or reference_count(name) > 0:
+            os.replace(claimed, path)
+            return 0
+
+        freed = os.path.getsize(claimed)
+        os.remove(claimed)
+        directory = os.path.dirname(path)
+        prefix = os.path.basename(base) + '.'
+        for filename in os.listdir(directory):
+            if filename.startswith(prefix) and is_derived(f'{os.path.dirname(name)}/{filename}'):
+                full_path = os.path.join(directory, filename)
+                freed += os.path.getsize(full_path)
+                os.remove(full_path)
+        return freed
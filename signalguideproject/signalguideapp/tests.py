@@ -1,3 +1,1659 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from asgiref.sync import sync_to_async
+import asyncio
+import io
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from .models import CustomUser, JobType, SignalGuide, Device, FaultCase, ProcedureStep, DeletionLog
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+# 建立測試用資料：作業類別 → 說明書 → 設備 → 故障案例 → 處理步驟
+def make_tree(job_type, doc_number, devices=2, faults=2, steps=2):
+    guide = SignalGuide.objects.create(
+        job_type=job_type, system='號誌', doc_number=doc_number, title=f'說明書 {doc_number}'
+    )
+    for d in range(devices):
+        device = Device.objects.create(guide=guide, name=f'設備 {d}')
+        for f in range(faults):
+            fault = FaultCase.objects.create(device=device, description=f'故障 {d}-{f}')
+            for o in range(steps):
+                ProcedureStep.objects.create(
+                    fault=fault,
+                    order=steps - o,
+                    file=SimpleUploadedFile(f'step{o}.png', b'x', content_type='image/png'),
+                )
+    return guide
+
+
+def blob_name_of(content, ext='.png'):
+    import hashlib
+    from .storage import blob_name
+    return blob_name(hashlib.sha256(content).hexdigest(), ext)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class APITestBase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(employee_id='00001', name='管理者', password='abc123', role='A')
+        cls.viewer = CustomUser.objects.create_user(employee_id='00002', name='查詢者', password='abc123', role='B')
+        cls.job_type = JobType.objects.create(name='轉轍器')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+
+class GuideBundleTests(APITestBase):
+    def test_bundle_returns_nested_tree(self):
+        guide = make_tree(self.job_type, 'SG-001')
+        response = self.client.get(f'/api/signal-guides/{guide.id}/bundle/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['job_type_name'], '轉轍器')
+        self.assertEqual(len(response.data['devices']), 2)
+        steps = response.data['devices'][0]['faults'][0]['steps']
+        self.assertEqual([step['order'] for step in steps], [1, 2])
+
+    def test_bundle_query_count_is_constant(self):
+        small = make_tree(self.job_type, 'SG-001', devices=1, faults=1, steps=1)
+        large = make_tree(self.job_type, 'SG-002', devices=4, faults=3, steps=3)
+        # ETag 指紋（4 個彙總 + 刪除紀錄）+ 說明書 + 設備 + 故障案例 + 處理步驟
+        with self.assertNumQueries(9):
+            self.client.get(f'/api/signal-guides/{small.id}/bundle/')
+        with self.assertNumQueries(9):
+            self.client.get(f'/api/signal-guides/{large.id}/bundle/')
+
+    def test_bundle_missing_guide(self):
+        response = self.client.get('/api/signal-guides/999/bundle/')
+        self.assertEqual(response.status_code, 404)
+
+
+# 以 bulk_create 大量建立資料，用於查詢數回歸測試
+def seed_catalogue(job_types, guides_per_type, devices_per_guide, faults_per_device, steps_per_fault):
+    types = JobType.objects.bulk_create(
+        JobType(name=f'作業類別 {JobType.objects.count() + i}') for i in range(job_types)
+    )
+    offset = SignalGuide.objects.count()
+    guides = SignalGuide.objects.bulk_create(
+        SignalGuide(job_type=jt, system='號誌', doc_number=f'BULK-{offset + i * guides_per_type + g}', title='說明書')
+        for i, jt in enumerate(types) for g in range(guides_per_type)
+    )
+    devices = Device.objects.bulk_create(
+        Device(guide=guide, name=f'設備 {d}') for guide in guides for d in range(devices_per_guide)
+    )
+    faults = FaultCase.objects.bulk_create(
+        FaultCase(device=device, description=f'故障 {f}') for device in devices for f in range(faults_per_device)
+    )
+    ProcedureStep.objects.bulk_create(
+        ProcedureStep(fault=fault, order=o, file='procedure_files/step.png')
+        for fault in faults for o in range(steps_per_fault)
+    )
+    return guides
+
+
+class QueryCountRegressionTests(APITestBase):
+    api_endpoints = [
+        '/api/signal-guides/',
+        '/api/signal-guides/?is_pinned=false',
+        '/api/jobtypes/',
+        '/api/devices/',
+        '/api/faultcases/',
+        '/api/steps/',
+    ]
+    admin_endpoints = [
+        '/admin/signalguideapp/jobtype/',
+        '/admin/signalguideapp/signalguide/',
+        '/admin/signalguideapp/device/',
+        '/admin/signalguideapp/faultcase/',
+        '/admin/signalguideapp/procedurestep/',
+    ]
+
+    def count_queries(self, client, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        cache.clear()  # 量測未命中快取時的查詢數
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        superuser = CustomUser.objects.create_superuser(employee_id='A0000', name='系統管理者', password='abc123', role='A')
+        admin_client = self.client_class()
+        admin_client.force_login(superuser)
+
+        guide = seed_catalogue(2, 2, 1, 1, 1)[0]
+        endpoints = [(self.client, url) for url in self.api_endpoints + [f'/api/devices/by-guide/{guide.id}/']]
+        endpoints += [(admin_client, url) for url in self.admin_endpoints]
+        baseline = {url: self.count_queries(client, url) for client, url in endpoints}
+
+        # 同一本說明書下新增大量設備，再整體灌入數千筆資料
+        Device.objects.bulk_create(Device(guide=guide, name=f'新增設備 {i}') for i in range(200))
+        seed_catalogue(10, 20, 3, 3, 3)
+        for client, url in endpoints:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(client, url), baseline[url])
+
+
+class CursorPaginationTests(APITestBase):
+    def test_unpaginated_by_default(self):
+        seed_catalogue(1, 3, 1, 1, 1)
+        response = self.client.get('/api/signal-guides/')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 3)
+
+    def test_page_size_all_returns_full_list(self):
+        seed_catalogue(1, 3, 1, 1, 1)
+        response = self.client.get('/api/faultcases/?page_size=all')
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 3)
+
+    def test_cursor_walk_is_stable_under_inserts(self):
+        seed_catalogue(1, 25, 1, 1, 1)
+        expected = list(SignalGuide.objects.order_by('doc_number').values_list('id', flat=True))
+        seen = []
+        url = '/api/signal-guides/?page_size=10'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 10)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+            # 分頁途中插入排序在前面的資料，不應造成重複或遺漏
+            SignalGuide.objects.create(system='號誌', doc_number=f'A-{len(seen)}', title='新增')
+        self.assertEqual(seen, expected)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+            yield seen
+
+    def test_step_cursor_walk_is_stable_under_inserts(self):
+        seed_catalogue(1, 1, 1, 3, 10)
+        fault = FaultCase.objects.first()
+        expected = list(ProcedureStep.objects.order_by('id').values_list('id', flat=True))
+        for seen in self.walk('/api/steps/?page_size=7'):
+            ProcedureStep.objects.create(fault=fault, order=1, file='procedure_files/step.png')
+        # 各故障案例的 order 重複，仍不重複、不遺漏；分頁途中新增的資料排在最後
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen[:len(expected)], expected)
+
+        expected = list(fault.steps.order_by('order', 'id').values_list('id', flat=True))
+        for seen in self.walk(f'/api/steps/?fault_id={fault.id}&page_size=4'):
+            ProcedureStep.objects.create(fault=fault, order=0, file='procedure_files/step.png')
+        self.assertEqual(seen, expected)
+
+    def test_fault_cases_ordered_newest_first(self):
+        seed_catalogue(1, 1, 1, 5, 0)
+        response = self.client.get('/api/faultcases/?page_size=2')
+        expected = list(FaultCase.objects.order_by('-created_at', 'id').values_list('id', flat=True)[:2])
+        self.assertEqual([row['id'] for row in response.data['results']], expected)
+        self.assertIsNotNone(response.data['next'])
+
+
+@override_settings(SYNC_WATERMARK_MARGIN=0)
+class DeltaSyncTests(APITestBase):
+    def test_full_sync_without_since(self):
+        make_tree(self.job_type, 'SG-001', devices=1, faults=1, steps=1)
+        response = self.client.get('/api/sync/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['full'])
+        self.assertEqual(len(response.data['changes']['signal_guides']), 1)
+        self.assertEqual(len(response.data['changes']['steps']), 1)
+
+    def test_only_changes_after_watermark(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=2, faults=1, steps=1)
+        watermark = self.client.get('/api/sync/').data['watermark']
+
+        device = guide.devices.first()
+        device.name = '已修改'
+        device.save()
+        response = self.client.get('/api/sync/', {'since': watermark})
+        self.assertFalse(response.data['full'])
+        self.assertEqual([row['id'] for row in response.data['changes']['devices']], [device.id])
+        self.assertEqual(response.data['changes']['signal_guides'], [])
+
+    def test_cascade_delete_produces_tombstones(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=1, faults=2, steps=2)
+        device = guide.devices.get()
+        fault_ids = sorted(device.faults.values_list('id', flat=True))
+        watermark = self.client.get('/api/sync/').data['watermark']
+
+        device_id = device.id
+        device.delete()
+        deleted = self.client.get('/api/sync/', {'since': watermark}).data['deleted']
+        self.assertEqual(deleted['devices'], [device_id])
+        self.assertEqual(sorted(deleted['faultcases']), fault_ids)
+        self.assertEqual(len(deleted['steps']), 4)
+
+    def test_deleting_job_type_marks_guides_changed(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=0)
+        watermark = self.client.get('/api/sync/').data['watermark']
+
+        JobType.objects.get(pk=self.job_type.pk).delete()
+        response = self.client.get('/api/sync/', {'since': watermark})
+        self.assertEqual(response.data['deleted']['jobtypes'], [self.job_type.id])
+        self.assertEqual(response.data['changes']['signal_guides'][0]['id'], guide.id)
+        self.assertIsNone(response.data['changes']['signal_guides'][0]['job_type'])
+
+    def test_invalid_since(self):
+        response = self.client.get('/api/sync/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/sync/', {'since': '2024-13-45T00:00:00'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(SYNC_WATERMARK_MARGIN=300)
+    def test_watermark_leaves_margin_for_late_commits(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from django.utils.dateparse import parse_datetime
+        before = timezone.now()
+        watermark = self.client.get('/api/sync/').data['watermark']
+        self.assertLessEqual(parse_datetime(watermark), before - timedelta(seconds=300) + timedelta(seconds=1))
+        # 同步前不久寫入（可能較晚提交）的資料下次同步仍會送出
+        make_tree(self.job_type, 'SG-001', devices=0)
+        guide = SignalGuide.objects.get()
+        SignalGuide.objects.filter(pk=guide.pk).update(updated_at=before - timedelta(seconds=60))
+        response = self.client.get('/api/sync/', {'since': watermark})
+        self.assertEqual([row['id'] for row in response.data['changes']['signal_guides']], [guide.id])
+
+
+class ConditionalGetTests(APITestBase):
+    def assertNotModified(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304, url)
+        return response
+
+    def test_list_returns_304_for_matching_etag(self):
+        make_tree(self.job_type, 'SG-001', devices=1)
+        for url in ['/api/signal-guides/', '/api/jobtypes/', '/api/faultcases/']:
+            etag = self.client.get(url)['ETag']
+            self.assertNotModified(url, if_none_match=etag)
+
+    def test_etag_changes_after_write(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=1)
+        url = f'/api/devices/by-guide/{guide.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Device.objects.create(guide=guide, name='新設備')
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_etag_changes_after_delete(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=2)
+        url = f'/api/devices/by-guide/{guide.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            guide.devices.first().delete()
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_renaming_job_type_invalidates_guide_list(self):
+        make_tree(self.job_type, 'SG-001', devices=0)
+        etag = self.client.get('/api/signal-guides/')['ETag']
+        self.job_type.name = '號誌機'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job_type.save()
+        response = self.client.get('/api/signal-guides/', headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['job_type_name'], '號誌機')
+
+    def test_detail_and_bundle_honour_validators(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=1)
+        for url in [f'/api/signal-guides/{guide.id}/', f'/api/signal-guides/{guide.id}/bundle/']:
+            response = self.client.get(url)
+            self.assertNotModified(url, if_none_match=response['ETag'])
+            self.assertNotModified(url, if_modified_since=response['Last-Modified'])
+
+    def test_lazily_filled_hash_is_not_exposed(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=1, faults=1, steps=1)
+        step = ProcedureStep.objects.get(fault__device__guide=guide)
+        for data in (self.client.get('/api/signal-guides/').data[0], self.client.get(f'/api/signal-guides/{guide.id}/').data,
+                     self.client.get(f'/api/steps/{step.id}/').data,
+                     self.client.get(f'/api/signal-guides/{guide.id}/bundle/').data['devices'][0]['faults'][0]['steps'][0]):
+            self.assertNotIn('file_sha256', data)
+
+    def test_etag_depends_on_negotiated_format(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=1)
+        for url in ('/api/signal-guides/', f'/api/signal-guides/{guide.id}/', f'/api/devices/by-guide/{guide.id}/'):
+            with self.subTest(url=url):
+                json_response = self.client.get(url)
+                self.assertIn('Accept', json_response['Vary'])
+                html_response = self.client.get(url, headers={'accept': 'text/html', 'if-none-match': json_response['ETag']})
+                self.assertEqual(html_response.status_code, 200)
+                self.assertNotEqual(html_response['ETag'], json_response['ETag'])
+                self.assertIn('Accept', html_response['Vary'])
+
+    def test_not_modified_skips_serialization(self):
+        make_tree(self.job_type, 'SG-001', devices=0)
+        etag = self.client.get('/api/signal-guides/')['ETag']
+        cache.clear()
+        # 只執行指紋彙總與刪除紀錄查詢
+        with self.assertNumQueries(2):
+            self.assertNotModified('/api/signal-guides/', if_none_match=etag)
+
+
+class ResponseCacheTests(APITestBase):
+    def test_second_read_is_served_from_cache(self):
+        make_tree(self.job_type, 'SG-001', devices=1)
+        first = self.client.get('/api/signal-guides/?is_pinned=false')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/signal-guides/?is_pinned=false')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_process_local_cache_is_short_lived_and_flagged(self):
+        from unittest import mock
+        from django.core import checks
+        from . import cache as response_cache
+        self.assertTrue(response_cache.is_process_local())
+        self.assertEqual(response_cache.cache_timeout(), response_cache.LOCAL_TIMEOUT)
+        messages = checks.run_checks(tags=[checks.Tags.caches], include_deployment_checks=True)
+        self.assertIn('signalguideapp.W001', [message.id for message in messages])
+
+        redis_cache = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}}
+        with override_settings(CACHES=redis_cache), mock.patch.object(response_cache, 'CACHE_TIMEOUT', 3600):
+            self.assertEqual(response_cache.cache_timeout(), 3600)
+            self.assertEqual(response_cache.check_shared_cache(None), [])
+
+    def test_write_invalidates_cached_list(self):
+        guide = make_tree(self.job_type, 'SG-001', devices=1)
+        url = f'/api/devices/by-guide/{guide.id}/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Device.objects.create(guide=guide, name='新設備')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()), 2)
+
+    def test_read_before_commit_is_not_served_after_commit(self):
+        from django.db import transaction
+        guide = make_tree(self.job_type, 'SG-001', devices=1)
+        url = f'/api/devices/by-guide/{guide.id}/'
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Device.objects.create(guide=guide, name='新設備')
+                self.client.get(url)  # 提交前的讀取
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+    def test_related_model_write_invalidates_guide_list(self):
+        make_tree(self.job_type, 'SG-001', devices=0)
+        self.client.get('/api/signal-guides/')
+        self.job_type.name = '號誌機'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job_type.save()
+        response = self.client.get('/api/signal-guides/')
+        self.assertEqual(response.json()[0]['job_type_name'], '號誌機')
+
+    def test_filters_are_cached_separately(self):
+        make_tree(self.job_type, 'SG-001', devices=0)
+        self.client.get('/api/signal-guides/?is_pinned=true')
+        response = self.client.get('/api/signal-guides/?is_pinned=false')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()), 1)
+
+    def test_cached_entry_answers_conditional_get(self):
+        etag = self.client.get('/api/jobtypes/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/jobtypes/', headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_hit_and_miss_counters(self):
+        from .cache import cache_stats
+
+        before = cache_stats()
+        self.client.get('/api/jobtypes/')
+        self.client.get('/api/jobtypes/')
+        after = cache_stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+
+class SearchTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.guide = SignalGuide.objects.create(
+            job_type=self.job_type, system='號誌', doc_number='TC-101', title='軌道電路維修說明書'
+        )
+        self.device = Device.objects.create(guide=self.guide, name='軌道電路接收器')
+        self.fault = FaultCase.objects.create(device=self.device, description='軌道電路異常占用，無列車時仍顯示紅燈')
+        FaultCase.objects.create(device=self.device, description='轉轍器無法轉換')
+
+    def search(self, q, **params):
+        response = self.client.get('/api/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_tokenize_uses_cjk_bigrams(self):
+        from .search import tokenize
+        self.assertEqual(tokenize('軌道電路 TC-101'), ['軌道', '道電', '電路', 'tc', '101'])
+
+    def test_chinese_terms_match_fault_description(self):
+        data = self.search('軌道電路 占用')
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['type'], 'faultcase')
+        self.assertEqual(data['results'][0]['id'], self.fault.id)
+        self.assertEqual(data['results'][0]['guide_id'], self.guide.id)
+
+    def test_doc_number_and_ranking(self):
+        self.assertEqual(self.search('TC-101')['results'][0]['id'], self.guide.id)
+        # 標題命中排在內文命中之前
+        types = [row['type'] for row in self.search('軌道電路')['results']]
+        self.assertEqual(types[-1], 'faultcase')
+        self.assertEqual(len(types), 3)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.fault.description = '號誌機燈泡故障'
+        self.fault.save()
+        self.assertEqual(self.search('占用')['count'], 0)
+        self.assertEqual(self.search('燈泡')['count'], 1)
+
+        self.guide.delete()
+        self.assertEqual(self.search('軌道')['count'], 0)
+
+    def test_remove_object_does_not_load_relations(self):
+        from .search import remove_object
+        fault = FaultCase.objects.get(pk=self.fault.pk)
+        with self.assertNumQueries(1):
+            remove_object(fault)
+        self.assertEqual(self.search('占用')['count'], 0)
+
+    def test_pagination(self):
+        for i in range(5):
+            FaultCase.objects.create(device=self.device, description=f'電源模組故障 {i}')
+        data = self.search('電源', page=2, page_size=2)
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(len(data['results']), 2)
+
+    def test_rebuild_command(self):
+        from django.core.management import call_command
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM signalguideapp_searchindex')
+        self.assertEqual(self.search('轉轍器')['count'], 0)
+        call_command('rebuild_search_index', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.search('轉轍器')['count'], 1)
+
+    def test_empty_query(self):
+        self.assertEqual(self.search('  ')['results'], [])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class CatalogueImportExportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        job_type = JobType.objects.create(name='轉轍器')
+        make_tree(job_type, 'SG-001', devices=2, faults=2, steps=2)
+        make_tree(None, 'SG-002', devices=1, faults=0)
+
+    def roundtrip(self, fmt):
+        from django.core.management import call_command
+
+        path = os.path.join(self.tmp, f'catalogue.{fmt}')
+        media = os.path.join(self.tmp, 'media.zip')
+        call_command('export_guides', path, media=media, stderr=open(os.devnull, 'w'))
+        before = self.snapshot()
+
+        SignalGuide.objects.all().delete()
+        JobType.objects.all().delete()
+        call_command('import_guides', path, media=media, batch_size=1, stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.snapshot(), before)
+
+    def snapshot(self):
+        from .catalogue import iter_records
+        return list(iter_records())
+
+    def test_jsonl_roundtrip(self):
+        self.roundtrip('jsonl')
+
+    def test_csv_roundtrip(self):
+        self.roundtrip('csv')
+
+    def test_import_updates_existing_guides_by_doc_number(self):
+        from .catalogue import CatalogueImporter, iter_records
+
+        records = list(iter_records())
+        records[0]['title'] = '已更新'
+        records[0]['devices'] = records[0]['devices'][:1]
+        records[0]['job_type'] = '號誌機'
+        CatalogueImporter().run(records)
+
+        guide = SignalGuide.objects.get(doc_number='SG-001')
+        self.assertEqual(guide.title, '已更新')
+        self.assertEqual(guide.job_type.name, '號誌機')
+        self.assertEqual(guide.devices.count(), 1)
+        self.assertEqual(SignalGuide.objects.count(), 2)
+
+    def test_duplicate_doc_numbers_are_rejected_with_line(self):
+        import io
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from .catalogue import write_csv, write_jsonl, iter_records
+
+        def written(write, records):
+            stream = io.StringIO()
+            list(write(records, stream))
+            return stream.getvalue()
+
+        records = list(iter_records())
+        for fmt, write in (('jsonl', write_jsonl), ('csv', write_csv)):
+            with self.subTest(fmt=fmt):
+                # 重複的說明書接在最後（CSV 即同一本說明書的列不連續）
+                line = len(written(write, records).splitlines()) + 1
+                path = os.path.join(self.tmp, f'duplicate.{fmt}')
+                with open(path, 'w', encoding='utf-8', newline='') as file:
+                    file.write(written(write, records + records[:1]))
+                with self.assertRaisesMessage(CommandError, f'第 {line} 行：文件編號 SG-001 重複'):
+                    call_command('import_guides', path, stdout=io.StringIO())
+
+    def test_import_uses_constant_queries_per_batch(self):
+        from .catalogue import CatalogueImporter, iter_records
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        template = next(iter_records())
+
+        def records(prefix, count):
+            return [{**template, 'doc_number': f'{prefix}-{i}'} for i in range(count)]
+
+        with CaptureQueriesContext(connection) as small:
+            CatalogueImporter(batch_size=100).run(records('SMALL', 2))
+        with CaptureQueriesContext(connection) as large:
+            CatalogueImporter(batch_size=100).run(records('LARGE', 50))
+        # 資料量放大 25 倍，查詢數只因 SQLite 參數上限分批而略增
+        self.assertLess(len(large.captured_queries), len(small.captured_queries) + 5)
+        self.assertEqual(SignalGuide.objects.filter(doc_number__startswith='LARGE').count(), 50)
+
+
+class BulkWriteTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.guide = make_tree(self.job_type, 'SG-001', devices=1, faults=0)
+        self.device = self.guide.devices.get()
+
+    def test_bulk_create_faults_in_constant_inserts(self):
+        items = [{'device': self.device.id, 'description': f'故障 {i}'} for i in range(50)]
+        response = self.client.post('/api/faultcases/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertEqual(self.device.faults.count(), 50)
+        self.assertTrue(all(result['data']['id'] for result in response.data['results']))
+
+    def test_bulk_create_reports_per_item_errors(self):
+        items = [{'guide': self.guide.id, 'name': '新設備'}, {'guide': 9999, 'name': '無效'}]
+        response = self.client.post('/api/devices/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 400])
+        self.assertIn('guide', response.data['results'][1]['errors'])
+        self.assertEqual(self.guide.devices.count(), 2)
+
+    def test_bulk_update_sets_updated_at(self):
+        other = Device.objects.create(guide=self.guide, name='設備 B')
+        before = other.updated_at
+        items = [{'id': self.device.id, 'name': '已修改 A'}, {'id': other.id, 'name': '已修改 B'}, {'id': 9999}]
+        response = self.client.patch('/api/devices/bulk/', items, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.data['results']], [200, 200, 404])
+        other.refresh_from_db()
+        self.assertEqual(other.name, '已修改 B')
+        self.assertGreater(other.updated_at, before)
+
+    def test_bulk_ids_must_be_integers(self):
+        for items in ([{'id': 'abc'}], [{'id': True}], [{'name': '缺少 id'}], ['x']):
+            response = self.client.patch('/api/devices/bulk/', items, format='json')
+            self.assertEqual(response.status_code, 400, items)
+        for ids in (['abc'], [True], [self.device.id, False]):
+            response = self.client.delete('/api/devices/bulk/', {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400, ids)
+        self.assertTrue(Device.objects.filter(pk=self.device.pk).exists())
+
+    def test_bulk_create_steps_with_multipart_files(self):
+        fault = FaultCase.objects.create(device=self.device, description='故障')
+        items = [{'fault': fault.id, 'order': i, 'file': f'file_{i}'} for i in range(3)]
+        data = {'items': json.dumps(items)}
+        for i in range(3):
+            data[f'file_{i}'] = SimpleUploadedFile(f'step{i}.png', b'x', content_type='image/png')
+        response = self.client.post('/api/steps/bulk/', data, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(fault.steps.values_list('order', flat=True)), [0, 1, 2])
+        self.assertTrue(all(step.file.storage.exists(step.file.name) for step in fault.steps.all()))
+
+    def test_bulk_delete_logs_tombstones(self):
+        faults = FaultCase.objects.bulk_create(FaultCase(device=self.device, description='x') for _ in range(3))
+        ids = [fault.id for fault in faults]
+        response = self.client.delete('/api/faultcases/bulk/', {'ids': ids + [9999]}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(FaultCase.objects.filter(id__in=ids).count(), 0)
+        self.assertEqual(DeletionLog.objects.filter(model='faultcase').count(), 3)
+
+    def test_bulk_write_invalidates_cache(self):
+        url = f'/api/devices/by-guide/{self.guide.id}/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/devices/bulk/', [{'guide': self.guide.id, 'name': '新設備'}], format='json')
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+    def test_requires_admin_role(self):
+        self.client.force_authenticate(self.viewer)
+        response = self.client.post('/api/devices/bulk/', [{'guide': self.guide.id, 'name': 'x'}], format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class StepReorderTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        guide = make_tree(self.job_type, 'SG-001', devices=1, faults=1, steps=0)
+        self.fault = FaultCase.objects.get(device__guide=guide)
+        self.steps = ProcedureStep.objects.bulk_create(
+            ProcedureStep(fault=self.fault, order=i, file='procedure_files/step.png') for i in range(1, 201)
+        )
+
+    def test_reorder_in_constant_queries(self):
+        ids = [step.id for step in reversed(self.steps)]
+        # 交易 + 鎖定讀取 + 單一批次 UPDATE
+        with self.assertNumQueries(4):
+            response = self.client.post('/api/steps/reorder/', {'fault': self.fault.id, 'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], ids)
+        self.assertEqual(list(self.fault.steps.order_by('order').values_list('id', flat=True)), ids)
+
+    def test_reorder_rejects_incomplete_or_foreign_ids(self):
+        ids = [step.id for step in self.steps]
+        for bad in (ids[:-1], ids + [ids[0]], ids[:-1] + [9999]):
+            response = self.client.post('/api/steps/reorder/', {'fault': self.fault.id, 'ids': bad}, format='json')
+            self.assertEqual(response.status_code, 400)
+        for fault in ('abc', str(self.fault.id), None, True):
+            response = self.client.post('/api/steps/reorder/', {'fault': fault, 'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(self.fault.steps.values_list('order', flat=True)), list(range(1, 201)))
+
+    def test_step_list_filters_by_fault(self):
+        # App 以此清單的 ID 送出 reorder，不可混入其他故障案例的步驟
+        other = FaultCase.objects.create(device=self.fault.device, description='其他故障')
+        ProcedureStep.objects.create(fault=other, order=1, file='procedure_files/step.png')
+        response = self.client.get('/api/steps/', {'fault_id': self.fault.id})
+        self.assertEqual([row['id'] for row in response.json()], [step.id for step in self.steps])
+
+    def test_partial_update_no_longer_renumbers(self):
+        step = self.steps[0]
+        response = self.client.patch(f'/api/steps/{step.id}/', {'order': 500, 'fault': self.fault.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ProcedureStep.objects.get(id=step.id).order, 500)
+
+    def test_reorder_requires_admin_role(self):
+        self.client.force_authenticate(self.viewer)
+        response = self.client.post('/api/steps/reorder/', {'fault': self.fault.id, 'ids': []}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class MediaServingTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 1024
+        self.guide = SignalGuide.objects.create(
+            system='號誌', doc_number='SG-PDF', title='手冊',
+            file=SimpleUploadedFile('manual.pdf', self.content, content_type='application/pdf'),
+        )
+        self.url = f'/api/files/guides/{self.guide.id}/'
+
+    def test_missing_file_returns_404(self):
+        SignalGuide.objects.filter(pk=self.guide.pk).update(file='manuals/missing.pdf', file_sha256='')
+        self.assertEqual(self.client.get(self.url).status_code, 404)  # 補算雜湊時找不到檔案
+        SignalGuide.objects.filter(pk=self.guide.pk).update(file_sha256='0' * 64)
+        self.assertEqual(self.client.get(self.url).status_code, 404)  # 送檔時找不到檔案
+
+    def test_hash_is_computed_on_upload(self):
+        import hashlib
+        self.assertEqual(self.guide.file_sha256, hashlib.sha256(self.content).hexdigest())
+
+    def test_full_download_streams_with_strong_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], f'"{self.guide.file_sha256}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, headers={'range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.client.get(self.url, headers={'range': 'bytes=-10'})
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        response = self.client.get(self.url, headers={'range': f'bytes={len(self.content)}-'})
+        self.assertEqual(response.status_code, 416)
+
+    def test_if_range_mismatch_sends_full_file(self):
+        response = self.client.get(self.url, headers={'range': 'bytes=0-9', 'if-range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_download(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'if-none-match': etag}).status_code, 304)
+
+    def test_hash_backfilled_for_bulk_rows(self):
+        step = ProcedureStep.objects.bulk_create([ProcedureStep(
+            fault=make_tree(self.job_type, 'SG-001', devices=1, faults=1, steps=0).devices.get().faults.get(),
+            file=self.guide.file.name,
+        )])[0]
+        response = self.client.get(f'/api/files/steps/{step.id}/')
+        self.assertEqual(response['ETag'], f'"{self.guide.file_sha256}"')
+        self.assertEqual(ProcedureStep.objects.get(id=step.id).file_sha256, self.guide.file_sha256)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect_mode(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.guide.file.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(RENDITIONS_ASYNC=False, SNAPSHOT_AUTO_REBUILD=False)
+class RenditionTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        guide = make_tree(self.job_type, 'SG-001', devices=1, faults=1, steps=0)
+        self.fault = FaultCase.objects.get(device__guide=guide)
+
+    def upload(self, name, content, content_type):
+        response = self.client.post('/api/steps/', {
+            'fault': self.fault.id, 'order': 1, 'file': SimpleUploadedFile(name, content, content_type=content_type),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return ProcedureStep.objects.get(id=response.data['id'])
+
+    def test_image_upload_generates_tiered_renditions(self):
+        from PIL import Image
+        import io
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (3000, 2000), 'red').save(buffer, 'PNG')
+        step = self.upload('photo.png', buffer.getvalue(), 'image/png')
+
+        self.assertEqual(set(step.renditions), {f'{size}_{fmt}' for size in ('thumb', 'small', 'medium') for fmt in ('jpg', 'webp')})
+        with step.file.storage.open(step.renditions['small_webp']) as file:
+            self.assertEqual(max(Image.open(file).size), 480)
+        self.assertEqual(step.renditions['thumb_jpg'], os.path.splitext(step.file.name)[0] + '.thumb.jpg')
+
+        data = self.client.get(f'/api/steps/{step.id}/').data
+        self.assertTrue(data['renditions']['thumb_webp'].startswith('http://testserver/media/'))
+
+    def test_pdf_upload_generates_first_page_preview(self):
+        import fitz
+
+        document = fitz.open()
+        document.new_page(width=595, height=842)
+        step = self.upload('manual.pdf', document.tobytes(), 'application/pdf')
+        self.assertIn('preview_png', step.renditions)
+        self.assertIn('thumb_jpg', step.renditions)
+
+    def test_unsupported_file_has_no_renditions(self):
+        step = self.upload('notes.txt', b'hello', 'text/plain')
+        self.assertEqual(step.renditions, {})
+
+    @override_settings(RENDITIONS_ASYNC=True)
+    def test_async_mode_defers_until_commit(self):
+        from PIL import Image
+        import io
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (100, 100), 'blue').save(buffer, 'PNG')
+        with self.captureOnCommitCallbacks() as callbacks:
+            step = self.upload('photo.png', buffer.getvalue(), 'image/png')
+        self.assertEqual(step.renditions, {})
+        self.assertEqual(len([callback for callback in callbacks if callback.__module__ == 'signalguideapp.renditions']), 1)
+
+
+@override_settings(SNAPSHOT_AUTO_REBUILD=False, MEDIA_RELEASE_GRACE=0)
+class ContentAddressedStorageTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.guide = make_tree(self.job_type, 'SG-001', devices=1, faults=1, steps=0)
+        self.fault = FaultCase.objects.get(device__guide=self.guide)
+
+    def add_step(self, content, name='photo.png'):
+        return ProcedureStep.objects.create(fault=self.fault, file=SimpleUploadedFile(name, content))
+
+    def test_identical_uploads_share_one_blob(self):
+        import hashlib
+        from .storage import blob_name
+
+        first, second = self.add_step(b'same'), self.add_step(b'same', name='other.PNG')
+        self.assertEqual(first.file.name, blob_name(hashlib.sha256(b'same').hexdigest(), '.png'))
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertNotEqual(self.add_step(b'different').file.name, first.file.name)
+
+    def test_blob_is_deleted_with_last_reference(self):
+        first, second = self.add_step(b'same'), self.add_step(b'same')
+        storage, name = first.file.storage, first.file.name
+        storage.save(os.path.splitext(name)[0] + '.thumb.jpg', SimpleUploadedFile('t.jpg', b'thumb'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(storage.exists(os.path.splitext(name)[0] + '.thumb.jpg'))
+
+    def test_replacing_file_releases_old_blob(self):
+        step = self.add_step(b'old')
+        old_name = step.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/steps/{step.id}/', {
+                'file': SimpleUploadedFile('new.png', b'new', content_type='image/png'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(step.file.storage.exists(old_name))
+
+    def test_bulk_replacing_file_releases_old_blob(self):
+        step = self.add_step(b'old')
+        old_name = step.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/steps/bulk/', {
+                'items': json.dumps([{'id': step.id, 'file': 'file_0'}]),
+                'file_0': SimpleUploadedFile('new.png', b'new', content_type='image/png'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        step.refresh_from_db()
+        self.assertEqual(step.file.name, blob_name_of(b'new'))
+        self.assertEqual(step.file_sha256, os.path.splitext(os.path.basename(step.file.name))[0])
+        self.assertFalse(step.file.storage.exists(old_name))
+
+    def test_recently_reused_blob_is_kept(self):
+        # 另一個上傳剛沿用同一個 blob（可能尚未提交），寬限期內不刪除
+        first = self.add_step(b'same')
+        storage, name = first.file.storage, first.file.name
+        with self.settings(MEDIA_RELEASE_GRACE=600), self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(name))
+        self.assertGreater(storage.release(name), 0)  # 寬限期過後（此處設為 0）才釋放
+        self.assertFalse(storage.exists(name))
+
+    def test_upload_hash_is_computed_once(self):
+        from unittest import mock
+        from .storage import ContentAddressedStorage
+
+        write_temp = ContentAddressedStorage._write_temp
+        with mock.patch.object(ContentAddressedStorage, '_write_temp', autospec=True, side_effect=write_temp) as patched:
+            step = self.add_step(b'hash once')
+        self.assertIsNone(patched.call_args.args[2])  # 不在儲存時重新計算雜湊
+        self.assertEqual(step.file.name, blob_name_of(b'hash once'))
+        with mock.patch.object(ContentAddressedStorage, '_write_temp', autospec=True, side_effect=write_temp) as patched:
+            self.add_step(b'hash once')
+        patched.assert_not_called()  # blob 已存在，不必寫檔
+
+    def test_derived_files_are_overwritten(self):
+        step = self.add_step(b'source')
+        storage = step.file.storage
+        derived = os.path.splitext(step.file.name)[0] + '.small.webp'
+        self.assertEqual(storage.save(derived, SimpleUploadedFile('a.webp', b'stale')), derived)
+        self.assertEqual(storage.save(derived, SimpleUploadedFile('a.webp', b'fresh')), derived)
+        with storage.open(derived) as file:
+            self.assertEqual(file.read(), b'fresh')
+
+    def test_dedupe_media_moves_legacy_files(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import FileSystemStorage
+        from django.core.management import call_command
+
+        legacy = FileSystemStorage(location=MEDIA_ROOT)
+        names = [legacy.save(f'procedure_files/legacy{i}.png', ContentFile(b'legacy')) for i in range(3)]
+        thumb = legacy.save('procedure_files/legacy0.thumb.jpg', ContentFile(b'thumb'))
+        steps = [self.add_step(b'x') for _ in names]
+        for step, name in zip(steps, names):
+            ProcedureStep.objects.filter(pk=step.pk).update(file=name, file_sha256='')
+        ProcedureStep.objects.filter(pk=steps[0].pk).update(renditions={'thumb_jpg': thumb})
+        orphan = steps[0].file.name  # b'x' 的 blob 已無人引用
+
+        call_command('dedupe_media', dry_run=True, stdout=open(os.devnull, 'w'))
+        self.assertTrue(legacy.exists(names[0]))
+
+        call_command('dedupe_media', gc=True, stdout=open(os.devnull, 'w'))
+        steps = list(ProcedureStep.objects.filter(pk__in=[step.pk for step in steps]))
+        self.assertEqual({step.file.name for step in steps}, {steps[0].file.name})
+        self.assertTrue(steps[0].file.name.startswith('blobs/'))
+        self.assertEqual(len(steps[0].file_sha256), 64)
+        for name in names + [thumb, orphan]:
+            self.assertFalse(legacy.exists(name))
+        step = next(step for step in steps if step.renditions)
+        with step.file.storage.open(step.renditions['thumb_jpg']) as file:
+            self.assertEqual(file.read(), b'thumb')
+
+
+class DatabaseTuningTests(TestCase):
+    def test_sqlite_pragmas_applied_on_connect(self):
+        from django.db import connection
+        if connection.vendor != 'sqlite':
+            self.skipTest('僅適用 SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+class QueryPlanTests(TestCase):
+    # 主要查詢路徑需使用對應的複合索引（完整資料量的比較見 benchmarks/bench_indexes.py）
+    def assertUsesIndex(self, queryset, index_name):
+        from django.db import connection
+        if connection.vendor != 'sqlite':
+            self.skipTest('僅比對 SQLite 查詢計畫')
+        self.assertIn(index_name, queryset.explain())
+
+    def test_composite_indexes_are_used(self):
+        self.assertUsesIndex(
+            SignalGuide.objects.filter(job_type_id=1, is_pinned=True).order_by('doc_number'), 'guide_type_pinned_doc_idx'
+        )
+        self.assertUsesIndex(SignalGuide.objects.filter(is_pinned=True).order_by('doc_number'), 'guide_pinned_doc_idx')
+        self.assertUsesIndex(FaultCase.objects.filter(device_id=1).order_by('-created_at', 'id'), 'faultcase_device_created_idx')
+        self.assertUsesIndex(ProcedureStep.objects.filter(fault_id=1).order_by('order', 'id'), 'step_fault_order_idx')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        cls.user = CustomUser.objects.create_user(employee_id='00002', name='查詢者', password='abc123', role='B')
+        cls.token = str(AccessToken.for_user(cls.user))
+        cls.guide = make_tree(JobType.objects.create(name='轉轍器'), 'SG-001', devices=2, faults=2, steps=2)
+        make_tree(None, 'SG-002', devices=1, faults=1, steps=1)
+
+    def setUp(self):
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+
+    async def get(self, url, token=None):
+        return await self.async_client.get(url, headers={'Authorization': f'Bearer {token or self.token}'})
+
+    async def test_matches_sync_views(self):
+        device = await Device.objects.filter(guide=self.guide).afirst()
+        fault = await FaultCase.objects.filter(device=device).afirst()
+        for async_url, sync_url in [
+            ('/api/async/signal-guides/', '/api/signal-guides/'),
+            ('/api/async/signal-guides/?is_pinned=false', '/api/signal-guides/?is_pinned=false'),
+            (f'/api/async/signal-guides/{self.guide.id}/', f'/api/signal-guides/{self.guide.id}/'),
+            (f'/api/async/devices/by-guide/{self.guide.id}/', f'/api/devices/by-guide/{self.guide.id}/'),
+            (f'/api/async/faultcases/by-device/{device.id}/', f'/api/faultcases/?device_id={device.id}'),
+            (f'/api/async/steps/by-fault/{fault.id}/', f'/api/steps/?fault_id={fault.id}'),
+        ]:
+            response = await self.get(async_url)
+            self.assertEqual(response.status_code, 200, async_url)
+            expected = await sync_to_async(self.sync_client.get)(sync_url)
+            self.assertEqual(response.json(), json.loads(expected.content), async_url)
+
+    async def test_requires_valid_token(self):
+        self.assertEqual((await self.async_client.get('/api/async/signal-guides/')).status_code, 401)
+        self.assertEqual((await self.get('/api/async/signal-guides/', token='invalid')).status_code, 401)
+
+    async def test_missing_guide_and_write_methods(self):
+        self.assertEqual((await self.get('/api/async/signal-guides/999/')).status_code, 404)
+        response = await self.async_client.post('/api/async/signal-guides/', headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 405)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(employee_id='00001', name='管理者', password='abc123', role='A')
+
+    def setUp(self):
+        from .serializers import CustomTokenObtainPairSerializer
+        cache.clear()
+        self.client = APIClient()
+        token = CustomTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def authenticate(self, method='get'):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from .authentication import ClaimsJWTAuthentication
+
+        request = getattr(APIRequestFactory(), method)('/', HTTP_AUTHORIZATION=self.client._credentials['HTTP_AUTHORIZATION'])
+        return ClaimsJWTAuthentication().authenticate(Request(request))[0]
+
+    def test_read_uses_token_claims_without_query(self):
+        self.authenticate()  # 第一次查詢並快取帳號狀態
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual((user.pk, user.role, user.employee_id, user.name), (self.admin.pk, 'A', '00001', '管理者'))
+        self.assertEqual(self.client.get('/api/jobtypes/').status_code, 200)
+
+    def test_write_loads_user_from_database(self):
+        self.assertIsInstance(self.authenticate('post'), CustomUser)
+        self.assertEqual(self.client.post('/api/jobtypes/', {'name': '軌道電路'}).status_code, 201)
+
+    def test_role_change_takes_effect_immediately(self):
+        self.authenticate()
+        self.admin.role = 'B'
+        self.admin.save()
+        self.assertEqual(self.authenticate().role, 'B')
+        # token 內仍為 A，但寫入以資料庫的角色判斷
+        self.assertEqual(self.client.post('/api/jobtypes/', {'name': '軌道電路'}).status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/jobtypes/').status_code, 200)
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertEqual(self.client.get('/api/jobtypes/').status_code, 401)
+        self.assertEqual(self.client.post('/api/jobtypes/', {'name': '軌道電路'}).status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/jobtypes/').status_code, 200)
+        self.admin.delete()
+        self.assertEqual(self.client.get('/api/jobtypes/').status_code, 401)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, employee_id='00001', password='abc123'):
+        return self.client.post('/api/token/', {'employee_id': employee_id, 'password': password}, format='json')
+
+    def test_new_passwords_use_configured_hasher(self):
+        from django.conf import settings
+        from django.contrib.auth.hashers import get_hasher
+
+        user = CustomUser.objects.create_user(employee_id='00001', name='管理者', password='abc123', role='A')
+        self.assertTrue(user.password.startswith(get_hasher('default').algorithm + '$'))
+        self.assertEqual(settings.PASSWORD_HASHERS[0], settings.PASSWORD_HASHER_CHOICES[settings.PASSWORD_HASHER])
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        from django.contrib.auth.hashers import get_hasher, make_password
+
+        user = CustomUser.objects.create_user(employee_id='00001', name='管理者', password='abc123', role='A')
+        CustomUser.objects.filter(pk=user.pk).update(password=make_password('abc123', hasher='pbkdf2_sha256'))
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['role'], 'A')
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith(get_hasher('default').algorithm + '$'))
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_login_is_throttled_per_account(self):
+        from unittest import mock
+        from .throttling import LoginAccountThrottle
+
+        CustomUser.objects.create_user(employee_id='00001', name='管理者', password='abc123', role='A')
+        with mock.patch.dict(LoginAccountThrottle.THROTTLE_RATES, {'login_account': '2/min'}):
+            self.assertEqual(self.login(password='wrong1').status_code, 401)
+            self.assertEqual(self.login(password='wrong2').status_code, 401)
+            self.assertEqual(self.login().status_code, 429)
+            # 其他帳號不受影響
+            self.assertEqual(self.login(employee_id='00002').status_code, 401)
+
+    def test_login_is_throttled_per_ip(self):
+        from unittest import mock
+        from .throttling import LoginIPThrottle
+
+        with mock.patch.dict(LoginIPThrottle.THROTTLE_RATES, {'login_ip': '2/min'}):
+            self.assertEqual(self.login(employee_id='00001').status_code, 401)
+            self.assertEqual(self.login(employee_id='00002').status_code, 401)
+            self.assertEqual(self.login(employee_id='00003').status_code, 429)
+
+    def test_forwarded_for_does_not_bypass_ip_throttle(self):
+        from unittest import mock
+        from django.core import checks
+        from .throttling import LoginIPThrottle
+
+        with mock.patch.dict(LoginIPThrottle.THROTTLE_RATES, {'login_ip': '2/min'}):
+            for i, expected in enumerate((401, 401, 429)):
+                response = self.client.post('/api/token/', {'employee_id': f'0000{i}', 'password': 'x'},
+                                            format='json', HTTP_X_FORWARDED_FOR=f'10.0.0.{i}')
+                self.assertEqual(response.status_code, expected)
+        messages = checks.run_checks(tags=[checks.Tags.caches], include_deployment_checks=True)
+        self.assertIn('signalguideapp.W002', [message.id for message in messages])
+
+    def test_change_password_is_throttled_per_user(self):
+        from unittest import mock
+        from .throttling import AccountUserThrottle
+
+        user = CustomUser.objects.create_user(employee_id='00001', name='管理者', password='abc123', role='A')
+        self.client.force_authenticate(user)
+        with mock.patch.dict(AccountUserThrottle.THROTTLE_RATES, {'account_user': '1/min'}):
+            self.assertEqual(self.client.post('/api/change_password/', {'new_password': 'xyz789'}).status_code, 200)
+            self.assertEqual(self.client.post('/api/change_password/', {'new_password': 'xyz789'}).status_code, 429)
+
+
+class ResponseFormatTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            make_tree(self.job_type, f'SG-{i:03d}', devices=1, faults=1, steps=1)
+
+    def test_sparse_fields_and_omit(self):
+        data = self.client.get('/api/signal-guides/', {'fields': 'id,title'}).data
+        self.assertEqual(set(data[0]), {'id', 'title'})
+        data = self.client.get('/api/signal-guides/', {'omit': 'file,file_sha256'}).data
+        self.assertNotIn('file', data[0])
+        self.assertIn('job_type_name', data[0])
+
+        guide = SignalGuide.objects.first()
+        self.assertEqual(set(self.client.get(f'/api/signal-guides/{guide.id}/', {'fields': 'doc_number'}).data), {'doc_number'})
+        # 寫入時不受影響
+        response = self.client.patch(f'/api/signal-guides/{guide.id}/?fields=id', {'title': '新標題'}, format='json')
+        self.assertEqual(response.data['title'], '新標題')
+
+    def test_summary_list_serializer(self):
+        data = self.client.get('/api/signal-guides/', {'summary': 'true'}).data
+        self.assertEqual(
+            set(data[0]), {'id', 'doc_number', 'title', 'system', 'job_type', 'job_type_name', 'is_pinned', 'updated_at'}
+        )
+        self.assertEqual(data[0]['job_type_name'], '轉轍器')
+
+    def test_gzip_negotiation(self):
+        import gzip
+        plain = self.client.get('/api/signal-guides/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get('/api/signal-guides/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), json.loads(plain.content))
+        self.assertLess(len(response.content), len(plain.content))
+
+    def test_file_downloads_are_not_compressed(self):
+        guide = SignalGuide.objects.first()
+        guide.file = SimpleUploadedFile('manual.txt', b'a' * 5000)
+        guide.save()
+        response = self.client.get(f'/api/files/guides/{guide.id}/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_brotli_negotiation(self):
+        try:
+            import brotli
+        except ImportError:
+            self.skipTest('未安裝 brotli')
+        response = self.client.get('/api/signal-guides/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(len(json.loads(brotli.decompress(response.content))), 5)
+
+    def test_messagepack_round_trip(self):
+        try:
+            import msgpack
+        except ImportError:
+            self.skipTest('未安裝 msgpack')
+        response = self.client.get('/api/signal-guides/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(len(msgpack.unpackb(response.content)), 5)
+        response = self.client.post(
+            '/api/jobtypes/', msgpack.packb({'name': '軌道電路'}), content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class FastListTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            make_tree(self.job_type, f'SG-{i:03d}', devices=1, faults=2, steps=1)
+        guide = SignalGuide.objects.create(system='號誌', doc_number='SG-999', title='未分類\u2028說明書')
+        guide.file = SimpleUploadedFile('manual.txt', b'x')
+        guide.save()
+
+    # 同一請求分別走快速路徑與一般序列化器，回應必須逐位元組相同
+    def assertSameBytes(self, url, params=None):
+        from unittest import mock
+        from . import fastlist
+        fast = self.client.get(url, params)
+        cache.clear()
+        with mock.patch.object(fastlist, 'FAST_LIST', False):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(fast['Content-Type'], slow['Content-Type'])
+        return fast
+
+    def test_guide_list_matches_serializer(self):
+        response = self.assertSameBytes('/api/signal-guides/')
+        data = json.loads(response.content)
+        self.assertEqual(data[0]['job_type_name'], '轉轍器')
+        self.assertNotIn('job_type_name', data[-1])  # 無作業類別時與序列化器相同，略過此鍵
+        self.assertTrue(data[-1]['file'].startswith('http://testserver/'))
+        self.assertIn(b'\\u2028', response.content)
+
+        self.assertSameBytes('/api/signal-guides/', {'summary': 'true'})
+        self.assertSameBytes('/api/signal-guides/', {'fields': 'title,id'})
+        self.assertSameBytes('/api/signal-guides/', {'is_pinned': 'false', 'page_size': 2})
+
+    def test_fault_list_matches_serializer(self):
+        device = Device.objects.first()
+        self.assertSameBytes('/api/faultcases/', {'device_id': device.id})
+        response = self.assertSameBytes('/api/faultcases/', {'page_size': 2, 'fields': 'description'})
+        next_page = json.loads(response.content)['next']
+        self.assertSameBytes(next_page)
+
+    def test_list_uses_single_query_and_other_formats_fall_back(self):
+        with self.assertNumQueries(3):  # ETag 指紋、刪除紀錄之外，列表本身只有一次查詢
+            self.client.get('/api/faultcases/')
+        response = self.client.get('/api/signal-guides/', HTTP_ACCEPT='application/json; indent=2')
+        self.assertIn(b'\n  ', response.content)
+
+
+@override_settings(SNAPSHOT_ROOT=tempfile.mkdtemp(), SNAPSHOT_AUTO_REBUILD=False)
+class SnapshotTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.guide = make_tree(self.job_type, 'SG-001', devices=2, faults=1, steps=2)
+        self.other = JobType.objects.create(name='軌道電路')
+        make_tree(self.other, 'SG-100', devices=1, faults=1, steps=1)
+        self.url = f'/api/snapshots/{self.job_type.id}/'
+
+    def read(self, response):
+        import gzip
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        return json.loads(lines[0]), [json.loads(line) for line in lines[1:]]
+
+    def test_download_contains_job_type_catalogue(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        manifest, rows = self.read(response)
+        self.assertEqual(manifest['counts'], {'jobtypes': 1, 'signal_guides': 1, 'devices': 2, 'faultcases': 2, 'steps': 4})
+        self.assertEqual(len(rows), 10)
+        self.assertEqual({row['data']['doc_number'] for row in rows if row['model'] == 'signal_guides'}, {'SG-001'})
+        step = ProcedureStep.objects.filter(fault__device__guide=self.guide).first()
+        self.assertEqual(manifest['media'][step.file.name], step.file_sha256)
+
+        # 未變更時回 304，不重建
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_rebuild_only_affected_job_type(self):
+        from . import snapshots
+        self.assertEqual(snapshots.rebuild_stale(), [self.job_type.id, self.other.id])
+        self.assertEqual(snapshots.rebuild_stale(), [])
+        etag = self.client.get(self.url)['ETag']
+
+        Device.objects.filter(guide=self.guide).first().delete()
+        self.assertEqual(snapshots.rebuild_stale(), [self.job_type.id])
+        response = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.read(response)[0]['counts']['devices'], 1)
+        names = snapshots.get_storage().listdir('')[1]
+        self.assertEqual(len([name for name in names if name.startswith(f'jobtype-{self.job_type.id}-')]), 1)
+
+        self.other.delete()
+        snapshots.rebuild_stale()
+        self.assertFalse([name for name in snapshots.get_storage().listdir('')[1] if name.startswith(f'jobtype-{self.other.id}-')])
+
+    def test_snapshot_removed_before_serving(self):
+        from unittest import mock
+        from . import snapshots
+        get_snapshot = snapshots.get_snapshot
+
+        # 取得檔名後、送出前被其他 process 刪除
+        def removed(job_type_id):
+            result = get_snapshot(job_type_id)
+            snapshots.remove_old(job_type_id)
+            return result
+        attempts = iter([removed, get_snapshot])
+        with mock.patch.object(snapshots, 'get_snapshot', side_effect=lambda pk: next(attempts)(pk)):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with mock.patch.object(snapshots, 'get_snapshot', side_effect=removed):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_requires_login_and_existing_job_type(self):
+        self.assertEqual(self.client.get('/api/snapshots/9999/').status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, SNAPSHOT_AUTO_REBUILD=False)
+class ChangeEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        cls.user = CustomUser.objects.create_user(employee_id='00002', name='查詢者', password='abc123', role='B')
+        cls.token = str(AccessToken.for_user(cls.user))
+        cls.job_type = JobType.objects.create(name='轉轍器')
+        cls.guide = make_tree(cls.job_type, 'SG-001', devices=1, faults=1, steps=1)
+
+    def published(self, func):
+        from unittest import mock
+        from . import events
+        with mock.patch.object(events.LocalBroker, 'active', True), \
+                mock.patch.object(events.hub, 'dispatch') as dispatch, \
+                self.captureOnCommitCallbacks(execute=True):
+            func()
+        return [call.args[0] for call in dispatch.call_args_list]
+
+    def test_saves_and_deletes_publish_routed_events(self):
+        from django.db import transaction
+        step = ProcedureStep.objects.get(fault__device__guide=self.guide)
+        published = self.published(lambda: step.save())
+        self.assertEqual(published, [{
+            'model': 'procedurestep', 'id': step.id, 'op': 'save', 'updated_at': step.updated_at.isoformat(),
+            'guide': self.guide.id, 'job_type': self.job_type.id,
+        }])
+
+        # 連帶刪除的子資料仍能找到所屬說明書
+        published = self.published(lambda: Device.objects.filter(guide=self.guide).delete())
+        self.assertEqual({(event['model'], event['op'], event['guide']) for event in published}, {
+            ('device', 'delete', self.guide.id), ('faultcase', 'delete', self.guide.id), ('procedurestep', 'delete', self.guide.id),
+        })
+
+        def rolled_back():
+            try:
+                with transaction.atomic():
+                    self.guide.save()
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(self.published(rolled_back), [])
+
+    def test_cascade_delete_publishes_one_batch(self):
+        from unittest import mock
+        from . import events
+        guide = make_tree(self.job_type, 'SG-002', devices=2, faults=5, steps=2)
+        guide_id = guide.id
+        with mock.patch.object(events.LocalBroker, 'active', True), \
+                mock.patch.object(events.LocalBroker, 'publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            guide.delete()
+        # 上層 ID 全由本批已刪除的資料推得，不再逐筆查詢
+        publish.assert_called_once()
+        batch = publish.call_args.args[0]
+        self.assertEqual(len(batch), 1 + 2 + 10 + 20)
+        self.assertEqual({(event['guide'], event['job_type']) for event in batch}, {(guide_id, self.job_type.id)})
+
+    def test_rolled_back_savepoint_events_are_dropped(self):
+        from django.db import transaction
+        device = Device.objects.get(guide=self.guide)
+
+        def write():
+            with transaction.atomic():
+                self.guide.save()
+                try:
+                    with transaction.atomic():
+                        FaultCase.objects.filter(device=device).delete()
+                        raise ValueError
+                except ValueError:
+                    pass
+                device.save()
+        published = self.published(write)
+        self.assertEqual([(event['model'], event['op']) for event in published], [('signalguide', 'save'), ('device', 'save')])
+
+    def test_no_subscribers_no_events(self):
+        from unittest import mock
+        from . import events
+        with mock.patch.object(events.hub, 'dispatch') as dispatch, self.captureOnCommitCallbacks(execute=True):
+            self.guide.save()
+        dispatch.assert_not_called()
+
+    async def test_hub_overflow_sends_resync(self):
+        from . import events
+        from unittest import mock
+        hub = events.Hub()
+        with mock.patch.object(events, 'QUEUE_SIZE', 2):
+            guide_sub = hub.subscribe(['guide:1'])
+        all_sub = hub.subscribe(['all'])
+        self.assertEqual(hub.dispatch({'guide': 1, 'job_type': 5}), 2)
+        self.assertEqual(hub.dispatch({'guide': 2, 'job_type': 5}), 1)
+        for _ in range(3):
+            hub.dispatch({'guide': 1, 'job_type': 5})
+        await asyncio.sleep(0)
+        self.assertIs(await guide_sub.get(), events.RESYNC)
+        self.assertEqual(all_sub.queue.qsize(), 5)
+        hub.unsubscribe(guide_sub)
+        hub.unsubscribe(all_sub)
+        self.assertEqual(len(hub), 0)
+
+    async def test_event_stream(self):
+        from . import events
+        headers = {'Authorization': f'Bearer {self.token}', 'Accept-Encoding': 'gzip'}
+        self.assertEqual((await self.async_client.get('/api/events/')).status_code, 401)
+        self.assertEqual((await self.async_client.get('/api/events/?guide=x', headers=headers)).status_code, 400)
+
+        response = await self.async_client.get(f'/api/events/?job_type={self.job_type.id}', headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        content = aiter(response.streaming_content)
+        self.assertEqual(await anext(content), b'retry: 5000\n\n')
+        self.assertEqual(len(events.hub), 1)
+
+        events.hub.dispatch({'model': 'signalguide', 'id': 9, 'guide': 9, 'job_type': self.job_type.id + 1})
+        events.hub.dispatch({'model': 'signalguide', 'id': self.guide.id, 'guide': self.guide.id, 'job_type': self.job_type.id})
+        chunk = await anext(content)
+        self.assertTrue(chunk.startswith(b'event: change\ndata: {"model":"signalguide","id":%d' % self.guide.id))
+        # 用戶端斷線時 ASGI handler 取消送出回應的 task，串流結束並取消訂閱
+        pending = asyncio.ensure_future(anext(content))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(len(events.hub), 0)
+
+
+class MetricsTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        from . import metrics
+        metrics.registry.clear()
+        self.guide = make_tree(self.job_type, 'SG-001', devices=2, faults=1, steps=1)
+
+    def metric(self, text, prefix):
+        for line in text.splitlines():
+            if line.startswith(prefix):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f'找不到指標 {prefix}')
+
+    @override_settings(METRICS_TOKEN=None, METRICS_ALLOW_LOCAL=True)
+    def test_records_latency_queries_and_sizes_per_url_name(self):
+        self.client.get(f'/api/devices/by-guide/{self.guide.id}/')
+        self.client.get(f'/api/devices/by-guide/{self.guide.id}/')
+        self.client.get('/api/signal-guides/')
+        self.client.get('/api/no-such-url/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertEqual(self.metric(text, 'signalguide_requests_total{view="devices-by-guide",method="GET",status="200"}'), 2)
+        self.assertEqual(self.metric(text, 'signalguide_requests_total{view="signalguide-list",method="GET",status="200"}'), 1)
+        self.assertEqual(self.metric(text, 'signalguide_requests_total{view="unmatched",method="GET",status="404"}'), 1)
+        self.assertEqual(self.metric(text, 'signalguide_request_duration_seconds_count{view="devices-by-guide",method="GET"}'), 2)
+        self.assertEqual(self.metric(text, 'signalguide_request_duration_seconds_bucket{view="devices-by-guide",method="GET",le="+Inf"}'), 2)
+        self.assertGreater(self.metric(text, 'signalguide_db_queries_per_request_sum{view="signalguide-list",method="GET"}'), 0)
+        self.assertGreater(self.metric(text, 'signalguide_response_size_bytes_sum{view="signalguide-list",method="GET"}'), 0)
+        self.assertGreater(self.metric(text, 'signalguide_response_cache_total{result="hits"}'), 0)  # 第二次 devices-by-guide
+        self.assertIn('# TYPE signalguide_request_duration_seconds histogram', text)
+
+    def test_slow_requests_log_sql(self):
+        from unittest import mock
+        from . import metrics
+        with mock.patch.object(metrics, 'SLOW_REQUEST_MS', 0), self.assertLogs('signalguideapp.metrics', 'WARNING') as logs:
+            self.client.get('/api/faultcases/')
+        self.assertIn('faultcase-list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_access(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        with self.settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)  # 預設拒絕，包含經反向代理來自本機的請求
+            with self.settings(METRICS_ALLOW_LOCAL=True):
+                self.assertEqual(self.client.get('/metrics').status_code, 200)
+                self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 403)
+
+    def test_unknown_methods_share_one_label(self):
+        from . import metrics
+        self.client.generic('FOOBAR', '/api/signal-guides/')
+        self.client.generic('BAZ', '/api/signal-guides/')
+        text = metrics.render()
+        self.assertEqual(self.metric(text, 'signalguide_requests_total{view="signalguide-list",method="OTHER",status="405"}'), 2)
+        self.assertNotIn('FOOBAR', text)
+
+    async def test_async_views_count_queries(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from . import metrics
+        token = str(AccessToken.for_user(self.admin))
+        await self.async_client.get('/api/async/signal-guides/', headers={'Authorization': f'Bearer {token}'})
+        text = metrics.render()
+        self.assertEqual(self.metric(text, 'signalguide_requests_total{view="async-guide-list",method="GET",status="200"}'), 1)
+        self.assertGreater(self.metric(text, 'signalguide_db_queries_per_request_sum{view="async-guide-list",method="GET"}'), 0)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, SNAPSHOT_AUTO_REBUILD=False)
+class DevSeedFixtureTests(TestCase):
+    def test_fixture_restores_admin_and_job_types(self):
+        from django.core.management import call_command
+        call_command('loaddata', 'dev_seed', verbosity=0)
+        self.assertEqual(JobType.objects.count(), 5)
+        admin = CustomUser.objects.get(employee_id='A0000')
+        self.assertTrue(admin.is_superuser)
+        self.assertEqual(admin.role, 'A')
+        self.assertEqual(SignalGuide.objects.get().devices.get().faults.count(), 1)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeedBenchmarkDataTests(TestCase):
+    def seed(self, **options):
+        from django.core.management import call_command
+        call_command('seed_benchmark_data', job_types=3, guides=12, users=2, admins=1, files=4, stdout=io.StringIO(), **options)
+
+    def counts(self):
+        return [model.objects.count() for model in (JobType, SignalGuide, Device, FaultCase, ProcedureStep, CustomUser)]
+
+    def test_seed_is_deterministic_and_rerunnable(self):
+        self.seed()
+        first = self.counts()
+        self.assertEqual(first[:2], [3, 12])
+        self.assertEqual(first[5], 3)
+        titles = list(SignalGuide.objects.order_by('doc_number').values_list('doc_number', 'title'))
+        self.assertEqual(titles[0][0], 'SEED-000001')
+
+        self.seed()  # 以文件編號更新既有說明書，不重複新增
+        self.assertEqual(self.counts(), first)
+        self.assertEqual(list(SignalGuide.objects.order_by('doc_number').values_list('doc_number', 'title')), titles)
+
+        step = ProcedureStep.objects.first()
+        self.assertTrue(step.file.storage.exists(step.file.name))
+
+    def test_seeded_accounts_can_log_in(self):
+        self.seed()
+        client = APIClient()
+        for employee_id, role in (('80001', 'B'), ('89001', 'A')):
+            response = client.post('/api/token/', {'employee_id': employee_id, 'password': 'bench1234'}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['role'], role)
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_ROOT=tempfile.mkdtemp(), SNAPSHOT_AUTO_REBUILD=False)
+class ProfilingTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        self.guide = make_tree(self.job_type, 'SG-001', devices=1, faults=2, steps=1)
+        self.device = self.guide.devices.get()
+
+    def jwt_client(self, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def test_flagged_request_is_profiled_with_sql(self):
+        import pstats
+        from .models import RequestProfile
+        from . import profiling
+
+        client = self.jwt_client(self.admin)
+        plain = client.get(f'/api/faultcases/?device_id={self.device.id}')
+        self.assertNotIn('X-Profile-Id', plain)
+        self.assertFalse(RequestProfile.objects.exists())
+
+        response = client.get(f'/api/faultcases/?device_id={self.device.id}&_profile=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, plain.content)
+        record = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((record.method, record.view, record.status_code, record.user_id), ('GET', 'faultcase-list', 200, self.admin.id))
+        self.assertEqual(record.query_count, len(record.queries))
+        self.assertTrue(any('signalguideapp_faultcase' in query['sql'] for query in record.queries))
+
+        storage = profiling.get_storage()
+        stats = pstats.Stats(storage.path(record.profile_file))
+        self.assertTrue(any(func[2] == 'list' for func in stats.stats))
+        with storage.open(record.speedscope_file) as file:
+            speedscope = json.load(file)
+        profile = speedscope['profiles'][0]
+        self.assertEqual(profile['type'], 'sampled')
+        self.assertEqual(len(profile['samples']), len(profile['weights']))
+
+        record.delete()
+        self.assertFalse(storage.exists(record.profile_file))
+        self.assertFalse(storage.exists(record.speedscope_file))
+
+    def test_only_role_a_with_flag_is_profiled(self):
+        from .models import RequestProfile
+
+        response = self.jwt_client(self.viewer).get('/api/signal-guides/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        response = APIClient().get('/api/signal-guides/?_profile=1')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(RequestProfile.objects.exists())
+
+        response = self.jwt_client(self.admin).get('/api/signal-guides/', HTTP_X_PROFILE='1')
+        self.assertIn('X-Profile-Id', response)
+
+    def test_disabled_by_default(self):
+        with override_settings(PROFILING_ENABLED=False):
+            response = self.jwt_client(self.admin).get('/api/signal-guides/?_profile=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_admin_lists_and_downloads_profiles(self):
+        from django.test import Client
+        superuser = CustomUser.objects.create_superuser(employee_id='00009', name='系統管理者', password='abc123', role='A')
+        client = Client()
+        client.force_login(superuser)
+
+        response = client.get('/api/signal-guides/?_profile=1')  # 後台登入的 session 也可剖析
+        pk = response['X-Profile-Id']
+        response = client.get('/admin/signalguideapp/requestprofile/')
+        self.assertContains(response, f'/admin/signalguideapp/requestprofile/{pk}/download/speedscope/')
+
+        response = client.get(f'/admin/signalguideapp/requestprofile/{pk}/download/speedscope/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['exporter'], 'signalguideapp.profiling')
+        self.assertEqual(client.get(f'/admin/signalguideapp/requestprofile/{pk}/download/other/').status_code, 404)
+
+    async def test_asgi_profiles_sync_views_only(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = await sync_to_async(AccessToken.for_user)(self.admin)
+        headers = {'Authorization': f'Bearer {token}', 'X-Profile': '1'}
+        response = await self.async_client.get(f'/api/faultcases/?device_id={self.device.id}', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Profile-Id', response)
+        response = await self.async_client.get(f'/api/async/signal-guides/{self.guide.id}/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
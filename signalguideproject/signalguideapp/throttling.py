@@ -0,0 +1,61 @@
+# signalguideapp/throttling.py
+# 登入與帳號管理 API 的頻率限制：同時依來源 IP 與員工編號計數，計數存於共用快取（多台伺服器共用時改用 Redis 等後端）
+# 來源 IP 依 REST_FRAMEWORK['NUM_PROXIES'] 判斷，預設 0 只用 REMOTE_ADDR，用戶端無法以 X-Forwarded-For 換 IP 繞過
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+from .cache import is_process_local
+
+CACHE_ALIAS = getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if not is_process_local(CACHE_ALIAS):
+        return []
+    return [checks.Warning(
+        f'頻率限制（{CACHE_ALIAS}）使用 process 內的 LocMemCache，各 worker 分別計數，額度隨 worker 數倍增',
+        hint='多個 worker 部署時請將 THROTTLE_CACHE_ALIAS 指向 Redis 或 Memcached 等共用快取',
+        id='signalguideapp.W002',
+    )]
+
+
+class SharedCacheThrottle(SimpleRateThrottle):
+    cache = caches[CACHE_ALIAS]
+
+    def ident_for(self, request):
+        return self.get_ident(request)
+
+    def get_cache_key(self, request, view):
+        ident = self.ident_for(request)
+        if not ident:
+            return None  # 無法識別時不計數
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+# /token/：依來源 IP（同一廠區可能共用 NAT，額度較寬）
+class LoginIPThrottle(SharedCacheThrottle):
+    scope = 'login_ip'
+
+
+# /token/：依登入的員工編號，防止針對單一帳號猜密碼
+class LoginAccountThrottle(SharedCacheThrottle):
+    scope = 'login_account'
+
+    def ident_for(self, request):
+        employee_id = request.data.get('employee_id') if hasattr(request.data, 'get') else None
+        return str(employee_id).strip().upper() if employee_id else None
+
+
+# 建立帳號／修改密碼：依來源 IP
+class AccountIPThrottle(SharedCacheThrottle):
+    scope = 'account_ip'
+
+
+# 建立帳號／修改密碼：依登入者
+class AccountUserThrottle(SharedCacheThrottle):
+    scope = 'account_user'
+
+    def ident_for(self, request):
+        return getattr(request.user, 'employee_id', None)
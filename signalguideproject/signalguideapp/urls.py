@@ -1,7 +1,8 @@
 # signalguideapp/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SignalGuideViewSet, JobTypeViewSet, CustomTokenView, DeviceViewSet, FaultCaseViewSet, ProcedureStepViewSet, home, create_user_view, change_password, devices_by_guide
+from . import async_views
+from .views import SignalGuideViewSet, JobTypeViewSet, CustomTokenView, DeviceViewSet, FaultCaseViewSet, ProcedureStepViewSet, home, create_user_view, change_password, devices_by_guide, sync, search, guide_file, step_file, job_type_snapshot
 
 router = DefaultRouter()
 router.register(r'signal-guides', SignalGuideViewSet)
@@ -19,4 +20,17 @@ urlpatterns = [
     path('change_password/', change_password, name='change_password'),
     path('create_user/', create_user_view, name='create_user'),
     path('devices/by-guide/<int:guide_id>/', devices_by_guide, name='devices-by-guide'),
+    path('sync/', sync, name='sync'),
+    path('search/', search, name='search'),
+    path('files/guides/<int:pk>/', guide_file, name='guide-file'),
+    path('files/steps/<int:pk>/', step_file, name='step-file'),
+    path('snapshots/<int:job_type_id>/', job_type_snapshot, name='job-type-snapshot'),
+
+    # 非同步唯讀 API（ASGI 部署時使用）
+    path('async/signal-guides/', async_views.guide_list, name='async-guide-list'),
+    path('async/signal-guides/<int:pk>/', async_views.guide_detail, name='async-guide-detail'),
+    path('async/devices/by-guide/<int:guide_id>/', async_views.devices_by_guide, name='async-devices-by-guide'),
+    path('async/faultcases/by-device/<int:device_id>/', async_views.faults_by_device, name='async-faults-by-device'),
+    path('async/steps/by-fault/<int:fault_id>/', async_views.steps_by_fault, name='async-steps-by-fault'),
+    path('events/', async_views.change_events, name='change-events'),
 ]
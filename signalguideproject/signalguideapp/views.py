@@ -1,13 +1,28 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
 from django.http import HttpResponse
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import SignalGuide, JobType, Device, FaultCase, ProcedureStep
-from .serializers import CustomTokenObtainPairSerializer, SignalGuideSerializer, JobTypeSerializer, DeviceSerializer, FaultCaseSerializer, ProcedureStepSerializer
+from .pagination import OptInCursorPagination
+from .throttling import LoginIPThrottle, LoginAccountThrottle, AccountIPThrottle, AccountUserThrottle
+from . import search as search_index
+from .bulk import BulkWriteMixin
+from .cache import CachedListMixin, cache_response
+from .fastlist import FastListMixin
+from .signals import bulk_saved
+from .media import serve_file, serve_stored_file
+from . import renditions, snapshots
+from .conditional import ConditionalGetMixin, queryset_fingerprint, make_validators, not_modified_response, set_validators
+from .models import SignalGuide, JobType, Device, FaultCase, ProcedureStep, DeletionLog
+from .serializers import CustomTokenObtainPairSerializer, SignalGuideSerializer, SignalGuideListSerializer, SignalGuideBundleSerializer, JobTypeSerializer, DeviceSerializer, FaultCaseSerializer, ProcedureStepSerializer
 import re
 
 # Home view
@@ -17,6 +32,7 @@ def home(request):
 # 自訂登入序列化器：加入 name、role、employee_id
 class CustomTokenView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginIPThrottle, LoginAccountThrottle]
 
 # 自訂權限類別：僅 A 角色可以進行寫入操作
 class IsAdminRole(BasePermission):
@@ -30,6 +46,7 @@ User = get_user_model()
 # 建立帳號：僅限 A 角色
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([AccountIPThrottle, AccountUserThrottle])
 def create_user_view(request):
     if not hasattr(request.user, 'role') or request.user.role != 'A':
         return Response({'detail': '沒有權限新增帳號'}, status=status.HTTP_403_FORBIDDEN)
@@ -58,6 +75,7 @@ def create_user_view(request):
 # 修改密碼：僅限已登入使用者
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([AccountIPThrottle, AccountUserThrottle])
 def change_password(request):
     user = request.user
     data = request.data
@@ -78,13 +96,17 @@ def change_password(request):
     return Response({'detail': '密碼修改成功'}, status=status.HTTP_200_OK)
 
 # SignalGuide ViewSet
-class SignalGuideViewSet(viewsets.ModelViewSet):
+class SignalGuideViewSet(CachedListMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = SignalGuide.objects.all()
     serializer_class = SignalGuideSerializer
     permission_classes = [IsAuthenticated, IsAdminRole]
+    pagination_class = OptInCursorPagination
+    cursor_ordering = ('doc_number',)
+    etag_related_fields = ('job_type__updated_at',)
+    cache_models = (SignalGuide, JobType)
 
     def get_queryset(self):
-        queryset = SignalGuide.objects.all()
+        queryset = SignalGuide.objects.select_related('job_type')
         job_type = self.request.query_params.get('job_type')
         is_pinned = self.request.query_params.get('is_pinned')
 
@@ -99,33 +121,186 @@ class SignalGuideViewSet(viewsets.ModelViewSet):
 
         return queryset.order_by('doc_number')
 
+    def get_serializer_class(self):
+        if self.action == 'list' and self.request.query_params.get('summary') == 'true':
+            return SignalGuideListSerializer
+        return super().get_serializer_class()
+
+    # 一次取回整本說明書（設備 → 故障案例 → 處理步驟），查詢數固定不隨資料量增加
+    @action(detail=True, methods=['get'])
+    def bundle(self, request, pk=None):
+        etag, last_modified = make_validators([
+            queryset_fingerprint(SignalGuide.objects.filter(pk=pk), self.etag_related_fields),
+            queryset_fingerprint(Device.objects.filter(guide_id=pk)),
+            queryset_fingerprint(FaultCase.objects.filter(device__guide_id=pk)),
+            queryset_fingerprint(ProcedureStep.objects.filter(fault__device__guide_id=pk)),
+        ], models=[Device, FaultCase, ProcedureStep], request=request)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return set_validators(response, etag, last_modified)
+
+        queryset = SignalGuide.objects.select_related('job_type').prefetch_related(
+            Prefetch('devices', queryset=Device.objects.order_by('id')),
+            Prefetch('devices__faults', queryset=FaultCase.objects.order_by('-created_at', 'id')),
+            Prefetch('devices__faults__steps', queryset=ProcedureStep.objects.order_by('order', 'id')),
+        )
+        guide = get_object_or_404(queryset, pk=pk)
+        serializer = SignalGuideBundleSerializer(guide, context=self.get_serializer_context())
+        return set_validators(Response(serializer.data), etag, last_modified)
+
 
 # JobType ViewSet
-class JobTypeViewSet(viewsets.ModelViewSet):
+class JobTypeViewSet(CachedListMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = JobType.objects.all().order_by('created_at')  # 依建立時間新到舊排序
     serializer_class = JobTypeSerializer
     permission_classes = [IsAuthenticated, IsAdminRole]
+    cache_models = (JobType,)
 
 
 # 取得所有工作說明書
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response('devices-by-guide', models=[Device])
 def devices_by_guide(request, guide_id):
     devices = Device.objects.filter(guide_id=guide_id)
-    serializer = DeviceSerializer(devices, many=True)
-    return Response(serializer.data)
+    etag, last_modified = make_validators([queryset_fingerprint(devices)], models=[Device], request=request)
+    response = not_modified_response(request, etag, last_modified)
+    if response is None:
+        serializer = DeviceSerializer(devices, many=True, context={'request': request})
+        response = Response(serializer.data)
+    return set_validators(response, etag, last_modified)
+
+# 增量同步：回傳 since 之後新增／修改的資料與已刪除的 ID，以及新的同步時間點
+SYNC_SOURCES = (
+    ('jobtypes', JobType.objects.all(), JobTypeSerializer),
+    ('signal_guides', SignalGuide.objects.select_related('job_type'), SignalGuideSerializer),
+    ('devices', Device.objects.all(), DeviceSerializer),
+    ('faultcases', FaultCase.objects.all(), FaultCaseSerializer),
+    ('steps', ProcedureStep.objects.all(), ProcedureStepSerializer),
+)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    since = request.query_params.get('since')
+    if since:
+        try:
+            since = parse_datetime(since.replace(' ', '+'))  # URL 未編碼時 + 會變成空白
+        except ValueError:  # 格式正確但日期超出範圍
+            since = None
+        if since is None:
+            return Response({'detail': 'since 格式錯誤，請使用 ISO 8601 時間'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+    # 先取得同步時間點（並往前保留交易提交延遲的餘裕）再查詢，查詢期間寫入的資料會在下次同步再送一次，不會遺漏
+    watermark = snapshots.sync_watermark()
+    changes = {}
+    deleted = {}
+    for key, queryset, serializer_class in SYNC_SOURCES:
+        if since:
+            # 依 updated_at 排序，讓 SQLite 以 updated_at 索引做範圍查詢而非整表掃描
+            queryset = queryset.filter(updated_at__gte=since).order_by('updated_at', 'id')
+        else:
+            queryset = queryset.order_by('id')
+        changes[key] = serializer_class(queryset, many=True, context={'request': request}).data
+
+        # 完整同步不需要刪除紀錄
+        deleted[key] = list(DeletionLog.objects.filter(
+            model=queryset.model._meta.model_name, deleted_at__gte=since,
+        ).values_list('object_id', flat=True)) if since else []
+
+    return Response({
+        'watermark': watermark.isoformat(),
+        'full': not since,
+        'changes': changes,
+        'deleted': deleted,
+    })
+
+# 全文檢索：/search/?q=軌道電路 占用&page=1&page_size=20
+SEARCH_MAX_PAGE_SIZE = 100
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    q = request.query_params.get('q', '').strip()
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', 20)), 1), SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({'detail': 'page 與 page_size 必須是數字'}, status=status.HTTP_400_BAD_REQUEST)
+
+    count, hits = search_index.search(q, limit=page_size, offset=(page - 1) * page_size)
+
+    # 依類別批次取回顯示用文字，每種類別最多一次查詢
+    ids = {}
+    for kind, pk, score in hits:
+        ids.setdefault(kind, []).append(pk)
+    objects = {}
+    if 'guide' in ids:
+        for guide in SignalGuide.objects.filter(id__in=ids['guide']):
+            objects['guide', guide.id] = {'guide_id': guide.id, 'title': guide.title, 'doc_number': guide.doc_number}
+    if 'device' in ids:
+        for device in Device.objects.filter(id__in=ids['device']):
+            objects['device', device.id] = {'guide_id': device.guide_id, 'title': device.name}
+    if 'faultcase' in ids:
+        for fault in FaultCase.objects.select_related('device').filter(id__in=ids['faultcase']):
+            objects['faultcase', fault.id] = {
+                'guide_id': fault.device.guide_id, 'device_id': fault.device_id, 'title': fault.description,
+            }
+
+    results = [
+        {'type': kind, 'id': pk, 'score': round(score, 4), **objects[kind, pk]}
+        for kind, pk, score in hits if (kind, pk) in objects
+    ]
+    return Response({'count': count, 'page': page, 'page_size': page_size, 'results': results})
+
+# 檔案下載（需登入），支援 Range 與 ETag
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def guide_file(request, pk):
+    guide = get_object_or_404(SignalGuide, pk=pk)
+    if not guide.file:
+        return Response({'detail': '此說明書沒有上傳檔案'}, status=status.HTTP_404_NOT_FOUND)
+    return serve_file(request, guide)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def step_file(request, pk):
+    step = get_object_or_404(ProcedureStep, pk=pk)
+    return serve_file(request, step)
+
+# 離線快照下載：作業類別的完整目錄（.jsonl.gz），以快照版本作為強 ETag，支援 Range 續傳
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_type_snapshot(request, job_type_id):
+    get_object_or_404(JobType, pk=job_type_id)
+    # 送出前快照可能已被其他 process 建立的新版本取代刪除，重新取得一次；仍失敗時請 App 稍後重試
+    for attempt in range(2):
+        name, version, last_modified = snapshots.get_snapshot(job_type_id)
+        try:
+            return serve_stored_file(
+                request, snapshots.get_storage(), name, etag=quote_etag(version), last_modified=int(last_modified.timestamp()),
+            )
+        except FileNotFoundError:
+            continue
+    return Response({'detail': '快照更新中，請稍後再試'}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'})
 
 # Device ViewSet
-class DeviceViewSet(viewsets.ModelViewSet):
+class DeviceViewSet(BulkWriteMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Device.objects.all()
     serializer_class = DeviceSerializer
     permission_classes = [IsAuthenticated, IsAdminRole]
+    pagination_class = OptInCursorPagination
+    cursor_ordering = ('id',)
 
 # FaultCase ViewSet
-class FaultCaseViewSet(viewsets.ModelViewSet):
+class FaultCaseViewSet(BulkWriteMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = FaultCase.objects.all()
     serializer_class = FaultCaseSerializer
     permission_classes = [IsAuthenticated, IsAdminRole]
+    pagination_class = OptInCursorPagination
+    cursor_ordering = ('-created_at', 'id')
 
     def get_queryset(self):
         queryset = FaultCase.objects.all()
@@ -135,20 +310,54 @@ class FaultCaseViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-created_at')
 
 # ProcedureStep ViewSet
-class ProcedureStepViewSet(viewsets.ModelViewSet):
+class ProcedureStepViewSet(BulkWriteMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ProcedureStep.objects.all()
     serializer_class = ProcedureStepSerializer
     permission_classes = [IsAuthenticated, IsAdminRole]
+    pagination_class = OptInCursorPagination
 
-    def partial_update(self, request, *args, **kwargs):
-        response = super().partial_update(request, *args, **kwargs)
+    # 游標只記錄第一個排序欄位：order 在同一故障案例內近乎唯一，未指定故障案例時各故障案例重複，改以 id 分頁
+    @property
+    def cursor_ordering(self):
+        return ('order', 'id') if self.request.query_params.get('fault_id') else ('id',)
 
-        fault_id = request.data.get('fault')
+    def get_queryset(self):
+        queryset = ProcedureStep.objects.all()
+        fault_id = self.request.query_params.get('fault_id')
         if fault_id:
-            steps = ProcedureStep.objects.filter(fault_id=fault_id).order_by('order')
-            for idx, step in enumerate(steps, start=1):
-                if step.order != idx:
-                    step.order = idx
-                    step.save()
+            queryset = queryset.filter(fault__id=fault_id)
+        return queryset.order_by('order', 'id')
+
+    def after_bulk_write(self, objs, fields):
+        if 'file' in fields:
+            for step in objs:
+                renditions.schedule(step.pk)
+
+    # 拖曳排序：一次送出故障案例的完整步驟順序，於同一交易內以單一 UPDATE 寫入
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        fault_id = request.data.get('fault')
+        ids = request.data.get('ids')
+        if not isinstance(fault_id, int) or isinstance(fault_id, bool) or not isinstance(ids, list) \
+                or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            return Response({'detail': '請提供 fault 整數與 ids 整數陣列'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            steps = {step.id: step for step in ProcedureStep.objects.select_for_update().filter(fault_id=fault_id)}
+            if len(ids) != len(set(ids)) or set(ids) != steps.keys():
+                return Response({'detail': 'ids 必須包含此故障案例的所有步驟且不可重複'}, status=status.HTTP_400_BAD_REQUEST)
+
+            now = timezone.now()
+            changed = []
+            for order, pk in enumerate(ids, start=1):
+                step = steps[pk]
+                if step.order != order:
+                    step.order = order
+                    step.updated_at = now
+                    changed.append(step)
+            ProcedureStep.objects.bulk_update(changed, ['order', 'updated_at'])
+        if changed:
+            bulk_saved(ProcedureStep, changed)
 
-        return response
\ No newline at end of file
+        serializer = self.get_serializer([steps[pk] for pk in ids], many=True)
+        return Response(serializer.data)
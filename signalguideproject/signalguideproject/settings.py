@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,9 +49,41 @@ AUTH_USER_MODEL = 'signalguideapp.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'signalguideapp.authentication.ClaimsJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # 登入與帳號管理 API 的頻率限制（見 signalguideapp/throttling.py）
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_IP_RATE', '300/min'),
+        'login_account': os.environ.get('LOGIN_ACCOUNT_RATE', '10/min'),
+        'account_ip': '60/min',
+        'account_user': '10/min',
+    },
+    # 前方反向代理的層數，決定依 X-Forwarded-For 的哪一段識別來源 IP；0 表示只用 REMOTE_ADDR，不信任用戶端送來的標頭
+    'NUM_PROXIES': int(os.environ.get('DJANGO_NUM_PROXIES', 0)),
 }
+# 頻率限制的計數所用的快取；多個 worker 時須為共用快取，否則額度隨 worker 數倍增
+THROTTLE_CACHE_ALIAS = 'default'
+
+# 已安裝 msgpack 時提供 MessagePack 格式（見 signalguideapp/renderers.py）
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('signalguideapp.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('signalguideapp.renderers.MessagePackParser')
+
+# 讀取請求以 token 宣告驗證，帳號狀態（停用、角色）快取秒數
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# 游標分頁（帶 ?cursor= 或 ?page_size= 時啟用）
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),  # 可依你想要的 Session 時長調整
@@ -63,13 +96,16 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'signalguideapp.middleware.MetricsMiddleware',  # 請求指標（/metrics），需在最前面才能量測完整處理時間
     'django.middleware.security.SecurityMiddleware',
+    'signalguideapp.middleware.CompressionMiddleware',  # gzip／brotli 壓縮，需在其他會修改內容的 middleware 之前
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'signalguideapp.middleware.ProfilingMiddleware',  # 單一請求的效能剖析（PROFILING_ENABLED），需在最後
 ]
 
 ROOT_URLCONF = 'signalguideproject.urls'
@@ -95,13 +131,96 @@ WSGI_APPLICATION = 'signalguideproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# 以環境變數 DJANGO_DB_PROFILE 選擇資料庫設定：sqlite（預設）或 postgres
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'signalguide'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'signalguide'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            # 持久連線，重複使用前先檢查連線是否仍有效
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    # 使用 psycopg 3 連線池（需安裝 psycopg[pool]）；連線池與持久連線不能同時使用
+    if os.environ.get('DJANGO_DB_POOL_MAX'):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN', 2)),
+            'max_size': int(os.environ['DJANGO_DB_POOL_MAX']),
+            'timeout': 10,
+        }
+elif DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # 寫入交易一開始就取得寫入鎖，避免讀轉寫時直接回報 database is locked
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+else:
+    raise ValueError(f'未知的 DJANGO_DB_PROFILE：{DB_PROFILE}')
+
+# SQLite 每條連線建立時套用的 PRAGMA（見 signalguideapp/database.py）
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',          # 讀寫不互相阻擋
+    'synchronous': 'NORMAL',        # WAL 模式下仍可確保一致性，提交不需每次 fsync
+    'busy_timeout': 5000,           # 遇到鎖定時等待（毫秒）
+    'cache_size': -64000,           # 64 MB 頁面快取（負值單位為 KB）
+    'mmap_size': 268435456,         # 256 MB 記憶體映射讀取
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# 預設使用 LocMem；多台伺服器時可透過環境變數改用共用後端（例如 Redis）
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'signalguide'),
     }
 }
 
+# 熱門讀取 API 的回應快取（秒），資料異動時會自動失效。
+# 失效依賴共用的版本號：LocMem 只適用單一 process，並以 RESPONSE_CACHE_LOCAL_TIMEOUT 限制保留時間；
+# 多個 worker 時 RESPONSE_CACHE_ALIAS 須指向 Redis／Memcached（DJANGO_CACHE_BACKEND、DJANGO_CACHE_LOCATION）
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+RESPONSE_CACHE_LOCAL_TIMEOUT = 60
+
+
+# Password hashing
+# DJANGO_PASSWORD_HASHER 選擇新密碼使用的演算法：argon2（需安裝 argon2-cffi，已安裝時為預設）、scrypt 或 pbkdf2；
+# 其餘演算法仍可驗證舊密碼，登入成功後自動改以選定的演算法與參數重新雜湊
+PASSWORD_HASHER = os.environ.get('DJANGO_PASSWORD_HASHER') or ('argon2' if find_spec('argon2') else 'scrypt')
+PASSWORD_HASHER_CHOICES = {
+    'scrypt': 'signalguideapp.hashers.TunedScryptPasswordHasher',
+    'argon2': 'signalguideapp.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# 各演算法參數（見 signalguideapp/hashers.py）
+SCRYPT_WORK_FACTOR = 2 ** 14
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 5
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 19456
+ARGON2_PARALLELISM = 1
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,6 +265,47 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# 上傳檔案預設以內容雜湊命名（相同內容只存一份），設為 django.core.files.storage.FileSystemStorage 可改回原檔名
+STORAGES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_MEDIA_STORAGE', 'signalguideapp.storage.ContentAddressedStorage'),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+# 內容定址儲存：剛被上傳沿用的 blob 在此秒數內不因刪除資料而釋放（留給 dedupe_media --gc），需大於上傳請求的處理時間
+MEDIA_RELEASE_GRACE = 600
+
+# 處理步驟縮圖：背景執行緒數量與是否非同步產生
+RENDITION_WORKERS = 2
+RENDITIONS_ASYNC = True
+
+# 增量同步回傳的時間點往前扣除的秒數，須大於最長的寫入交易（例如整批匯入），否則較晚提交的資料會被略過
+SYNC_WATERMARK_MARGIN = 300
+
+# 離線快照（每個作業類別一個 .jsonl.gz）：存放位置、資料異動後是否於背景重建及合併異動的等待秒數
+SNAPSHOT_ROOT = os.environ.get('SNAPSHOT_ROOT', os.path.join(BASE_DIR, 'snapshots'))
+SNAPSHOT_AUTO_REBUILD = True
+SNAPSHOT_REBUILD_DELAY = 5
+
+# 資料異動推播（/api/events/）：LocalBroker 僅限單一 process；多個 worker 時改用 signalguideapp.events.RedisBroker，空字串表示停用
+CHANGE_EVENTS_BROKER = os.environ.get('CHANGE_EVENTS_BROKER', 'signalguideapp.events.LocalBroker') or None
+CHANGE_EVENTS_REDIS_URL = os.environ.get('CHANGE_EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+
+# /metrics：設定 METRICS_TOKEN 時以 Bearer token 存取，未設定時拒絕存取；
+# METRICS_ALLOW_LOCAL=1 時允許本機不帶 token 存取（僅限未經反向代理的部署）；超過 METRICS_SLOW_REQUEST_MS 的請求記錄 SQL
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+METRICS_ALLOW_LOCAL = os.environ.get('METRICS_ALLOW_LOCAL') == '1'
+METRICS_SLOW_REQUEST_MS = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 1000))
+
+# 單一請求的效能剖析：開啟後 A 角色使用者可在請求加上 X-Profile: 1 標頭或 ?_profile=1，結果列於後台「效能剖析紀錄」
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+PROFILING_ROOT = os.environ.get('PROFILING_ROOT', os.path.join(BASE_DIR, 'profiles'))
+
+# 檔案下載交由 nginx 送出時設定 internal location 前綴（例如 '/protected-media/'），None 表示由 Django 串流
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX') or None
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
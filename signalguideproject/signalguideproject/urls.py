@@ -3,10 +3,12 @@ from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
+from signalguideapp.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('signalguideapp.urls')),  # 所有 API 路由來自這裡
+    path('metrics', metrics_view, name='metrics'),  # Prometheus 指標
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)